@@ -4,12 +4,13 @@ import websockets
 import json
 from PySide6.QtWidgets import QApplication, QMainWindow, QLabel, QPushButton, QLineEdit, QTextEdit, QVBoxLayout, QWidget, QHBoxLayout, QGraphicsDropShadowEffect
 from PySide6.QtCore import Qt, QCoreApplication, QThread, Signal
-from PySide6.QtGui import QFont, QColor
+from PySide6.QtGui import QFont, QColor, QTextCursor, QTextCharFormat
 
 class TranscriptWebSocketClient(QThread):
-    transcript_received = Signal(str)
+    transcript_received = Signal(int, str, bool)  # segment_id, text, is_final
     summary_received = Signal(str)
-    chatbot_response_received = Signal(str)
+    chatbot_delta_received = Signal(str, str)  # request_id, partial answer text
+    chatbot_response_received = Signal(str, str)  # request_id, full answer
     send_chatbot_question_signal = Signal(str)  # NEW SIGNAL
     def __init__(self, url, parent=None):
         super().__init__(parent)
@@ -37,13 +38,20 @@ class TranscriptWebSocketClient(QThread):
                             print(f"[FRONTEND] Decoded JSON: {data}")
                             if data.get("type") == "transcript":
                                 print(f"[FRONTEND] Received transcript: {data.get('text', '')}")
-                                self.transcript_received.emit(data.get("text", ""))
+                                segment_id = data.get("segment_id")
+                                self.transcript_received.emit(
+                                    -1 if segment_id is None else segment_id,
+                                    data.get("text", ""),
+                                    data.get("is_final", True)
+                                )
                             elif data.get("type") == "summary":
                                 print(f"[FRONTEND] Received summary: {data.get('text', '')}")
                                 self.summary_received.emit(data.get("text", ""))
+                            elif data.get("type") == "chatbot_delta":
+                                self.chatbot_delta_received.emit(str(data.get("request_id", "")), data.get("text", ""))
                             elif data.get("type") == "chatbot_response":
                                 print(f"[FRONTEND] Received chatbot response: {data.get('answer', '')}")
-                                self.chatbot_response_received.emit(data.get("answer", ""))
+                                self.chatbot_response_received.emit(str(data.get("request_id", "")), data.get("answer", ""))
                             else:
                                 print(f"[FRONTEND] Received non-transcript message: {data}")
                         except Exception as e:
@@ -121,6 +129,8 @@ class HoverWidget(QMainWindow):
         self._drag_active = False
         self._drag_position = None
         self._on_close = on_close
+        self._live_segment = None  # segment whose interim text is on the last transcript line
+        self._streaming_answers = {}  # chatbot request_id -> (block number, offset where the answer starts)
         font = QFont("Segoe UI", 11)
         self.setFont(font)
         if is_chatbot:
@@ -197,6 +207,7 @@ class HoverWidget(QMainWindow):
             close_btn.setParent(self)
             # --- Add websocket client for chatbot ---
             self.ws_client = TranscriptWebSocketClient("ws://localhost:8765", parent=self)
+            self.ws_client.chatbot_delta_received.connect(self.append_chatbot_delta)
             self.ws_client.chatbot_response_received.connect(self.display_chatbot_response)
             self.ws_client.start()
         elif is_summary:
@@ -308,14 +319,22 @@ class HoverWidget(QMainWindow):
             self.ws_client.summary_received.connect(self.update_summary)
             self.ws_client.start()
 
-    def update_transcript(self, text):
-        # Append the new transcript text instead of replacing
-        current = self.transcript_display.toPlainText()
-        if current:
-            self.transcript_display.setPlainText(current + '\n' + text)
-        else:
-            self.transcript_display.setPlainText(text)
-        print(f"[FRONTEND] Appended transcript: {text}")
+    def update_transcript(self, segment_id, text, is_final):
+        # Interim results rewrite their segment's line in place, the final commits it
+        cursor = self.transcript_display.textCursor()
+        cursor.movePosition(QTextCursor.End)
+        if segment_id >= 0 and segment_id == self._live_segment:
+            cursor.movePosition(QTextCursor.StartOfBlock, QTextCursor.KeepAnchor)
+            if not text and cursor.blockNumber() > 0:
+                # Empty final: the segment turned out to be silence, drop its line
+                cursor.movePosition(QTextCursor.PreviousCharacter, QTextCursor.KeepAnchor)
+            cursor.insertText(text)
+        elif text:
+            if not self.transcript_display.document().isEmpty():
+                cursor.insertText('\n')
+            cursor.insertText(text)
+        self._live_segment = None if is_final else segment_id
+        print(f"[FRONTEND] {'Committed' if is_final else 'Updated'} transcript segment {segment_id}: {text}")
 
     def update_summary(self, text):
         self.summary_display.setPlainText(text)
@@ -344,8 +363,34 @@ class HoverWidget(QMainWindow):
                 self.chat_display.append('<span style="color:#f9d923;font-weight:bold;">AI:</span> <span style="color:#fff;">[Error: Chatbot connection not established]</span>')
             self.input_box.clear()
 
-    def display_chatbot_response(self, answer):
-        self.chat_display.append(f'<span style="color:#f9d923;font-weight:bold;">AI:</span> <span style="color:#fff;">{answer}</span>')
+    def append_chatbot_delta(self, request_id, text):
+        # Streamed answer text goes on the end of that answer's own line
+        if request_id not in self._streaming_answers:
+            self.chat_display.append('<span style="color:#f9d923;font-weight:bold;">AI:</span>&nbsp;')
+            block = self.chat_display.document().lastBlock()
+            self._streaming_answers[request_id] = (block.blockNumber(), block.length() - 1)
+        block_number, _ = self._streaming_answers[request_id]
+        cursor = QTextCursor(self.chat_display.document().findBlockByNumber(block_number))
+        cursor.movePosition(QTextCursor.EndOfBlock)
+        cursor.insertText(text, self._answer_format())
+
+    def display_chatbot_response(self, request_id, answer):
+        streamed = self._streaming_answers.pop(request_id, None)
+        if streamed is None:
+            self.chat_display.append(f'<span style="color:#f9d923;font-weight:bold;">AI:</span> <span style="color:#fff;">{answer}</span>')
+            return
+        # Replace the streamed text with the final answer, in case a delta was dropped on the way
+        block_number, offset = streamed
+        block = self.chat_display.document().findBlockByNumber(block_number)
+        cursor = QTextCursor(block)
+        cursor.setPosition(block.position() + offset)
+        cursor.movePosition(QTextCursor.EndOfBlock, QTextCursor.KeepAnchor)
+        cursor.insertText(answer, self._answer_format())
+
+    def _answer_format(self):
+        fmt = QTextCharFormat()
+        fmt.setForeground(QColor("#fff"))
+        return fmt
 
     def closeEvent(self, event):
         print("[FRONTEND] HoverWidget closeEvent called.")
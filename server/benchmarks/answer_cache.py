@@ -0,0 +1,69 @@
+"""Upstream LLM calls for chatbot questions from many viewers, with and without the answer cache.
+
+Simulates a meeting where viewers ask a handful of popular questions (with
+varied casing and punctuation) over a few minutes while the transcript keeps
+growing. The stub answer takes as long as a real generate call, so questions
+asked close together overlap in flight.
+
+    python benchmarks/answer_cache.py [viewers]
+"""
+import asyncio
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from components.answer_cache import AnswerCache
+
+ANSWER_SECONDS = 1.5
+CONTENT_UPDATE_SECONDS = 20.0  # how often new finals or a summary change the content version
+MEETING_SECONDS = 120.0
+TIME_SCALE = 0.02  # run the simulated minutes in a few seconds
+QUESTIONS = ["What did we decide about the launch date?", "who owns the migration",
+             "What's the budget?", "Can you summarize the last ten minutes?", "any action items for me"]
+
+
+def variants(question):
+    return [question, question.lower(), question.upper(), question.rstrip("?") + "??", "  " + question]
+
+
+class Upstream:
+    def __init__(self):
+        self.calls = 0
+
+    async def answer(self, question):
+        self.calls += 1
+        await asyncio.sleep(ANSWER_SECONDS * TIME_SCALE)
+        return f"answer to {question}"
+
+
+async def run(viewers, cached):
+    rng = random.Random(0)
+    upstream = Upstream()
+    cache = AnswerCache()
+    start = time.perf_counter()
+
+    def version():
+        elapsed = (time.perf_counter() - start) / TIME_SCALE
+        return int(elapsed // CONTENT_UPDATE_SECONDS)
+
+    async def viewer():
+        for _ in range(3):
+            await asyncio.sleep(rng.uniform(0, MEETING_SECONDS) * TIME_SCALE)
+            question = rng.choice(variants(rng.choice(QUESTIONS)))
+            if cached:
+                await cache.get(question, version(), lambda emit: upstream.answer(question))
+            else:
+                await upstream.answer(question)
+
+    await asyncio.gather(*(viewer() for _ in range(viewers)))
+    asked = viewers * 3
+    stats = f", cache {cache.stats()}" if cached else ""
+    print(f"{'cached' if cached else 'uncached':>8}: {asked} questions -> {upstream.calls} upstream calls{stats}")
+
+
+if __name__ == "__main__":
+    viewers = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    asyncio.run(run(viewers, cached=False))
+    asyncio.run(run(viewers, cached=True))
@@ -0,0 +1,65 @@
+"""Time to first token vs full answer for chatbot questions, against the stub LLM.
+
+Runs the server's websocket handler on a local port with the stub backend
+(LLM_BACKEND=stub, each answer taking LLM_STUB_DELAY seconds to generate) and
+asks distinct questions from a websocket client, timing the first
+chatbot_delta and the final chatbot_response. The full-answer latency is
+what the client waited for before answers were streamed.
+
+    python benchmarks/chatbot_streaming.py [questions]
+"""
+import asyncio
+import json
+import os
+import sys
+import time
+
+os.environ.setdefault("LLM_BACKEND", "stub")
+os.environ.setdefault("LLM_STUB_DELAY", "2.0")
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import websockets
+
+import main as server
+
+PORT = 8799
+
+
+def percentile(values, q):
+    return sorted(values)[min(int(len(values) * q), len(values) - 1)] * 1000
+
+
+async def ask(ws, question):
+    started = time.perf_counter()
+    await ws.send(json.dumps({"type": "chatbot_question", "question": question}))
+    first = None
+    streamed = []
+    while True:
+        msg = json.loads(await ws.recv())
+        if msg["type"] == "chatbot_delta":
+            if first is None:
+                first = time.perf_counter() - started
+            streamed.append(msg["text"])
+        elif msg["type"] == "chatbot_response":
+            assert "".join(streamed).strip() == msg["answer"], (streamed, msg["answer"])
+            return first, time.perf_counter() - started
+
+
+async def run(questions):
+    session = server.get_session()
+    session.latest_summary = "The team reviewed the launch checklist and assigned owners."
+    session.transcript_index.add("the launch moved to november because the vendor slipped", 0.0, 4.0)
+    async with websockets.serve(server.transcript_ws_server, "127.0.0.1", PORT):
+        async with websockets.connect(f"ws://127.0.0.1:{PORT}") as ws:
+            firsts, totals = [], []
+            for i in range(questions):
+                first, total = await ask(ws, f"when is the launch, take {i}")
+                firsts.append(first)
+                totals.append(total)
+    print(f"{questions} questions, stub answer time {os.environ['LLM_STUB_DELAY']}s")
+    print(f"  first token : p50 {percentile(firsts, 0.5):7.1f} ms  p95 {percentile(firsts, 0.95):7.1f} ms")
+    print(f"  full answer : p50 {percentile(totals, 0.5):7.1f} ms  p95 {percentile(totals, 0.95):7.1f} ms")
+    print(f"  gateway: {server.get_gateway().stats()['generate_stream']}")
+
+
+if __name__ == "__main__":
+    asyncio.run(run(int(sys.argv[1]) if len(sys.argv) > 1 else 10))
@@ -0,0 +1,164 @@
+"""Cross-node fan-out: transcripts made on one server node reaching viewers on another.
+
+Loads main.py twice as two server nodes (separate sessions, clients and
+pub/sub connections, one event loop) and connects both to a Redis server:
+the local stand-in from fake_redis.py, or a real one given as a URL. Each
+of SESSIONS meetings is transcribed on node A, by a stand-in transcriber
+thread writing IPC into node A's reader thread as in multi_session.py,
+and watched by CLIENTS viewers on each node.
+
+It reports delivery latency from the transcriber's write to viewers on
+node A (delivered locally) and on node B (through Redis). Then it checks
+gap detection: messages the stand-in loses, and a server outage while
+node A keeps publishing, both have to show up in node B's sequence gaps.
+
+    python benchmarks/cross_node.py [seconds] [redis://host:port]
+"""
+import asyncio
+import contextlib
+import importlib.util
+import io
+import json
+import os
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+os.environ.setdefault("LLM_BACKEND", "stub")
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import websockets
+
+from components.ipc import MessageWriter
+from fake_redis import FakeRedis
+
+SESSIONS = 5
+CLIENTS = 5  # viewers per session per node
+INTERIM_SECONDS = 0.1
+FINAL_EVERY = 4  # interims per final
+LOST = 3
+OUTAGE_SECONDS = 1.0
+
+
+def percentile(values, q):
+    return sorted(values)[min(int(len(values) * q), len(values) - 1)] * 1000
+
+
+def load_node(name):
+    path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "main.py")
+    spec = importlib.util.spec_from_file_location(name, path)
+    node = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(node)
+    return node
+
+
+def transcriber(session_id, ipc, stop):
+    n = 0
+    while not stop.is_set():
+        n += 1
+        is_final = n % FINAL_EVERY == 0
+        ipc.send("transcript", segment_id=n // FINAL_EVERY, text=f"{session_id} {time.perf_counter()!r}",
+                 is_final=is_final, speech_final=is_final, start=None, end=None)
+        time.sleep(INTERIM_SECONDS)
+
+
+async def viewer(port, session_id, latencies, ready):
+    async with websockets.connect(f"ws://127.0.0.1:{port}/{session_id}") as ws:
+        ready.release()
+        async for message in ws:
+            msg = json.loads(message)
+            if msg["type"] == "transcript":
+                owner, sent = msg["text"].split(" ")
+                assert owner == session_id, msg
+                latencies.append(time.perf_counter() - float(sent))
+
+
+async def start_node(node, url):
+    node.main_event_loop = asyncio.get_running_loop()
+    await node.start_pubsub(url)
+    ws_server = await websockets.serve(node.transcript_ws_server, "127.0.0.1", 0)
+    return ws_server, ws_server.sockets[0].getsockname()[1]
+
+
+async def wait_for(condition, timeout=10.0):
+    deadline = time.perf_counter() + timeout
+    while not condition() and time.perf_counter() < deadline:
+        await asyncio.sleep(0.05)
+    return condition()
+
+
+async def run(seconds, url):
+    fake = None
+    if url is None:
+        fake = FakeRedis()
+        url = f"redis://127.0.0.1:{await fake.start()}"
+    node_a, node_b = load_node("node_a"), load_node("node_b")
+    ids = [f"meeting-{i}" for i in range(SESSIONS)]
+    local, remote = [], []
+    stop = threading.Event()
+    with contextlib.redirect_stdout(io.StringIO()) as log:
+        server_a, port_a = await start_node(node_a, url)
+        server_b, port_b = await start_node(node_b, url)
+        # The nodes serve right away and connect to Redis in the background
+        await wait_for(lambda: node_a.get_pubsub().connected and node_b.get_pubsub().connected)
+        ready = asyncio.Semaphore(0)
+        viewers = [asyncio.create_task(viewer(port, session_id, latencies, ready))
+                   for port, latencies in ((port_a, local), (port_b, remote))
+                   for session_id in ids for _ in range(CLIENTS)]
+        for _ in viewers:
+            await ready.acquire()
+        await asyncio.sleep(0.2)  # let node B's SUBSCRIBEs reach the server
+        for session_id in ids:
+            session = node_a.get_session(session_id)
+            read_fd, write_fd = os.pipe()
+            proc = SimpleNamespace(stdout=os.fdopen(read_fd, "rb"), session=session, poll=lambda: None)
+            session.transcription_process = proc
+            ipc = MessageWriter(os.fdopen(write_fd, "wb"))
+            threading.Thread(target=node_a.read_subprocess_messages, args=(proc,), daemon=True).start()
+            threading.Thread(target=transcriber, args=(session_id, ipc, stop), daemon=True).start()
+        await asyncio.sleep(seconds)
+        measured = len(local), len(remote)
+        index_b = node_b.sessions[ids[0]].transcript_index.segments
+
+        pubsub_b = node_b.get_pubsub()
+        if fake:
+            fake.lose(LOST)
+            lost_detected = await wait_for(lambda: pubsub_b.missed >= LOST)
+            missed_before = pubsub_b.missed
+            await fake.stop()
+            await asyncio.sleep(OUTAGE_SECONDS)
+            await fake.start(port=int(url.rsplit(":", 1)[1]))
+            reconnected = await wait_for(lambda: pubsub_b.reconnects and node_a.get_pubsub().reconnects)
+            await asyncio.sleep(1.0)
+            outage_missed = pubsub_b.missed - missed_before
+        stop.set()
+        await asyncio.sleep(INTERIM_SECONDS * 2)
+        for server in (server_a, server_b):
+            server.close()
+            await server.wait_closed()
+        await asyncio.gather(*viewers, return_exceptions=True)
+        stats_a, stats_b = node_a.get_pubsub().stats(), pubsub_b.stats()
+        for node in (node_a, node_b):
+            await node.get_pubsub().close()
+        if fake:
+            await fake.stop()
+
+    print(f"{SESSIONS} sessions transcribed on node A, {CLIENTS} viewers each on nodes A and B, {seconds:g}s, via {url}")
+    local, remote = local[:measured[0]], remote[:measured[1]]
+    for name, latencies in (("node A (local)", local), ("node B (Redis)", remote)):
+        print(f"  {name}: {len(latencies)} deliveries, p50 {percentile(latencies, 0.5):.2f} ms  "
+              f"p95 {percentile(latencies, 0.95):.2f} ms  p99 {percentile(latencies, 0.99):.2f} ms")
+    print(f"  node B indexed {index_b} finals of {ids[0]} for its chatbot")
+    if fake:
+        print(f"  {LOST} messages lost by the server: {'detected' if lost_detected else 'NOT detected'} "
+              f"({missed_before} missed)")
+        print(f"  {OUTAGE_SECONDS:g}s server outage: {'reconnected' if reconnected else 'NOT reconnected'}, "
+              f"{node_a.get_pubsub().unsent} messages unsent on node A, {outage_missed} reported missing on node B")
+    print(f"  node A: {stats_a}")
+    print(f"  node B: {stats_b}")
+    warnings = [line for line in log.getvalue().splitlines() if line.startswith("[!]")]
+    print(f"  {len(warnings)} warnings logged, first: {warnings[:2]}")
+
+
+if __name__ == "__main__":
+    asyncio.run(run(float(sys.argv[1]) if len(sys.argv) > 1 else 10.0, sys.argv[2] if len(sys.argv) > 2 else None))
@@ -0,0 +1,119 @@
+"""Transcript continuity across Deepgram socket drops, with and without the link supervisor.
+
+Streams word-coded audio (see fake_deepgram.py) in real time through a
+DeepgramLink to the local stand-in, aborting the active connection a few
+times along the way. The capture side is modelled like send_audio's: a
+1-second bounded queue that drops blocks while the sender is stuck. Each new
+connection takes CONNECT_SECONDS to open, about a TLS handshake to Deepgram.
+
+For each configuration it reports words missing from, or duplicated in, the
+final transcript, the failover time, and the wall time from the drop until
+transcripts resume. It fails (AssertionError) unless the spare + replay
+configuration, the one make_link() uses, loses and duplicates no words.
+
+    python benchmarks/deepgram_reconnect.py [seconds]
+"""
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import time
+
+import websockets
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from components.deepgram_link import DeepgramLink
+from components.uplink_encoder import UplinkEncoder
+from fake_deepgram import FakeDeepgram, SAMPLE_RATE, WORD_SECONDS, word_audio
+
+BLOCK_SECONDS = 0.1
+CONNECT_SECONDS = 0.3
+DROPS = 3
+CONFIGS = [
+    ("reconnect only", dict(replay_seconds=0, spare=False)),
+    ("spare socket", dict(replay_seconds=0, spare=True)),
+    ("spare + 5s replay", dict(replay_seconds=5.0, spare=True)),
+]
+
+
+async def run(name, options, seconds):
+    fake = FakeDeepgram()
+    port = await fake.start()
+
+    async def connect():
+        await asyncio.sleep(CONNECT_SECONDS)
+        return await websockets.connect(f"ws://127.0.0.1:{port}?encoding=linear16&sample_rate={SAMPLE_RATE}&interim_results=true")
+
+    link = DeepgramLink(None, None, lambda: UplinkEncoder("linear16", SAMPLE_RATE, 1), SAMPLE_RATE,
+                        connect=connect, **options)
+    await link.open()
+    await asyncio.sleep(CONNECT_SECONDS + 0.1)  # let the spare connect
+
+    word_ids = [1 + i % 999 for i in range(int(seconds / WORD_SECONDS))]
+    audio = word_audio(word_ids)
+    block = int(BLOCK_SECONDS * SAMPLE_RATE)
+    queue = asyncio.Queue(maxsize=int(1 / BLOCK_SECONDS))
+    received = []
+    drops = []  # [drop time, first result after it]
+    dropped_blocks = 0
+
+    async def capture():
+        nonlocal dropped_blocks
+        start = time.perf_counter()
+        drop_at = [seconds * (i + 1) / (DROPS + 1) for i in range(DROPS)]
+        for i in range(0, len(audio), block):
+            await asyncio.sleep(max(0.0, start + i / SAMPLE_RATE - time.perf_counter()))
+            if drop_at and i / SAMPLE_RATE >= drop_at[0]:
+                drop_at.pop(0)
+                drops.append([time.perf_counter(), None])
+                fake.drop()
+            try:
+                queue.put_nowait(audio[i:i + block])
+            except asyncio.QueueFull:
+                dropped_blocks += 1
+        await queue.put(None)
+
+    async def send():
+        while (data := await queue.get()) is not None:
+            await link.send_block(data)
+        await link.send_control("Finalize")
+
+    async def receive():
+        async for msg in link.results():
+            if msg.get("type") != "Results":
+                continue
+            if drops and drops[-1][1] is None and msg["channel"]["alternatives"][0]["transcript"]:
+                drops[-1][1] = time.perf_counter()
+            if msg.get("is_final"):
+                received.extend(msg["channel"]["alternatives"][0]["transcript"].split())
+
+    receiver = asyncio.create_task(receive())
+    with contextlib.redirect_stdout(io.StringIO()):
+        await asyncio.gather(capture(), send())
+        await asyncio.sleep(0.5)
+        await link.close()
+    receiver.cancel()
+    await fake.stop()
+
+    expected = [f"w{i}" for i in word_ids]
+    missing = len(set(expected) - set(received))
+    duplicates = len(received) - len(set(received))
+    gaps = [(resumed - dropped) * 1000 for dropped, resumed in drops if resumed]
+    stats = link.stats()
+    print(f"{name:>18}: {missing:3d}/{len(expected)} words missing, {duplicates} duplicated, "
+          f"{dropped_blocks} capture blocks dropped; failover {stats['last_recovery_ms']} ms, "
+          f"transcripts resume after {sum(gaps) / max(len(gaps), 1):.0f} ms (mean of {len(gaps)}); "
+          f"{stats['connections']} connections, {stats['trimmed_words']} replayed words trimmed")
+    return missing, duplicates
+
+
+async def main(seconds):
+    results = {name: await run(name, options, seconds) for name, options in CONFIGS}
+    missing, duplicates = results["spare + 5s replay"]
+    assert missing == 0 and duplicates == 0, f"spare + replay: {missing} words missing, {duplicates} duplicated"
+    print("OK: spare + replay kept every word exactly once")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(float(sys.argv[1]) if len(sys.argv) > 1 else 20.0))
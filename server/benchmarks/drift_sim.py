@@ -0,0 +1,121 @@
+"""Simulate a mic and a loopback device whose clocks differ by a known ppm.
+
+The mic records s(t) and the speaker records -s(t), each sampled on its own
+clock and delivered in BLOCK_SIZE callbacks. Once the mixer keeps the two
+streams aligned the mix cancels out, so the residual tells us how far apart
+the streams are (converted to samples). Without drift compensation the
+misalignment grows with meeting length.
+
+It fails (AssertionError) unless the estimate lands within PPM_TOLERANCE of
+the true offset and, from CONVERGED_MINUTES on, the compensated streams stay
+within MAX_OFFSET_SAMPLES of each other in every minute. It also stalls a
+drift-corrected speaker ramp mid-block, so the deadline mixes a partial
+block, and fails if the speaker's frames come out of order.
+
+    python benchmarks/drift_sim.py [ppm] [minutes]
+"""
+import asyncio
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from components.audio_buffer import RingBuffer
+from components.drift import DriftEstimator
+from components.mixer import AudioMixer
+
+SAMPLE_RATE = 48000
+BLOCK_SIZE = 2048
+TONE_HZ = 0.5  # low enough that even an uncorrected hour stays within half a period
+PPM_TOLERANCE = 2.0
+CONVERGED_MINUTES = 10  # the controller has settled by then
+MAX_OFFSET_SAMPLES = 2.0
+
+
+def tone(start, count, rate, offset=0.0):
+    t = (start + np.arange(count)) / rate + offset
+    return np.sin(2 * np.pi * TONE_HZ * t).astype(np.float32)[:, None]
+
+
+def offset_samples(mean_square):
+    # sin(a) - sin(a + d) is a sine of amplitude 2*sin(pi*f*d), d in seconds
+    amplitude = np.sqrt(2 * mean_square)
+    return np.arcsin(min(amplitude / 2, 1.0)) / (np.pi * TONE_HZ) * SAMPLE_RATE
+
+
+async def simulate(ppm, minutes, compensate):
+    speaker_rate = SAMPLE_RATE * (1 + ppm * 1e-6)
+    mic_ring = RingBuffer(SAMPLE_RATE * 2)
+    speaker_ring = RingBuffer(SAMPLE_RATE * 2)
+    drift = DriftEstimator(SAMPLE_RATE) if compensate else None
+    mixer = AudioMixer(mic_ring, speaker_ring, BLOCK_SIZE, loop=asyncio.get_running_loop(), drift=drift)
+    duration = minutes * 60
+    mic_k = speaker_k = 0
+    # The speaker device starts (and so delivers) at an arbitrary phase relative to the mic
+    speaker_phase = 0.37 * BLOCK_SIZE / speaker_rate
+    per_minute = {}
+    mixed_frames = 0
+    cost = 0.0
+    while True:
+        mic_t = (mic_k + 1) * BLOCK_SIZE / SAMPLE_RATE
+        speaker_t = (speaker_k + 1) * BLOCK_SIZE / speaker_rate + speaker_phase
+        if min(mic_t, speaker_t) > duration:
+            break
+        if mic_t <= speaker_t:
+            mic_ring.write(tone(mic_k * BLOCK_SIZE, BLOCK_SIZE, SAMPLE_RATE), timestamp=mic_t)
+            mic_k += 1
+        else:
+            speaker_ring.write(-tone(speaker_k * BLOCK_SIZE, BLOCK_SIZE, speaker_rate, speaker_phase), timestamp=speaker_t)
+            speaker_k += 1
+        while True:
+            t0 = time.perf_counter()
+            mixed = mixer.mix_ready()
+            cost += time.perf_counter() - t0
+            if mixed is None:
+                break
+            mixed_frames += BLOCK_SIZE
+            minute = int(mixed_frames / SAMPLE_RATE // 60)
+            per_minute.setdefault(minute, []).append(np.mean(mixed.astype(np.float64) ** 2))
+    label = "compensated" if compensate else "raw"
+    checkpoints = sorted({0, 1, 5, 15, 30, minutes - 1} & set(per_minute))
+    row = "  ".join(f"min {m:>2}: {offset_samples(np.mean(per_minute[m])):8.2f}" for m in checkpoints)
+    print(f"{label:>11} offset (samples) {row}")
+    if compensate:
+        print(f"{'':>11} estimated {drift.ppm:.1f} ppm (true {ppm}), "
+              f"mix cost {cost / mixer.blocks * 1e6:.1f} us/block, stats {mixer.stats()}")
+    settled = [offset_samples(np.mean(per_minute[m])) for m in per_minute if m >= CONVERGED_MINUTES]
+    return (drift.ppm if compensate else None), max(settled, default=0.0)
+
+
+async def partial_order():
+    loop = asyncio.get_running_loop()
+    mic, speaker = RingBuffer(8 * BLOCK_SIZE), RingBuffer(8 * BLOCK_SIZE)
+    mixer = AudioMixer(mic, speaker, BLOCK_SIZE, loop=loop, deadline=0.01,
+                       drift=DriftEstimator(SAMPLE_RATE), mix=lambda m, s: s.copy())
+    ramp = np.arange(1, 10 * BLOCK_SIZE + 1, dtype=np.float32)[:, None]
+    pos, out = 0, []
+    # One frame ahead, so the resampler carries a frame into the partial block
+    for frames in (BLOCK_SIZE + 1, BLOCK_SIZE, BLOCK_SIZE // 2, BLOCK_SIZE, BLOCK_SIZE):
+        mic.write(np.zeros((BLOCK_SIZE, 1), dtype=np.float32))
+        speaker.write(ramp[pos:pos + frames])
+        pos += frames
+        out.append(await mixer.next_block())
+    # The zero-filled tail of the partial block aside, the ramp must keep rising
+    values = np.concatenate(out)[:, 0]
+    values = values[values != 0]
+    return mixer.partial_blocks, int(np.sum(np.diff(values) <= 0))
+
+
+if __name__ == "__main__":
+    ppm = float(sys.argv[1]) if len(sys.argv) > 1 else 150
+    minutes = int(sys.argv[2]) if len(sys.argv) > 2 else 60
+    _, raw_offset = asyncio.run(simulate(ppm, minutes, compensate=False))
+    estimated, offset = asyncio.run(simulate(ppm, minutes, compensate=True))
+    assert abs(estimated - ppm) <= PPM_TOLERANCE, f"estimated {estimated:.2f} ppm, true {ppm}"
+    assert offset <= MAX_OFFSET_SAMPLES, f"compensated offset reached {offset:.2f} samples after convergence"
+    partial, reordered = asyncio.run(partial_order())
+    assert partial and not reordered, f"{reordered} speaker frames out of order around {partial} partial blocks"
+    print(f"OK: estimate within {PPM_TOLERANCE:g} ppm, compensated offset <= {offset:.2f} samples "
+          f"from minute {CONVERGED_MINUTES} (uncorrected reached {raw_offset:.0f}), "
+          f"speaker frames in order across a partial mix")
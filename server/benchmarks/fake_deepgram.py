@@ -0,0 +1,176 @@
+"""Local stand-in for Deepgram's streaming listen endpoint, for benchmarks.
+
+It accepts the query parameters main() sends (only encoding=linear16 is
+supported, sample_rate and interim_results are honoured). Once FINAL_SECONDS
+of audio is pending, or on Finalize, it sends an is_final Results message
+for the completed words. It sends interim Results for the audio in between
+when interim_results=true, and closes the socket after the last result on
+CloseStream. Word timings are relative to the start of the connection, as
+Deepgram's are. Every result can be held back by `delay` seconds to model
+recognition time.
+
+It doesn't recognise speech. Words come from the audio in one of two ways:
+  coded  - benchmarks send samples that spell out word IDs. Every
+           WORD_SECONDS holds one constant value, ID / 1000, and 0 is
+           silence; each run of one value becomes the word "w<ID>"
+  energy - real speech: every WORD_SECONDS window louder than
+           ENERGY_THRESHOLD_DB becomes a word "w<n>", numbered in order
+
+drop() aborts connections on demand to simulate network failures.
+
+    python benchmarks/fake_deepgram.py [port] [delay] [coded|energy]   # serve until interrupted
+"""
+import asyncio
+import json
+import sys
+import time
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import websockets
+
+SAMPLE_RATE = 16000
+WORD_SECONDS = 0.25
+FINAL_SECONDS = 1.0
+ENERGY_THRESHOLD_DB = -45.0
+
+
+def word_audio(word_ids, sample_rate=SAMPLE_RATE):
+    """float32 (frames, 1) audio carrying the given word IDs (1-999), one per WORD_SECONDS."""
+    per_word = int(WORD_SECONDS * sample_rate)
+    values = np.repeat(np.asarray(word_ids, dtype=np.float32) / 1000, per_word)
+    return values.reshape(-1, 1)
+
+
+class FakeDeepgram:
+    def __init__(self, sample_rate=SAMPLE_RATE, delay=0.0, words="coded"):
+        self.sample_rate = sample_rate
+        self.delay = delay
+        self.words = words
+        self.connections = set()
+        self.active = set()  # connections that have received audio
+        self.total_connections = 0
+        self._word_count = 0
+        self._server = None
+
+    async def start(self, host="127.0.0.1", port=0):
+        self._server = await websockets.serve(self._handler, host, port)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self._server.close()
+        await self._server.wait_closed()
+
+    def drop(self, only_active=True):
+        """Abort connections without a close handshake, like a network failure."""
+        for ws in list(self.active if only_active else self.connections):
+            ws.transport.abort()
+
+    def _segments(self, samples, sample_rate):
+        # (start, end, word or None) sample ranges; the last one may still be growing
+        if self.words == "coded":
+            edges = np.flatnonzero(np.diff(samples)) + 1
+            bounds = np.concatenate([[0], edges, [len(samples)]])
+            out = []
+            for a, b in zip(bounds[:-1], bounds[1:]):
+                word_id = int(round(samples[a] / 32767 * 1000))
+                out.append((a, b, f"w{word_id}" if word_id > 0 else None))
+            return out
+        per_word = int(WORD_SECONDS * sample_rate)
+        out = []
+        for a in range(0, len(samples), per_word):
+            window = samples[a:a + per_word].astype(np.float32) / 32768
+            level = 10 * np.log10(np.mean(window ** 2) + 1e-12)
+            out.append((a, min(a + per_word, len(samples)), "w" if level > ENERGY_THRESHOLD_DB else None))
+        return out
+
+    def _result(self, samples, offset, sample_rate, is_final):
+        words = []
+        count = self._word_count
+        for a, b, word in self._segments(samples, sample_rate):
+            if word is None:
+                continue
+            if word == "w":
+                count += 1
+                word = f"w{count}"
+            words.append({"word": word, "start": (offset + a) / sample_rate, "end": (offset + b) / sample_rate})
+        if is_final:
+            self._word_count = count
+        return {
+            "type": "Results",
+            "start": offset / sample_rate,
+            "duration": len(samples) / sample_rate,
+            "is_final": is_final,
+            "speech_final": is_final,
+            "channel": {"alternatives": [{"transcript": " ".join(w["word"] for w in words), "words": words}]},
+        }
+
+    async def _sender(self, ws, outbox):
+        # Holds every result back by `delay`, in order
+        while True:
+            due, result = await outbox.get()
+            await asyncio.sleep(max(0.0, due - time.perf_counter()))
+            if result is None:
+                # CloseStream: every result is out, close like Deepgram does
+                await ws.close()
+                return
+            await ws.send(json.dumps(result))
+
+    async def _handler(self, ws):
+        params = parse_qs(urlparse(ws.request.path).query)
+        if params.get("encoding", ["linear16"])[0] != "linear16":
+            await ws.close(code=1008, reason="fake Deepgram only accepts linear16")
+            return
+        sample_rate = int(params.get("sample_rate", [self.sample_rate])[0])
+        interim = params.get("interim_results", ["false"])[0] == "true"
+        self.connections.add(ws)
+        self.total_connections += 1
+        outbox = asyncio.Queue()
+        sender = asyncio.create_task(self._sender(ws, outbox))
+
+        def emit(result):
+            outbox.put_nowait((time.perf_counter() + self.delay, result))
+
+        per_final = int(FINAL_SECONDS * sample_rate)
+        pending = np.zeros(0, dtype=np.int16)
+        offset = 0  # connection sample index where `pending` starts
+        try:
+            async for message in ws:
+                if isinstance(message, str):
+                    msg_type = json.loads(message).get("type")
+                    if msg_type in ("Finalize", "CloseStream") and len(pending):
+                        emit(self._result(pending, offset, sample_rate, True))
+                        offset += len(pending)
+                        pending = pending[:0]
+                    if msg_type == "CloseStream":
+                        emit(None)
+                    continue
+                self.active.add(ws)
+                pending = np.concatenate([pending, np.frombuffer(message, dtype=np.int16)])
+                if len(pending) >= per_final:
+                    # Finalize the completed words, the last one may still be going
+                    cut = self._segments(pending, sample_rate)[-1][0] or len(pending)
+                    emit(self._result(pending[:cut], offset, sample_rate, True))
+                    offset += cut
+                    pending = pending[cut:]
+                if interim and len(pending):
+                    emit(self._result(pending, offset, sample_rate, False))
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            sender.cancel()
+            self.connections.discard(ws)
+            self.active.discard(ws)
+
+
+async def _serve(port, delay, words):
+    fake = FakeDeepgram(delay=delay, words=words)
+    port = await fake.start(port=port)
+    print(f"Fake Deepgram listening on ws://127.0.0.1:{port} (delay {delay}s, {words} words)")
+    await asyncio.Future()
+
+
+if __name__ == "__main__":
+    asyncio.run(_serve(int(sys.argv[1]) if len(sys.argv) > 1 else 8766,
+                       float(sys.argv[2]) if len(sys.argv) > 2 else 0.0,
+                       sys.argv[3] if len(sys.argv) > 3 else "coded"))
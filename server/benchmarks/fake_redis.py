@@ -0,0 +1,105 @@
+"""Local stand-in for a Redis server's pub/sub, for benchmarks.
+
+It speaks RESP and implements what RedisPubSub uses: PING, AUTH (any
+password), SUBSCRIBE, UNSUBSCRIBE and PUBLISH, with Redis' reply shapes.
+Subscribers get ["message", channel, payload] pushes. There is no keyspace.
+
+lose() discards the next published messages without forwarding them, and
+drop() aborts every connection, to simulate lost messages and network
+failures. stop() and start() on the same port simulate a server outage.
+
+    python benchmarks/fake_redis.py [port]   # serve until interrupted
+"""
+import asyncio
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from components.pubsub import encode_command, read_reply
+
+
+def subscription_reply(kind, channel, count):
+    return b"*3\r\n$%d\r\n%s\r\n$%d\r\n%s\r\n:%d\r\n" % (len(kind), kind, len(channel), channel, count)
+
+
+class FakeRedis:
+    def __init__(self):
+        self.subscribers = {}  # channel -> set of StreamWriters
+        self.connections = set()
+        self.published = 0
+        self.lost = 0
+        self._lose = 0
+        self._server = None
+
+    async def start(self, host="127.0.0.1", port=0):
+        self._server = await asyncio.start_server(self._handler, host, port)
+        return self._server.sockets[0].getsockname()[1]
+
+    async def stop(self):
+        self._server.close()
+        self.drop()
+        await self._server.wait_closed()
+        while self.connections:
+            await asyncio.sleep(0.01)
+
+    def lose(self, count):
+        """Discard the next `count` PUBLISHed messages."""
+        self._lose += count
+
+    def drop(self):
+        """Abort every client connection."""
+        for writer in list(self.connections):
+            writer.transport.abort()
+
+    async def _handler(self, reader, writer):
+        self.connections.add(writer)
+        channels = set()
+        try:
+            while True:
+                command = await read_reply(reader)
+                name = command[0].upper()
+                if name == b"PING":
+                    writer.write(b"+PONG\r\n")
+                elif name == b"AUTH":
+                    writer.write(b"+OK\r\n")
+                elif name == b"SUBSCRIBE":
+                    for channel in command[1:]:
+                        channels.add(channel)
+                        self.subscribers.setdefault(channel, set()).add(writer)
+                        writer.write(subscription_reply(b"subscribe", channel, len(channels)))
+                elif name == b"UNSUBSCRIBE":
+                    for channel in command[1:] or list(channels):
+                        channels.discard(channel)
+                        self.subscribers.get(channel, set()).discard(writer)
+                        writer.write(subscription_reply(b"unsubscribe", channel, len(channels)))
+                elif name == b"PUBLISH":
+                    channel, payload = command[1], command[2]
+                    self.published += 1
+                    receivers = self.subscribers.get(channel, ())
+                    if self._lose:
+                        self._lose -= 1
+                        self.lost += 1
+                        receivers = ()
+                    for subscriber in receivers:
+                        subscriber.write(encode_command(b"message", channel, payload))
+                    writer.write(b":%d\r\n" % len(receivers))
+                else:
+                    writer.write(b"-ERR unknown command '%s'\r\n" % name)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            for channel in channels:
+                self.subscribers.get(channel, set()).discard(writer)
+            self.connections.discard(writer)
+            writer.close()
+
+
+async def serve(port):
+    fake = FakeRedis()
+    port = await fake.start(port=port)
+    print(f"Fake Redis pub/sub on redis://127.0.0.1:{port}")
+    await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    asyncio.run(serve(int(sys.argv[1]) if len(sys.argv) > 1 else 6379))
@@ -0,0 +1,140 @@
+"""Broadcast cost with one stalled viewer, old gather() fan-out vs per-client queues.
+
+Fake websockets take 1 ms per send, except one that takes 500 ms. The
+transcriber produces a transcript every 10 ms; we report how long each
+broadcast call holds the caller and how long after it was produced a fast
+client gets each transcript.
+
+Then each overflow policy is run against a stalled viewer with a queue of
+OVERFLOW_QUEUE messages. It fails (AssertionError) if a final is ever
+dropped, if drop_interim/coalesce don't drop (or coalesce) the interims, or
+if a queue full of finals doesn't disconnect the viewer.
+
+    python benchmarks/fanout.py
+"""
+import asyncio
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from components.fanout import ClientChannel
+
+MESSAGES = 20
+INTERVAL = 0.01
+OVERFLOW_QUEUE = 3
+INTERIMS = 3  # per segment in the overflow checks
+
+
+class FakeSocket:
+    def __init__(self, delay):
+        self.delay = delay
+        self.received = []
+
+    async def send(self, data):
+        await asyncio.sleep(self.delay)
+        self.received.append((data, time.perf_counter()))
+
+    async def close(self, code=1000, reason=""):
+        pass
+
+
+def sockets(n):
+    return [FakeSocket(0.5)] + [FakeSocket(0.001) for _ in range(n - 1)]
+
+
+async def run_gather(n):
+    clients = sockets(n)
+    call_ms, sent_at = [], []
+    start = time.perf_counter()
+    for i in range(MESSAGES):
+        sent_at.append(start + i * INTERVAL)
+        await asyncio.sleep(max(0, sent_at[-1] - time.perf_counter()))
+        t0 = time.perf_counter()
+        await asyncio.gather(*(c.send(str(i)) for c in clients))
+        call_ms.append((time.perf_counter() - t0) * 1000)
+    fast = clients[-1]
+    delivery = [(t - sent_at[int(d)]) * 1000 for d, t in fast.received]
+    return call_ms, delivery
+
+
+async def run_queues(n):
+    clients = sockets(n)
+    channels = [ClientChannel(c, max_queue=100) for c in clients]
+    call_ms, sent_at = [], []
+    start = time.perf_counter()
+    for i in range(MESSAGES):
+        sent_at.append(start + i * INTERVAL)
+        await asyncio.sleep(max(0, sent_at[-1] - time.perf_counter()))
+        t0 = time.perf_counter()
+        for ch in channels:
+            ch.enqueue(str(i))
+        call_ms.append((time.perf_counter() - t0) * 1000)
+    fast = clients[-1]
+    while len(fast.received) < MESSAGES:
+        await asyncio.sleep(0.01)
+    for ch in channels:
+        ch.cancel()
+    delivery = [(t - sent_at[int(d)]) * 1000 for d, t in fast.received]
+    return call_ms, delivery
+
+
+def transcript(channel, segment_id, final):
+    text = f"{'f' if final else 'i'}{segment_id}"
+    channel.enqueue(text, key=("segment", segment_id), droppable=not final)
+
+
+async def overflow(policy):
+    # The writer takes the first message and stalls on it; the rest stay queued
+    socket = FakeSocket(3600)
+    channel = ClientChannel(socket, max_queue=OVERFLOW_QUEUE, policy=policy)
+    transcript(channel, 0, True)
+    await asyncio.sleep(0)
+    # Two segments' worth of interims, then their finals
+    for segment_id in (1, 2):
+        for _ in range(INTERIMS):
+            transcript(channel, segment_id, False)
+    transcript(channel, 1, True)
+    transcript(channel, 2, True)
+    queued = [entry[0] for entry in channel._queue]
+    interim_stats = channel.stats()
+    # Only finals from here, more than the queue holds
+    for segment_id in range(3, 3 + OVERFLOW_QUEUE + 1):
+        transcript(channel, segment_id, True)
+    stats = channel.stats()
+    channel.cancel()
+    print(f"  {policy:>12}: after interims+finals queued {queued} {interim_stats} | "
+          f"after only finals {stats}")
+    return queued, interim_stats, stats
+
+
+async def check_overflow():
+    print(f"Overflow with a stalled viewer, queue of {OVERFLOW_QUEUE}:")
+    queued, interim, final = await overflow("drop_interim")
+    assert "f1" in queued and "f2" in queued, queued
+    assert interim["dropped"] > 0 and not interim["closed"], interim
+    # Every drop was an interim, the queue full of finals closed the connection instead
+    assert final["closed"] and final["dropped"] <= 2 * INTERIMS, final
+
+    queued, interim, final = await overflow("coalesce")
+    assert queued == ["f1", "f2"], queued  # each final replaced its segment's interims
+    assert interim["coalesced"] == 2 * INTERIMS and not interim["closed"], interim
+    assert final["closed"] and final["dropped"] == 0, final
+
+    _, interim, _ = await overflow("disconnect")
+    assert interim["closed"] and interim["dropped"] == 0, interim
+    print("OK: interims dropped or coalesced, no final ever dropped, full queues of finals disconnect")
+
+
+async def main():
+    for n in (2, 10, 100, 1000):
+        for name, run in (("gather", run_gather), ("queues", run_queues)):
+            call_ms, delivery = await run(n)
+            print(f"{n:>5} clients {name:>6}: broadcast call p50={np.median(call_ms):8.3f} ms  "
+                  f"fast client delivery p50={np.median(delivery):8.2f} ms max={np.max(delivery):8.2f} ms")
+    await check_overflow()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,65 @@
+"""Realtime factor of the transcriber's --file mode against the local Deepgram stand-in.
+
+Transcribes audio/out.wav, audio/microphone_only.wav and audio/speaker_only.wav
+with transcribe_files(), one at a time and then all at once, against
+fake_deepgram.py in energy mode (results held back by `delay`, as recognition
+time). Summaries use the stub LLM. The fake answers as fast as it reads, so
+the realtime factor is that of the client side: reading, encoding, the socket
+and the transcript path. Live capture needs the full length of each recording.
+
+    python benchmarks/file_transcription.py [delay]
+"""
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import time
+
+os.environ.setdefault("LLM_BACKEND", "stub")
+os.environ.setdefault("LLM_STUB_DELAY", "0.2")
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(SERVER_DIR)
+sys.path.append(os.path.join(SERVER_DIR, "components"))
+import soundfile as sf
+import websockets
+
+with contextlib.redirect_stdout(io.StringIO()):
+    import components.transcribe_audio as transcriber
+from fake_deepgram import FakeDeepgram
+
+AUDIO_DIR = os.path.join(os.path.dirname(SERVER_DIR), "audio")
+FILES = ["out.wav", "microphone_only.wav", "speaker_only.wav"]
+
+
+async def run(jobs, delay):
+    fake = FakeDeepgram(delay=delay, words="energy")
+    port = await fake.start()
+    transcriber.DEEPGRAM_URL = f"ws://127.0.0.1:{port}"
+    paths = [os.path.join(AUDIO_DIR, name) for name in FILES]
+    log = io.StringIO()
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(log):
+        results = await transcriber.transcribe_files(paths, jobs, connect=websockets.connect)
+    elapsed = time.perf_counter() - started
+    await fake.stop()
+    audio = sum(sf.info(path).duration for path in paths)
+    print(f"jobs={jobs}: {len(results)}/{len(paths)} files, {audio:.1f}s of audio in {elapsed:.2f}s "
+          f"({audio / elapsed:.1f}x realtime overall)")
+    for path in paths:
+        stats = results.get(path)
+        if stats:
+            print(f"  {stats['file']:>20}: {stats['segments']:3d} segments, realtime factor "
+                  f"{stats['realtime_factor']:.4f} ({stats['audio_seconds'] / stats['elapsed_seconds']:.1f}x)")
+    errors = [line for line in log.getvalue().splitlines() if line.startswith("[ERROR]")]
+    for line in errors:
+        print(f"  {line}")
+
+
+async def main(delay):
+    for jobs in (1, len(FILES)):
+        await run(jobs, delay)
+
+
+if __name__ == "__main__":
+    asyncio.run(main(float(sys.argv[1]) if len(sys.argv) > 1 else 0.0))
@@ -0,0 +1,130 @@
+"""Throughput of the framed IPC channel against the old stdout regex parser.
+
+A writer thread plays the transcriber: it emits transcripts and the odd
+summary, interleaved with the per-block debug lines. The old path pushes
+all of it through one text pipe and regex-parses every line. The framed
+path sends only typed messages on the pipe, with logs on a separate one.
+We time how long the reader takes to recover every transcript and summary,
+alternating the two for ROUNDS rounds, and report the median and range.
+Run to run noise on a shared machine is as large as the difference between
+them: the framed channel is about as fast, its point is that log lines
+can't be parsed as data.
+
+    python benchmarks/ipc_throughput.py [transcripts]
+"""
+import io
+import os
+import re
+import sys
+import threading
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from components.ipc import encode_message, read_messages
+
+DEBUG_LINES_PER_TRANSCRIPT = 10
+SUMMARY_EVERY = 50
+ROUNDS = 5
+TEXT = "so the plan for next sprint is to ship the recorder and fix the drift issue"
+SUMMARY = "The team agreed to ship the recorder.\nDrift fixes land next sprint."
+
+
+def legacy_writer(fd, count):
+    with io.open(fd, "w", encoding="utf-8") as out:
+        for i in range(count):
+            for _ in range(DEBUG_LINES_PER_TRANSCRIPT):
+                out.write("[DEBUG] Mixed audio max amplitude: 0.4213\n")
+            out.write(f"Transcript: {TEXT} {i}\n")
+            if i % SUMMARY_EVERY == 0:
+                out.write("\n=== SUMMARY ===\n" + SUMMARY + "\n================\n\n")
+
+
+def legacy_reader(fd):
+    # Same logic print_subprocess_output used before the IPC channel
+    transcripts = summaries = 0
+    summary_mode = False
+    summary_lines = []
+    with io.open(fd, "r", encoding="utf-8") as stream:
+        for line in stream:
+            match = re.match(r"Transcript: (.*)", line)
+            if match:
+                transcripts += 1
+            if "=== SUMMARY ===" in line:
+                summary_mode = True
+                summary_lines = []
+                continue
+            if summary_mode:
+                if "===============" in line:
+                    summary_mode = False
+                    if "\n".join(summary_lines).strip():
+                        summaries += 1
+                else:
+                    summary_lines.append(line.rstrip())
+    return transcripts, summaries
+
+
+def framed_writer(fd, log_fd, count):
+    with io.open(fd, "wb") as out, io.open(log_fd, "w", encoding="utf-8") as log:
+        for i in range(count):
+            for _ in range(DEBUG_LINES_PER_TRANSCRIPT):
+                log.write("[DEBUG] Mixed audio max amplitude: 0.4213\n")
+            out.write(encode_message("transcript", text=f"{TEXT} {i}"))
+            if i % SUMMARY_EVERY == 0:
+                out.write(encode_message("summary", text=SUMMARY))
+
+
+def drain(fd):
+    with io.open(fd, "rb") as stream:
+        while stream.read(65536):
+            pass
+
+
+def framed_reader(fd):
+    transcripts = summaries = 0
+    with io.open(fd, "rb") as stream:
+        for msg in read_messages(stream):
+            if msg["type"] == "transcript":
+                transcripts += 1
+            elif msg["type"] == "summary":
+                summaries += 1
+    return transcripts, summaries
+
+
+def run_legacy(count):
+    r, w = os.pipe()
+    writer = threading.Thread(target=legacy_writer, args=(w, count))
+    t0 = time.perf_counter()
+    writer.start()
+    result = legacy_reader(r)
+    writer.join()
+    return time.perf_counter() - t0, result
+
+
+def run_framed(count):
+    r, w = os.pipe()
+    log_r, log_w = os.pipe()
+    writer = threading.Thread(target=framed_writer, args=(w, log_w, count))
+    logs = threading.Thread(target=drain, args=(log_r,))
+    t0 = time.perf_counter()
+    writer.start()
+    logs.start()
+    result = framed_reader(r)
+    writer.join()
+    elapsed = time.perf_counter() - t0
+    logs.join()
+    return elapsed, result
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    runs = {"regex stdout": run_legacy, "framed ipc": run_framed}
+    times = {name: [] for name in runs}
+    for _ in range(ROUNDS):
+        for name, run in runs.items():
+            elapsed, (transcripts, summaries) = run(count)
+            assert (transcripts, summaries) == (count, (count - 1) // SUMMARY_EVERY + 1), name
+            times[name].append(elapsed)
+    for name, elapsed in times.items():
+        rates = sorted(count / t for t in elapsed)
+        print(f"{name:>12}: {count} transcripts over {ROUNDS} rounds, median {rates[len(rates) // 2]:,.0f}/s "
+              f"(range {rates[0]:,.0f}-{rates[-1]:,.0f}/s)")
@@ -0,0 +1,71 @@
+"""Event-loop stalls and LLM call behaviour through the gateway, on the stub backend.
+
+A heartbeat task ticks every 10 ms (standing in for client broadcasts) while
+a burst of chatbot questions arrives. Calling the stub backend directly on the
+loop (what the chatbot handler used to do) stalls the heartbeat for every
+call in turn. Going through the gateway keeps it ticking, caps how many calls
+are in flight, and retries the stub's simulated failures.
+
+    python benchmarks/llm_gateway.py [questions]
+"""
+import asyncio
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from components.llm_gateway import LLMGateway, StubBackend
+
+CALL_SECONDS = 0.2
+FAIL_RATE = 0.1
+TICK_SECONDS = 0.01
+
+
+async def heartbeat(gaps, stop):
+    last = time.perf_counter()
+    while not stop.is_set():
+        await asyncio.sleep(TICK_SECONDS)
+        now = time.perf_counter()
+        gaps.append(now - last)
+        last = now
+
+
+async def run(questions, gateway):
+    backend = StubBackend(delay=CALL_SECONDS, fail_rate=FAIL_RATE, seed=1)
+    llm = LLMGateway(backend, backoff=0.05) if gateway else None
+    stop = asyncio.Event()
+    gaps = []
+    beat = asyncio.create_task(heartbeat(gaps, stop))
+    await asyncio.sleep(0.05)
+    failures = 0
+    started = time.perf_counter()
+
+    async def ask(i):
+        nonlocal failures
+        prompt = f"Question: question {i}\nAnswer:"
+        try:
+            if gateway:
+                await llm.generate(prompt)
+            else:
+                backend.generate(prompt=prompt)
+        except ConnectionError:
+            failures += 1
+
+    await asyncio.gather(*(ask(i) for i in range(questions)))
+    elapsed = time.perf_counter() - started
+    stop.set()
+    await beat
+    ms = np.array(gaps) * 1000
+    label = "gateway" if gateway else "direct"
+    print(f"{label:>8}: {questions} questions in {elapsed:.2f}s, {backend.calls} backend calls, "
+          f"{failures} failed; heartbeat gap p50 {np.median(ms):.1f} ms max {ms.max():.0f} ms")
+    if gateway:
+        print(f"          gateway stats: {llm.stats()}")
+
+
+if __name__ == "__main__":
+    questions = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    asyncio.run(run(questions, gateway=False))
+    asyncio.run(run(questions, gateway=True))
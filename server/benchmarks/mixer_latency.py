@@ -0,0 +1,110 @@
+"""Compare the old 5 ms polling mixer against the event-driven AudioMixer.
+
+Two threads stand in for the PortAudio callbacks and write BLOCK_SIZE blocks
+at real-time pace. For each mixed block we measure the delay between the
+moment both sources had the block and the moment the mixer emitted it, plus
+the process CPU time used over the run.
+
+    python benchmarks/mixer_latency.py [seconds]
+"""
+import asyncio
+import os
+import sys
+import threading
+import time
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from components.audio_buffer import RingBuffer
+from components.mixer import AudioMixer, mix_blocks
+
+SAMPLE_RATE = 48000
+BLOCK_SIZE = 2048
+
+
+def producer(ring, ready_times, lock, stop, on_write):
+    block = np.zeros((BLOCK_SIZE, 1), dtype=np.float32)
+    period = BLOCK_SIZE / SAMPLE_RATE
+    next_t = time.perf_counter()
+    n = 0
+    while not stop.is_set():
+        next_t += period
+        delay = next_t - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        ring.write(block)
+        n += 1
+        with lock:
+            # The block is ready once the slower of the two sources has written it
+            ready_times[n] = time.perf_counter()
+        on_write()
+
+
+async def legacy_mixer(mic_ring, speaker_ring, out_times, stop):
+    mic_block = np.empty((BLOCK_SIZE, 1), dtype=np.float32)
+    speaker_block = np.empty((BLOCK_SIZE, 1), dtype=np.float32)
+    wakeups = 0
+    while not stop.is_set():
+        while mic_ring.available < BLOCK_SIZE or speaker_ring.available < BLOCK_SIZE:
+            await asyncio.sleep(0.005)
+            wakeups += 1
+            if stop.is_set():
+                return wakeups
+        mic_ring.read(BLOCK_SIZE, out=mic_block)
+        speaker_ring.read(BLOCK_SIZE, out=speaker_block)
+        mix_blocks(mic_block, speaker_block)
+        out_times.append(time.perf_counter())
+    return wakeups
+
+
+async def event_mixer(mixer, out_times, stop):
+    while not stop.is_set():
+        try:
+            await asyncio.wait_for(mixer.next_block(), 0.5)
+        except asyncio.TimeoutError:
+            continue
+        out_times.append(time.perf_counter())
+    return mixer.wakeups
+
+
+async def run(mode, seconds):
+    loop = asyncio.get_running_loop()
+    mic_ring = RingBuffer(SAMPLE_RATE * 2)
+    speaker_ring = RingBuffer(SAMPLE_RATE * 2)
+    mixer = AudioMixer(mic_ring, speaker_ring, BLOCK_SIZE, loop=loop, deadline=2 * BLOCK_SIZE / SAMPLE_RATE)
+    on_write = mixer.notify if mode == "event" else (lambda: None)
+    stop = threading.Event()
+    lock = threading.Lock()
+    mic_ready, speaker_ready = {}, {}
+    out_times = []
+    threads = [
+        threading.Thread(target=producer, args=(mic_ring, mic_ready, lock, stop, on_write)),
+        threading.Thread(target=producer, args=(speaker_ring, speaker_ready, lock, stop, on_write)),
+    ]
+    cpu0 = time.process_time()
+    for t in threads:
+        t.start()
+    if mode == "event":
+        task = asyncio.create_task(event_mixer(mixer, out_times, stop))
+    else:
+        task = asyncio.create_task(legacy_mixer(mic_ring, speaker_ring, out_times, stop))
+    await asyncio.sleep(seconds)
+    stop.set()
+    wakeups = await task
+    for t in threads:
+        t.join()
+    cpu = time.process_time() - cpu0
+    latencies = []
+    for i, out_t in enumerate(out_times, start=1):
+        if i in mic_ready and i in speaker_ready:
+            latencies.append(out_t - max(mic_ready[i], speaker_ready[i]))
+    lat = np.array(latencies) * 1000
+    print(f"{mode:>7}: blocks={len(out_times)} wakeups/s={wakeups / seconds:6.1f} "
+          f"cpu={cpu / seconds * 100:5.2f}% latency ms p50={np.percentile(lat, 50):.3f} "
+          f"p95={np.percentile(lat, 95):.3f} max={lat.max():.3f}")
+
+
+if __name__ == "__main__":
+    seconds = float(sys.argv[1]) if len(sys.argv) > 1 else 5
+    asyncio.run(run("polling", seconds))
+    asyncio.run(run("event", seconds))
@@ -0,0 +1,188 @@
+"""Load test: many meetings on one server, each with its own transcriber and viewers.
+
+Runs the server's websocket handler on a local port with SESSIONS sessions
+of CLIENTS viewers each, joined through the path (ws://host/meeting-<n>).
+Each session gets a stand-in transcriber: a thread writing interims, finals
+and summaries in the IPC framing into a pipe read by main.py's reader
+thread, at the rate a live meeting produces them. Every session asks the
+chatbot the same question once, against the stub LLM.
+
+The last session has no stand-in transcriber. Early on one of its viewers
+sends "start" and then "stop", which spawn and reap a real process
+(a stand-in that takes TERM_SECONDS to exit on SIGTERM, as a transcriber
+closing its archive and socket does) while the other sessions stream.
+
+It reports transcript delivery latency from the transcriber's write to the
+viewer, event loop lag on the server, and checks isolation: no viewer sees
+another session's transcript or summary, and the chatbot's per-session cache
+sends each session's question upstream separately. It fails
+(AssertionError) if starting and stopping a meeting lags the event loop by
+more than MAX_LAG_SECONDS.
+
+    python benchmarks/multi_session.py [sessions] [seconds]
+"""
+import asyncio
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+os.environ.setdefault("LLM_BACKEND", "stub")
+os.environ.setdefault("LLM_STUB_DELAY", "0.5")
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import websockets
+
+import main as server
+from components.ipc import MessageWriter
+
+CLIENTS = 5
+INTERIM_SECONDS = 0.25
+FINAL_EVERY = 4  # interims per final
+SUMMARY_SECONDS = 3.0
+TERM_SECONDS = 1.0
+MAX_LAG_SECONDS = 0.25
+# Stands in for transcribe_audio.py: idles until terminated, then takes TERM_SECONDS to exit
+STAND_IN = ("import signal, sys, time\n"
+            f"signal.signal(signal.SIGTERM, lambda *_: (time.sleep({TERM_SECONDS}), sys.exit(0)))\n"
+            "time.sleep(3600)\n")
+
+
+def percentile(values, q):
+    return sorted(values)[min(int(len(values) * q), len(values) - 1)] * 1000
+
+
+def transcriber(session_id, ipc, seconds, stop):
+    # What one transcriber process writes to its stdout over a meeting
+    started = time.perf_counter()
+    segment_id = n = 0
+    last_summary = started
+    while not stop.is_set() and time.perf_counter() - started < seconds:
+        n += 1
+        is_final = n % FINAL_EVERY == 0
+        ipc.send("transcript", segment_id=segment_id, text=f"{session_id} {time.perf_counter()!r}",
+                 is_final=is_final, speech_final=is_final, start=None, end=None)
+        if is_final:
+            segment_id += 1
+        if time.perf_counter() - last_summary >= SUMMARY_SECONDS:
+            ipc.send("summary", text=f"{session_id} summary")
+            last_summary = time.perf_counter()
+        time.sleep(INTERIM_SECONDS)
+
+
+async def viewer(port, session_id, latencies, leaks, ready):
+    async with websockets.connect(f"ws://127.0.0.1:{port}/{session_id}") as ws:
+        ready.release()
+        async for message in ws:
+            msg = json.loads(message)
+            if msg["type"] == "transcript":
+                owner, sent = msg["text"].split(" ")
+                latencies.append(time.perf_counter() - float(sent))
+            elif msg["type"] == "summary":
+                owner = msg["text"].split(" ")[0]
+            else:
+                continue
+            if owner != session_id:
+                leaks.append((session_id, msg))
+
+
+async def loop_lag(lags, stop):
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(0.01)
+        lags.append(time.perf_counter() - started - 0.01)
+
+
+async def ask(port, session_id):
+    async with websockets.connect(f"ws://127.0.0.1:{port}/{session_id}") as ws:
+        await ws.send(json.dumps({"type": "chatbot_question", "question": "what was decided?"}))
+        while json.loads(await ws.recv())["type"] != "chatbot_response":
+            pass
+
+
+def spawn_stand_in(standby=False, session=None, files=None):
+    # spawn_transcriber's process, minus the IPC reader threads: the stand-in writes nothing
+    proc = subprocess.Popen([sys.executable, "-c", STAND_IN], stdin=subprocess.PIPE if standby else None)
+    proc.session = session
+    return proc
+
+
+async def start_stop(port, session_id):
+    # A viewer starting its meeting, then stopping it once the transcriber is up
+    session = server.get_session(session_id)
+    async with websockets.connect(f"ws://127.0.0.1:{port}/{session_id}") as ws:
+        started = time.perf_counter()
+        await ws.send(json.dumps({"type": "command", "command": "start"}))
+        while not session.transcribing:
+            await asyncio.sleep(0.01)
+        await asyncio.sleep(0.5)
+        await ws.send(json.dumps({"type": "command", "command": "stop"}))
+        while session.transcribing:
+            await asyncio.sleep(0.01)
+        return time.perf_counter() - started
+
+
+async def run(sessions, seconds):
+    server.main_event_loop = asyncio.get_running_loop()
+    server.spawn_transcriber = spawn_stand_in
+    ws_server = await websockets.serve(server.transcript_ws_server, "127.0.0.1", 0)
+    port = ws_server.sockets[0].getsockname()[1]
+    ids = [f"meeting-{i}" for i in range(sessions)]
+    latencies, leaks, lags = [], [], []
+    stop = threading.Event()
+    ready = asyncio.Semaphore(0)
+    with contextlib.redirect_stdout(io.StringIO()):
+        viewers = [asyncio.create_task(viewer(port, session_id, latencies, leaks, ready))
+                   for session_id in ids for _ in range(CLIENTS)]
+        for _ in viewers:
+            await ready.acquire()
+        threads = []
+        for session_id in ids:
+            server.get_session(session_id).latest_summary = f"{session_id} summary"
+        for session_id in ids[:-1]:
+            session = server.get_session(session_id)
+            read_fd, write_fd = os.pipe()
+            proc = SimpleNamespace(stdout=os.fdopen(read_fd, "rb"), session=session, poll=lambda: None)
+            session.transcription_process = proc
+            ipc = MessageWriter(os.fdopen(write_fd, "wb"))
+            threads.append((threading.Thread(target=server.read_subprocess_messages, args=(proc,), daemon=True), ipc))
+            threads.append((threading.Thread(target=transcriber, args=(session_id, ipc, seconds, stop), daemon=True), ipc))
+        for thread, _ in threads:
+            thread.start()
+        lag_task = asyncio.create_task(loop_lag(lags, stop))
+        await asyncio.sleep(seconds / 4)
+        first_lag, first_latency = len(lags), len(latencies)
+        start_stop_seconds = await start_stop(port, ids[-1])
+        start_stop_lags, start_stop_latencies = lags[first_lag:], latencies[first_latency:]
+        await asyncio.sleep(max(0.0, seconds / 4 - start_stop_seconds))
+        await asyncio.gather(*(ask(port, session_id) for session_id in ids))
+        await asyncio.sleep(seconds / 2 + 0.5)
+        stop.set()
+        lag_task.cancel()
+        # Closing the server ends every viewer's connection cleanly
+        ws_server.close()
+        await ws_server.wait_closed()
+        await asyncio.gather(*viewers, return_exceptions=True)
+        server.take_standby().kill()
+
+    calls = server.get_gateway().stats()["generate_stream"]["calls"]
+    print(f"{sessions} sessions x {CLIENTS} viewers for {seconds:g}s: {len(latencies)} transcript deliveries "
+          f"({len(latencies) / seconds:.0f}/s)")
+    print(f"  delivery latency : p50 {percentile(latencies, 0.5):.2f} ms  p95 {percentile(latencies, 0.95):.2f} ms  "
+          f"p99 {percentile(latencies, 0.99):.2f} ms")
+    print(f"  event loop lag   : p50 {percentile(lags, 0.5):.2f} ms  p99 {percentile(lags, 0.99):.2f} ms")
+    print(f"  isolation        : {len(leaks)} messages from another session; "
+          f"{calls} upstream chatbot calls for the same question in {sessions} sessions")
+    print(f"  start+stop       : {start_stop_seconds:.2f}s while {sessions - 1} sessions streamed, "
+          f"event loop lag max {max(start_stop_lags) * 1000:.2f} ms, delivery latency "
+          f"p99 {percentile(start_stop_latencies, 0.99):.2f} ms")
+    assert max(start_stop_lags) <= MAX_LAG_SECONDS, f"start/stop lagged the loop {max(start_stop_lags):.2f}s"
+    print(f"OK: starting and stopping a meeting lagged the event loop at most {max(start_stop_lags) * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(run(int(sys.argv[1]) if len(sys.argv) > 1 else 20, float(sys.argv[2]) if len(sys.argv) > 2 else 10.0))
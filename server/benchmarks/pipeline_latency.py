@@ -0,0 +1,273 @@
+"""Capture-to-screen latency of a transcript, per pipeline stage, against the local Deepgram stand-in.
+
+Plays audio/microphone_only.wav and audio/speaker_only.wav (the two sides of
+audio/out.wav) in real time as the two capture devices, through stand-in
+sounddevice InputStreams, into transcribe_audio's own send_audio() and
+receive_transcripts(): ring buffers, the drift-corrected mixer, the voice
+gate, the session archive (to a temporary directory) and a DeepgramLink to
+fake_deepgram.py in energy mode, with results held back by `delay` to model
+recognition time. Its IPC messages are written over a real pipe, read by
+server/main.py's reader thread and broadcast by its websocket server to a
+headless client.
+
+Every transcript message is traced back, through the capture time it
+carries and the ring positions each mix read up to, to the device callback
+that delivered the last audio it covers. For each stage it reports
+p50/p95/p99 of the time since capture and of the stage itself:
+  capture  - the device callback delivered the block to its ring
+  mix      - the mixer produced the block and queued it for send_audio
+  uplink   - the block went out on the Deepgram socket
+  transcript - receive_transcripts published the result
+  broadcast  - the server queued the message for its clients
+  client     - the client received it
+
+    python benchmarks/pipeline_latency.py [delay ...]
+"""
+import asyncio
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from types import SimpleNamespace
+
+os.environ.setdefault("LLM_BACKEND", "stub")
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(SERVER_DIR)
+sys.path.append(os.path.join(SERVER_DIR, "components"))
+import soundfile as sf
+import websockets
+
+import main as server
+from components.ipc import MessageWriter
+with contextlib.redirect_stdout(io.StringIO()):
+    import components.transcribe_audio as transcriber
+from fake_deepgram import FakeDeepgram
+
+AUDIO_DIR = os.path.join(os.path.dirname(SERVER_DIR), "audio")
+STAGES = ["capture", "mix", "uplink", "transcript", "broadcast", "client"]
+
+
+def percentile(values, q):
+    return sorted(values)[min(int(len(values) * q), len(values) - 1)] * 1000
+
+
+class FakeDevices:
+    """Stands in for sounddevice: each InputStream plays its device's recording into the callback.
+
+    A callback per block, once the block has been recorded in real time, so
+    ring frame f of a device arrived at captured[device][f // blocksize].
+    """
+
+    def __init__(self, recordings, sample_rate):
+        self.recordings = recordings  # device -> (frames, channels) audio
+        self.sample_rate = sample_rate
+        self.captured = {device: [] for device in recordings}
+        self.start = None
+        self._stop = threading.Event()
+
+    @contextlib.contextmanager
+    def InputStream(self, callback, device, blocksize, **settings):
+        if self.start is None:
+            self.start = time.perf_counter()
+        thread = threading.Thread(target=self._play, args=(callback, device, blocksize), daemon=True)
+        thread.start()
+        try:
+            yield thread
+        finally:
+            self._stop.set()
+            thread.join()
+
+    def _play(self, callback, device, blocksize):
+        audio, captured = self.recordings[device], self.captured[device]
+        for i in range(0, len(audio) - blocksize + 1, blocksize):
+            if self._stop.wait(max(0.0, self.start + (i + blocksize) / self.sample_rate - time.perf_counter())):
+                return
+            callback(audio[i:i + blocksize], blocksize, None, None)
+            captured.append(time.perf_counter())
+
+
+class TracingQueue(asyncio.Queue):
+    """transcribe_audio's mixer -> send_audio queue, noting when each block was mixed and the ring positions it read up to."""
+
+    def __init__(self, maxsize):
+        super().__init__(maxsize)
+        self.mixed_at = []
+        self.reads = []  # (mic, speaker) ring frames read once each block was mixed
+        self.index = {}  # id(block) -> mixed block index
+        self._blocks = []  # keeps mixed blocks alive so their id()s stay unique
+
+    async def put(self, block):
+        # Called right after the mixer returns the block, before anything else runs on the loop
+        self.mixed_at.append(time.perf_counter())
+        self.reads.append((transcriber.mic_ring.stats()["frames_read"], transcriber.speaker_ring.stats()["frames_read"]))
+        self.index[id(block)] = len(self._blocks)
+        self._blocks.append(block)
+        await super().put(block)
+
+
+def message_key(seen, segment_id, is_final, text):
+    # The same interim text can come twice for a segment, so count repeats
+    key = (segment_id, is_final, text)
+    seen[key] = seen.get(key, 0) + 1
+    return key + (seen[key],)
+
+
+class TracingWriter(MessageWriter):
+    """The transcriber's IPC writer, noting when each transcript message goes out and the capture time it ends at."""
+
+    def __init__(self, stream):
+        super().__init__(stream)
+        self.seen = {}
+        self.traces = []  # (message key, capture end in seconds, publish time)
+
+    def send(self, msg_type, **fields):
+        if msg_type == "transcript":
+            key = message_key(self.seen, fields["segment_id"], fields["is_final"], fields["text"])
+            self.traces.append((key, fields["end"], time.perf_counter()))
+        super().send(msg_type, **fields)
+
+
+def load(name):
+    data, sample_rate = sf.read(os.path.join(AUDIO_DIR, name), dtype="float32", always_2d=True)
+    return data[:, :transcriber.CHANNELS], sample_rate
+
+
+def capture_time(k, reads, captured):
+    # The latest callback that delivered a frame mixed block k read. A partial mix reads
+    # fewer frames, or none, from a source, and the drift resampler reads more or fewer
+    # speaker frames than a block, so blocks and callbacks don't line up one to one.
+    before = reads[k - 1] if k else (0, 0)
+    times = [callbacks[(after - 1) // transcriber.BLOCK_SIZE]
+             for callbacks, prev, after in zip((captured["mic"], captured["speaker"]), before, reads[k]) if after > prev]
+    return max(times) if times else None
+
+
+async def run(delay):
+    mic, sample_rate = load("microphone_only.wav")
+    speaker, _ = load("speaker_only.wav")
+    loop = asyncio.get_running_loop()
+    block_size = transcriber.BLOCK_SIZE
+
+    fake = FakeDeepgram(sample_rate=sample_rate, delay=delay, words="energy")
+    transcriber.DEEPGRAM_URL = f"ws://127.0.0.1:{await fake.start()}"
+
+    # The server side: websocket server, IPC reader thread, broadcast timestamps
+    server.main_event_loop = loop
+    broadcast_at, broadcast_seen = {}, {}
+    original_broadcast = server.broadcast
+
+    def timed_broadcast(session, data, key=None, droppable=False):
+        msg = json.loads(data)
+        if msg.get("type") == "transcript":
+            trace_key = message_key(broadcast_seen, msg["segment_id"], msg["is_final"], msg["text"])
+            broadcast_at[trace_key] = time.perf_counter()
+        original_broadcast(session, data, key=key, droppable=droppable)
+
+    server.broadcast = timed_broadcast
+    ws_server = await websockets.serve(server.transcript_ws_server, "127.0.0.1", 0)
+    ws_port = ws_server.sockets[0].getsockname()[1]
+    read_fd, write_fd = os.pipe()
+    session = server.get_session()
+    proc = SimpleNamespace(stdout=os.fdopen(read_fd, "rb"), session=session, poll=lambda: None)
+    session.transcription_process = proc
+    ipc = TracingWriter(os.fdopen(write_fd, "wb"))
+    reader = threading.Thread(target=server.read_subprocess_messages, args=(proc,), daemon=True)
+    reader.start()
+
+    received_at, received_seen = {}, {}
+    client = await websockets.connect(f"ws://127.0.0.1:{ws_port}")
+
+    async def headless_client():
+        async for message in client:
+            msg = json.loads(message)
+            if msg.get("type") == "transcript":
+                key = message_key(received_seen, msg["segment_id"], msg["is_final"], msg["text"])
+                received_at[key] = time.perf_counter()
+
+    client_task = asyncio.create_task(headless_client())
+
+    # The transcriber side: its own send_audio and receive_transcripts, with stand-in devices
+    devices = FakeDevices({"mic": mic, "speaker": speaker}, sample_rate)
+    queue = TracingQueue(transcriber.queue.maxsize)
+    uplink_at = {}  # mixed block index -> when it went out
+    real_sd, real_queue, real_archive_dir = transcriber.sd, transcriber.queue, transcriber.ARCHIVE_DIR
+    transcriber.sd, transcriber.queue, transcriber.ipc = devices, queue, ipc
+    archive_dir = tempfile.TemporaryDirectory()
+    transcriber.ARCHIVE_DIR = archive_dir.name
+    link = transcriber.make_link(sample_rate, spare=False, connect=websockets.connect)
+    send_block = link.send_block
+
+    async def timed_send_block(block):
+        sent = await send_block(block)
+        if sent:
+            uplink_at[queue.index[id(block)]] = time.perf_counter()
+        return sent
+
+    link.send_block = timed_send_block
+    total_blocks = min(len(mic), len(speaker)) // block_size
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        await link.open()
+        receiver = asyncio.create_task(transcriber.receive_transcripts(link))
+        sender = asyncio.create_task(transcriber.send_audio(link, sample_rate, "mic", "speaker"))
+        while min(len(c) for c in devices.captured.values()) < total_blocks:
+            await asyncio.sleep(0.05)
+        # Let the mixer's deadline flush the tail, then finalize what the gate still holds open
+        await asyncio.sleep(4 * transcriber.MIX_DEADLINE_BLOCKS * block_size / sample_rate)
+        await link.send_control("Finalize")
+        await asyncio.sleep(delay + 1.0)
+        for task in (sender, receiver):
+            task.cancel()
+        await asyncio.gather(sender, receiver, return_exceptions=True)
+        await link.close()
+    mixer, gate = transcriber.mixer, transcriber.gate
+    transcriber.sd, transcriber.queue, transcriber.ARCHIVE_DIR = real_sd, real_queue, real_archive_dir
+    transcriber.ipc = transcriber.timeline = None
+    archive_dir.cleanup()
+    client_task.cancel()
+    await client.close()
+    ws_server.close()
+    await ws_server.wait_closed()
+    await fake.stop()
+    ipc.stream.close()
+    server.broadcast = original_broadcast
+
+    # Trace every message back to the mixed block holding the last audio it covers
+    latencies = {stage: [] for stage in STAGES[1:]}
+    stage_times = {stage: [] for stage in STAGES[1:]}
+    finals = []
+    for key, end, transcript_at in ipc.traces:
+        k = max(int(round(end * sample_rate)) - 1, 0) // block_size
+        if key not in received_at or k not in uplink_at:
+            continue
+        times = [capture_time(k, queue.reads, devices.captured), queue.mixed_at[k], uplink_at[k], transcript_at,
+                 broadcast_at[key], received_at[key]]
+        for i, stage in enumerate(STAGES[1:], 1):
+            latencies[stage].append(times[i] - times[0])
+            stage_times[stage].append(times[i] - times[i - 1])
+        if key[1]:
+            finals.append(times[-1] - times[0])
+
+    print(f"delay {delay:.2f}s: {len(latencies['client'])} transcript messages ({len(finals)} finals) "
+          f"of {len(ipc.traces)} published, mixer {mixer.stats()['partial_blocks']} partial blocks, "
+          f"gate suppressed {gate.suppressed_pct:.0f}%")
+    print(f"  {'stage':>10}  {'since capture p50/p95/p99 ms':>30}  {'stage p50/p95/p99 ms':>24}")
+    for stage in STAGES[1:]:
+        total = "/".join(f"{percentile(latencies[stage], q):.1f}" for q in (0.5, 0.95, 0.99))
+        own = "/".join(f"{percentile(stage_times[stage], q):.1f}" for q in (0.5, 0.95, 0.99))
+        print(f"  {stage:>10}  {total:>30}  {own:>24}")
+    if finals:
+        print(f"  finals capture->client: p50 {percentile(finals, 0.5):.1f} ms  p95 {percentile(finals, 0.95):.1f} ms")
+
+
+async def main(delays):
+    for delay in delays:
+        await run(delay)
+
+
+if __name__ == "__main__":
+    asyncio.run(main([float(d) for d in sys.argv[1:]] or [0.0, 0.3]))
@@ -0,0 +1,77 @@
+"""Memory held by AudioRecorder while it records a long meeting.
+
+Feeds 0.1 s chunks of 48 kHz audio, as record_microphone/record_speaker get
+them from soundcard, for both sources into StreamingRecording, the way the
+recorder does, over the whole simulated recording (written to a temporary
+directory). For comparison, the list of samples the recorder kept before
+(list.extend over the chunk) is measured over one minute and extrapolated,
+since two hours of it doesn't fit in memory. Memory is what tracemalloc sees
+allocated, which includes numpy buffers.
+
+    python benchmarks/recorder_memory.py [hours]
+"""
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from components.recording import StreamingRecording
+
+SAMPLE_RATE = 48000
+CHUNK_FRAMES = int(SAMPLE_RATE * 0.1)
+SOURCES = 2
+
+
+def record(writers, seconds):
+    # soundcard returns a fresh (frames, channels) array per record() call
+    chunk = np.random.default_rng(0).uniform(-0.5, 0.5, (CHUNK_FRAMES, 2)).astype(np.float32)
+    started = time.perf_counter()
+    for _ in range(int(seconds * 10)):
+        for write in writers:
+            write(chunk[:, 0])
+    return (time.perf_counter() - started) / (seconds * 10 * len(writers))
+
+
+def measure(make, seconds):
+    # make() returns (what holds the audio, one write function per source)
+    tracemalloc.start()
+    recorder, writers = make()
+    per_chunk = record(writers, seconds)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return recorder, current, peak, per_chunk
+
+
+if __name__ == "__main__":
+    hours = float(sys.argv[1]) if len(sys.argv) > 1 else 2.0
+    seconds = hours * 3600
+    samples = seconds * SAMPLE_RATE * SOURCES
+    print(f"{hours:g} h recording, {SOURCES} sources at {SAMPLE_RATE} Hz ({samples / 1e6:.0f}M samples)")
+
+    def lists():
+        buffers = [[] for _ in range(SOURCES)]
+        return buffers, [buffer.extend for buffer in buffers]
+
+    buffers, current, peak, per_chunk = measure(lists, 60)
+    del buffers
+    scale = seconds / 60
+    print(f"  list of floats     : {current * scale / 2**30:6.2f} GiB (extrapolated from 60 s, "
+          f"{current / (60 * SAMPLE_RATE * SOURCES):.1f} B/sample), {per_chunk * 1e6:7.1f} us per chunk")
+
+    with tempfile.TemporaryDirectory() as directory:
+        def streaming():
+            # Not captured in real time, so without the drift correction that times the writes
+            recording = StreamingRecording(directory, SAMPLE_RATE, drift=False)
+            return recording, [recording.write_mic, recording.write_speaker]
+
+        recording, current, peak, per_chunk = measure(streaming, seconds)
+        recording.finish()
+        recording.wait()
+        on_disk = sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+    print(f"  StreamingRecording : {current / 2**20:6.2f} MiB (peak {peak / 2**20:.2f} MiB, "
+          f"independent of length), {per_chunk * 1e6:7.1f} us per chunk, "
+          f"{on_disk / 2**30:.2f} GiB on disk, mix normalized in {recording.normalize_seconds:.1f}s after stop")
@@ -0,0 +1,79 @@
+"""Time to stop a recording, whole-recording save at stop vs streaming to disk.
+
+Feeds two 48 kHz tones in 0.1 s chunks, as AudioRecorder's capture threads
+get them, for a few recording lengths. The old stop path
+(join the buffers, mix, peak-normalize, write three WAVs) is timed against
+StreamingRecording.finish(), which only closes files. The background
+normalization of the mixed WAV is timed on its own, and the two mixed files
+are compared sample by sample.
+
+    python benchmarks/recording_stop.py [minutes ...]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import soundfile as sf
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from components.recording import StreamingRecording
+
+SAMPLE_RATE = 48000
+CHUNK_FRAMES = int(SAMPLE_RATE * 0.1)
+
+
+def chunks(minutes, frequency):
+    # A steady tone per source, so a resampled mix can be compared sample by sample
+    for i in range(int(minutes * 600)):
+        t = np.arange(i * CHUNK_FRAMES, (i + 1) * CHUNK_FRAMES) / SAMPLE_RATE
+        yield (0.3 * np.sin(2 * np.pi * frequency * t)).astype(np.float32)
+
+
+def old_stop(directory, minutes):
+    # What stop_recording did: everything at the end, in memory
+    mic_data, speaker_data = [], []
+    for mic, speaker in zip(chunks(minutes, 220), chunks(minutes, 330)):
+        mic_data.append(mic)
+        speaker_data.append(speaker)
+    started = time.perf_counter()
+    mic_audio, speaker_audio = np.concatenate(mic_data), np.concatenate(speaker_data)
+    mixed = mic_audio + speaker_audio
+    mixed = mixed / np.max(np.abs(mixed)) * 0.8
+    sf.write(os.path.join(directory, "old_out.wav"), mixed, SAMPLE_RATE)
+    sf.write(os.path.join(directory, "old_mic.wav"), mic_audio, SAMPLE_RATE)
+    sf.write(os.path.join(directory, "old_speaker.wav"), speaker_audio, SAMPLE_RATE)
+    return time.perf_counter() - started
+
+
+def streaming_stop(directory, minutes):
+    # Both sources share one clock here and aren't fed in real time, which drift correction assumes
+    recording = StreamingRecording(directory, SAMPLE_RATE, drift=False)
+    for mic, speaker in zip(chunks(minutes, 220), chunks(minutes, 330)):
+        recording.write_mic(mic)
+        recording.write_speaker(speaker)
+    started = time.perf_counter()
+    recording.finish()
+    stop = time.perf_counter() - started
+    recording.wait()
+    return stop, recording.normalize_seconds
+
+
+def compare(directory):
+    old, _ = sf.read(os.path.join(directory, "old_out.wav"), dtype="int16")
+    new, _ = sf.read(os.path.join(directory, "out.wav"), dtype="int16")
+    n = min(len(old), len(new))
+    return len(old) - len(new), int(np.max(np.abs(old[:n].astype(np.int32) - new[:n])))
+
+
+if __name__ == "__main__":
+    durations = [float(m) for m in sys.argv[1:]] or [1, 5, 20]
+    for minutes in durations:
+        with tempfile.TemporaryDirectory() as directory:
+            old = old_stop(directory, minutes)
+            stop, normalize = streaming_stop(directory, minutes)
+            missing, diff = compare(directory)
+        print(f"{minutes:5g} min: old stop {old * 1000:8.1f} ms | streaming stop {stop * 1000:6.1f} ms, "
+              f"background normalize {normalize * 1000:7.1f} ms | mix differs by {diff} LSB, "
+              f"{missing} frames shorter")
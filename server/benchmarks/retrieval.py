@@ -0,0 +1,80 @@
+"""Query latency of the transcript BM25 index on a long meeting.
+
+Builds a synthetic transcript (Zipf-distributed vocabulary, ~12-word final
+segments) of the given length, indexes it segment by segment the way the
+server does, then times top-k queries and compares the prompt size with
+sending the whole transcript. A few planted facts check that retrieval finds
+the passage that answers a question.
+
+    python benchmarks/retrieval.py [words]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from components.retrieval import TranscriptIndex
+
+WORDS_PER_SEGMENT = 12
+VOCAB_SIZE = 8000
+QUERIES = 500
+TOP_K = 5
+FACTS = {
+    "what budget did finance approve for the offsite": "finance approved a budget of forty thousand for the offsite",
+    "who owns the kubernetes migration": "priya owns the kubernetes migration starting in march",
+    "when is the beta launch": "the beta launch moved to the second week of november",
+}
+
+
+def make_vocab(rng):
+    letters = np.array(list("abcdefghijklmnopqrstuvwxyz"))
+    return ["".join(rng.choice(letters, rng.integers(3, 9))) for _ in range(VOCAB_SIZE)]
+
+
+def segments(words, vocab, rng):
+    p = 1.0 / np.arange(1, VOCAB_SIZE + 1)
+    p /= p.sum()
+    n = words // WORDS_PER_SEGMENT
+    ids = rng.choice(VOCAB_SIZE, size=(n, WORDS_PER_SEGMENT), p=p)
+    planted = {n * (i + 1) // (len(FACTS) + 1): fact for i, fact in enumerate(FACTS.values())}
+    for i, row in enumerate(ids):
+        yield planted.get(i) or " ".join(vocab[j] for j in row)
+
+
+def percentile(values, q):
+    return sorted(values)[min(int(len(values) * q), len(values) - 1)] * 1000
+
+
+if __name__ == "__main__":
+    words = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    rng = np.random.default_rng(0)
+    index = TranscriptIndex()
+    vocab = make_vocab(rng)
+    texts = list(segments(words, vocab, rng))
+    chars = sum(len(text) + 1 for text in texts)
+    t0 = time.perf_counter()
+    for i, text in enumerate(texts):
+        index.add(text, i * 4.8, (i + 1) * 4.8)
+    build = time.perf_counter() - t0
+    print(f"{words:,} words, {index.stats()}, indexed in {build * 1000:.0f} ms "
+          f"({build / index.segments * 1e6:.1f} us per segment)")
+
+    for question, fact in FACTS.items():
+        context = index.context(question, TOP_K)
+        print(f"  {'found' if fact in context else 'MISSED'}: {question!r}")
+
+    latencies = []
+    context_chars = []
+    for _ in range(QUERIES):
+        question = " ".join(vocab[j] for j in rng.integers(0, VOCAB_SIZE // 4, size=6))
+        t0 = time.perf_counter()
+        context = index.context(question, TOP_K)
+        latencies.append(time.perf_counter() - t0)
+        context_chars.append(len(context))
+    print(f"query latency over {QUERIES} queries: p50 {percentile(latencies, 0.5):.2f} ms "
+          f"p95 {percentile(latencies, 0.95):.2f} ms p99 {percentile(latencies, 0.99):.2f} ms")
+    # ~4 characters per token
+    print(f"prompt context: whole transcript ~{chars // 4:,} tokens, "
+          f"top-{TOP_K} passages ~{int(np.mean(context_chars)) // 4:,} tokens")
@@ -0,0 +1,107 @@
+"""Seeking in a long session: the session archive vs a WAV plus the transcript list.
+
+Writes a synthetic meeting (mixed audio in 2048-frame blocks, a final segment
+every few seconds) with SessionArchiveWriter, and the same audio as a WAV
+like the ones left in audio/. Then it looks up the segment said at random
+times and pulls out the audio of random segments:
+  archive - SessionArchive.segment_at() and segment_audio() on the memory maps
+  WAV     - a scan of the in-memory segment list, then soundfile seek + read
+
+    python benchmarks/session_archive.py [hours] [sample_rate]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+import numpy as np
+import soundfile as sf
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from components.session_archive import SessionArchive, SessionArchiveWriter
+
+BLOCK_SIZE = 2048
+SEGMENT_SECONDS = 4.0
+LOOKUPS = 2000
+
+
+def timed(fn, args):
+    started = time.perf_counter()
+    for a in args:
+        fn(a)
+    return (time.perf_counter() - started) / len(args) * 1e6
+
+
+def build(directory, hours, sample_rate):
+    writer = SessionArchiveWriter(os.path.join(directory, "session"), sample_rate)
+    block = np.random.default_rng(0).uniform(-0.3, 0.3, (BLOCK_SIZE, 1)).astype(np.float32)
+    blocks = int(hours * 3600 * sample_rate / BLOCK_SIZE)
+    segments = []
+    next_segment = SEGMENT_SECONDS
+    audio_us = segment_us = 0.0
+    for i in range(blocks):
+        started = time.perf_counter()
+        writer.write_audio(block)
+        audio_us += time.perf_counter() - started
+        if writer.frames / sample_rate >= next_segment:
+            start, end = next_segment - SEGMENT_SECONDS + 0.2, next_segment - 0.1
+            text = f"segment {len(segments)} about the roadmap and the budget"
+            started = time.perf_counter()
+            writer.add_segment(len(segments), text, start, end)
+            segment_us += time.perf_counter() - started
+            segments.append((start, end, text))
+            next_segment += SEGMENT_SECONDS
+    writer.close()
+    wav = os.path.join(directory, "out.wav")
+    with sf.SoundFile(wav, "w", sample_rate, 1, subtype="PCM_16") as f:
+        for chunk in range(0, blocks, 512):
+            f.write(np.tile(block, (min(512, blocks - chunk), 1)))
+    print(f"  write: {audio_us / blocks * 1e6:.1f} us per audio block, "
+          f"{segment_us / len(segments) * 1e6:.1f} us per segment ({len(segments)} segments)")
+    return writer.path, wav, segments
+
+
+def scan(segments, seconds):
+    # What a caller holding the transcript list does
+    found = None
+    for i, (start, end, text) in enumerate(segments):
+        if start > seconds:
+            break
+        found = i
+    return found
+
+
+def main(hours, sample_rate):
+    print(f"{hours:g} h session at {sample_rate} Hz")
+    with tempfile.TemporaryDirectory() as directory:
+        path, wav, segments = build(directory, hours, sample_rate)
+        started = time.perf_counter()
+        archive = SessionArchive(path)
+        print(f"  open archive: {(time.perf_counter() - started) * 1000:.2f} ms")
+        rng = random.Random(0)
+        times = [rng.uniform(0, archive.duration) for _ in range(LOOKUPS)]
+        ids = [rng.randrange(len(segments)) for _ in range(LOOKUPS)]
+        for t in times[:200]:
+            found = archive.segment_at(t)
+            assert found is not None and found.segment_id == scan(segments, t), t
+        view = archive.segment_audio(ids[0])
+        assert isinstance(view, np.memmap) or np.shares_memory(view, archive.audio())
+
+        with sf.SoundFile(wav) as f:
+            def wav_extract(i):
+                start, end, _ = segments[i]
+                f.seek(int(start * sample_rate))
+                return f.read(int((end - start) * sample_rate), dtype="int16")
+
+            print(f"  segment at time : archive {timed(archive.segment_at, times):8.1f} us | "
+                  f"list scan {timed(lambda t: scan(segments, t), times):8.1f} us")
+            print(f"  segment audio   : archive {timed(archive.segment_audio, ids):8.1f} us (view, no copy) | "
+                  f"WAV seek+read {timed(wav_extract, ids):8.1f} us")
+        started = time.perf_counter()
+        sf.read(wav, dtype="int16")
+        print(f"  loading the whole WAV instead: {(time.perf_counter() - started) * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main(float(sys.argv[1]) if len(sys.argv) > 1 else 3.0, int(sys.argv[2]) if len(sys.argv) > 2 else 16000)
@@ -0,0 +1,97 @@
+"""Uplink send intervals while a slow summarizer runs on the same event loop.
+
+An uplink task sends a block every 42.7 ms (2048 frames at 48 kHz) the way
+send_audio does, while final transcripts arrive and trigger summaries from
+a stub client that blocks for SUMMARY_SECONDS. Inline awaiting a blocking
+summarize() (the old behaviour) stalls the uplink for the whole call;
+request_summary() keeps the intervals bounded and coalesces triggers.
+
+It fails (AssertionError) unless, with request_summary(), the p99 interval
+stays within P99_BLOCKS block periods and the longest within MAX_BLOCKS,
+and triggers that arrive during a summary are coalesced instead of each
+making an LLM call.
+
+    python benchmarks/summary_blocking.py
+"""
+import asyncio
+import contextlib
+import io
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from components.transcript_ai import TranscriptAI
+
+BLOCK_SECONDS = 2048 / 48000
+SUMMARY_SECONDS = 2.0
+RUN_SECONDS = 8.0
+P99_BLOCKS = 2
+MAX_BLOCKS = 4
+SEGMENT = "the team went through the launch checklist and agreed on owners for each item. "
+
+
+class SlowClient:
+    def __init__(self):
+        self.calls = 0
+
+    def summarize(self, text, model, length, format):
+        self.calls += 1
+        time.sleep(SUMMARY_SECONDS)
+        return SimpleNamespace(summary=text[:200])
+
+
+async def uplink(intervals, stop):
+    last = time.perf_counter()
+    while not stop.is_set():
+        await asyncio.sleep(BLOCK_SECONDS)
+        now = time.perf_counter()
+        intervals.append(now - last)
+        last = now
+
+
+async def transcripts(ai, client, inline, stop):
+    async def on_summary(summary):
+        pass
+    while not stop.is_set():
+        await asyncio.sleep(0.3)
+        ai.add_transcript(SEGMENT)
+        # Trigger on every segment to stress the single-flight path
+        if inline:
+            # The old behaviour: a blocking client call made on the loop
+            client.summarize(text=ai.full_transcript, model="summarize-xlarge", length="medium", format="paragraph")
+        else:
+            ai.request_summary(on_summary)
+
+
+async def run(inline):
+    client = SlowClient()
+    ai = TranscriptAI(client=client)
+    ai.add_transcript(SEGMENT * 4)
+    stop = asyncio.Event()
+    intervals = []
+    tasks = [asyncio.create_task(uplink(intervals, stop)),
+             asyncio.create_task(transcripts(ai, client, inline, stop))]
+    with contextlib.redirect_stdout(io.StringIO()):
+        await asyncio.sleep(RUN_SECONDS)
+        stop.set()
+        await asyncio.gather(*tasks)
+    ms = np.array(intervals) * 1000
+    label = "inline" if inline else "single-flight"
+    print(f"{label:>13}: uplink interval ms p50={np.median(ms):6.1f} p99={np.percentile(ms, 99):7.1f} "
+          f"max={ms.max():7.1f}  LLM calls={client.calls} coalesced triggers={ai.summaries_coalesced}")
+    return ms, client.calls, ai.summaries_coalesced
+
+
+if __name__ == "__main__":
+    asyncio.run(run(inline=True))
+    ms, calls, coalesced = asyncio.run(run(inline=False))
+    block_ms = BLOCK_SECONDS * 1000
+    assert np.percentile(ms, 99) <= P99_BLOCKS * block_ms, f"p99 interval {np.percentile(ms, 99):.1f} ms"
+    assert ms.max() <= MAX_BLOCKS * block_ms, f"max interval {ms.max():.1f} ms"
+    assert coalesced > 0 and calls < coalesced, f"{calls} LLM calls for {coalesced} coalesced triggers"
+    print(f"OK: uplink p99 within {P99_BLOCKS} and max within {MAX_BLOCKS} block periods, "
+          f"{coalesced} triggers coalesced into {calls} calls")
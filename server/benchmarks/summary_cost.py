@@ -0,0 +1,81 @@
+"""LLM input tokens per summary trigger over a simulated 3-hour meeting.
+
+A stub client stands in for Cohere and counts the tokens (~4 chars each)
+sent on every summarize call. Final segments of ~12 words arrive at 150
+words per minute and summaries trigger the way receive_transcripts does,
+every time the transcript grows past a 500-character boundary.
+
+It fails (AssertionError) if incremental summarization sends more than
+TOKEN_LIMIT input tokens on any trigger, or in the last hour on average.
+A trigger summarizes at most a completed chunk and a tail shorter than a
+chunk, plus summaries of ~60 words, so the bound depends on the chunk
+size and not on how long the meeting has run.
+
+    python benchmarks/summary_cost.py [hours]
+"""
+import asyncio
+import contextlib
+import io
+import os
+import random
+import sys
+from types import SimpleNamespace
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from components.transcript_ai import CHUNK_CHARS, TranscriptAI
+
+WORDS_PER_MINUTE = 150
+WORDS_PER_SEGMENT = 12
+TOKEN_LIMIT = 3 * CHUNK_CHARS // 4  # three chunks' worth, at ~4 chars per token
+VOCAB = ("we should ship the recorder next sprint and fix drift before the demo "
+         "customers asked about pricing latency summaries export calendar").split()
+
+
+class StubClient:
+    """Cohere stand-in: counts input tokens and returns a short summary."""
+
+    def __init__(self):
+        self.calls = []
+
+    def summarize(self, text, model, length, format):
+        self.calls.append(len(text) // 4)
+        return SimpleNamespace(summary=" ".join(text.split()[:60]) + ".")
+
+
+class LegacyAI(TranscriptAI):
+    # What summarize() did before: send the whole transcript every time
+    async def summarize(self, length="medium"):
+        return await self._summarize_text_async(self.full_transcript, length)
+
+
+def segments(hours):
+    rng = random.Random(0)
+    for _ in range(int(hours * 60 * WORDS_PER_MINUTE / WORDS_PER_SEGMENT)):
+        yield " ".join(rng.choice(VOCAB) for _ in range(WORDS_PER_SEGMENT)) + "."
+
+
+async def run(ai_class, hours):
+    client = StubClient()
+    ai = ai_class(client=client)
+    per_trigger = []
+    for text in segments(hours):
+        ai.add_transcript(text)
+        if ai.store.char_count % 500 < len(text):
+            before = len(client.calls)
+            with contextlib.redirect_stdout(io.StringIO()):
+                await ai.summarize()
+            per_trigger.append(sum(client.calls[before:]))
+    last_hour = per_trigger[-len(per_trigger) // int(max(hours, 1)):]
+    print(f"{ai_class.__name__:>12}: {len(per_trigger)} triggers, {len(client.calls)} LLM calls, "
+          f"{sum(client.calls):,} input tokens total, per trigger: mean {sum(per_trigger) / len(per_trigger):,.0f} "
+          f"max {max(per_trigger):,} (last hour mean {sum(last_hour) / len(last_hour):,.0f})")
+    return max(per_trigger), sum(last_hour) / len(last_hour)
+
+
+if __name__ == "__main__":
+    hours = float(sys.argv[1]) if len(sys.argv) > 1 else 3
+    asyncio.run(run(LegacyAI, hours))
+    most, last_hour_mean = asyncio.run(run(TranscriptAI, hours))
+    assert most <= TOKEN_LIMIT, f"a trigger sent {most:,} input tokens, limit {TOKEN_LIMIT:,}"
+    assert last_hour_mean <= TOKEN_LIMIT, f"last hour averaged {last_hour_mean:,.0f} tokens per trigger"
+    print(f"OK: every trigger under {TOKEN_LIMIT:,} input tokens")
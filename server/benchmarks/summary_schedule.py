@@ -0,0 +1,142 @@
+"""Summary runs and LLM calls over simulated hours of bursty speech.
+
+Fast talkers in bursts (TALK_SECONDS at WORDS_PER_MINUTE, then a
+PAUSE_SECONDS pause ending in speech_final) feed final segments into two
+TranscriptAIs on a simulated clock, with a stub client that counts every
+summarize call:
+  old rule  - a run whenever the transcript crosses a 500-character
+              boundary, what receive_transcripts did before the scheduler
+  scheduler - SummaryScheduler driven the way maybe_summarize() and the
+              one-second summary_ticker drive it
+
+Runs take no simulated time. It reports runs, LLM calls, the closest two
+runs came and the most calls in any rolling hour. It fails
+(AssertionError) if the scheduler's calls exceed max_calls_per_hour in any
+rolling hour, or its runs come closer than min_interval.
+
+    python benchmarks/summary_schedule.py [hours]
+"""
+import asyncio
+import contextlib
+import io
+import os
+import random
+import sys
+from bisect import bisect_right
+from types import SimpleNamespace
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from components.summary_scheduler import SummaryScheduler
+from components.transcript_ai import TranscriptAI
+
+WORDS_PER_MINUTE = 200
+WORDS_PER_SEGMENT = 12
+TALK_SECONDS = 40
+PAUSE_SECONDS = 10
+VOCAB = ("we should ship the recorder next sprint and fix drift before the demo "
+         "customers asked about pricing latency summaries export calendar").split()
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class StubClient:
+    """Cohere stand-in: records when each summarize call was made."""
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.calls = []
+
+    def summarize(self, text, model, length, format):
+        self.calls.append(self.clock())
+        return SimpleNamespace(summary=" ".join(text.split()[:60]) + ".")
+
+
+def segments(hours):
+    # (time, text, speech_final) for every final segment of the meeting
+    rng = random.Random(0)
+    segment_seconds = WORDS_PER_SEGMENT * 60 / WORDS_PER_MINUTE
+    cycle = TALK_SECONDS + PAUSE_SECONDS
+    for burst in range(int(hours * 3600 / cycle)):
+        count = int(TALK_SECONDS / segment_seconds)
+        for i in range(count):
+            text = " ".join(rng.choice(VOCAB) for _ in range(WORDS_PER_SEGMENT)) + "."
+            yield burst * cycle + (i + 1) * segment_seconds, text, i == count - 1
+
+
+async def summarize(ai):
+    with contextlib.redirect_stdout(io.StringIO()):
+        await ai.summarize()
+
+
+def busiest_hour(times):
+    return max((bisect_right(times, t + 3600 - 1e-9) - i for i, t in enumerate(times)), default=0)
+
+
+def report(name, runs, calls):
+    gaps = [b - a for a, b in zip(runs, runs[1:])]
+    print(f"{name:>9}: {len(runs)} runs, {len(calls)} LLM calls, closest runs {min(gaps):6.1f}s apart, "
+          f"busiest rolling hour {busiest_hour(calls)} calls")
+    return min(gaps), busiest_hour(calls)
+
+
+async def old_rule(hours):
+    clock = Clock()
+    client = StubClient(clock)
+    ai = TranscriptAI(client=client)
+    runs = []
+    for t, text, _ in segments(hours):
+        clock.now = t
+        ai.add_transcript(text)
+        if ai.store.char_count % 500 < len(text):
+            runs.append(t)
+            await summarize(ai)
+    return report("old rule", runs, client.calls)
+
+
+async def scheduled(hours):
+    clock = Clock()
+    client = StubClient(clock)
+    ai = TranscriptAI(client=client)
+    scheduler = SummaryScheduler(clock=clock)
+    runs = []
+
+    async def maybe_summarize(utterance_end=False):
+        calls = ai.summary_calls()
+        if scheduler.should_run(utterance_end=utterance_end, calls=calls):
+            scheduler.mark_run(calls)
+            runs.append(clock.now)
+            await summarize(ai)
+
+    events = iter(segments(hours))
+    event = next(events, None)
+    second = 0
+    while event is not None:
+        second += 1
+        # Finals that arrived during this second, then the ticker
+        while event is not None and event[0] <= second:
+            clock.now = event[0]
+            ai.add_transcript(event[1])
+            scheduler.add(len(event[1]))
+            await maybe_summarize(utterance_end=event[2])
+            event = next(events, None)
+        clock.now = second
+        await maybe_summarize()
+    assert ai.summary_llm_calls == len(client.calls)
+    return report("scheduler", runs, client.calls), scheduler
+
+
+if __name__ == "__main__":
+    hours = float(sys.argv[1]) if len(sys.argv) > 1 else 2
+    print(f"{hours:g} h of {TALK_SECONDS}s bursts at {WORDS_PER_MINUTE} wpm with {PAUSE_SECONDS}s pauses")
+    asyncio.run(old_rule(hours))
+    (closest, busiest), scheduler = asyncio.run(scheduled(hours))
+    assert busiest <= scheduler.max_calls_per_hour, f"{busiest} calls in an hour, cap {scheduler.max_calls_per_hour}"
+    assert closest >= scheduler.min_interval, f"runs {closest:.1f}s apart"
+    print(f"OK: at most {busiest} of {scheduler.max_calls_per_hour} allowed LLM calls in any hour, "
+          f"runs at least {scheduler.min_interval:g}s apart ({scheduler.calls} calls budgeted in all)")
@@ -0,0 +1,84 @@
+"""Cost of appending final segments over a long meeting, string vs segment store.
+
+Appends ~12-word segments the way receive_transcripts does and reports the
+per-append time at the start and the end of the meeting, then checks that
+character slices of the store match the old concatenated string and times a
+time-range lookup.
+
+    python benchmarks/transcript_store.py [hours]
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from components.transcript_store import TranscriptStore
+
+WORDS_PER_MINUTE = 150
+WORDS_PER_SEGMENT = 12
+VOCAB = ("we should ship the recorder next sprint and fix drift before the demo "
+         "customers asked about pricing latency summaries export calendar").split()
+
+
+def segments(hours):
+    rng = random.Random(0)
+    seconds = WORDS_PER_SEGMENT * 60 / WORDS_PER_MINUTE
+    for i in range(int(hours * 60 * WORDS_PER_MINUTE / WORDS_PER_SEGMENT)):
+        text = " ".join(rng.choice(VOCAB) for _ in range(WORDS_PER_SEGMENT)) + "."
+        yield text, i * seconds, (i + 1) * seconds
+
+
+def timed_appends(append, items):
+    times = []
+    for item in items:
+        t0 = time.perf_counter()
+        append(item)
+        times.append(time.perf_counter() - t0)
+    return times
+
+
+def report(name, times):
+    n = max(len(times) // 20, 1)
+    first = sum(times[:n]) / n * 1e6
+    last = sum(times[-n:]) / n * 1e6
+    print(f"{name:>8}: total {sum(times) * 1000:8.1f} ms, per append first 5% {first:6.2f} us, last 5% {last:6.2f} us")
+
+
+class StringTranscript:
+    # What TranscriptAI did before: one string rebuilt on every append.
+    # The extra reference stops CPython's in-place concat shortcut, the same
+    # way other readers of full_transcript did in the server.
+    def __init__(self):
+        self.full_transcript = ""
+        self._reader = None
+
+    def append(self, item):
+        self.full_transcript += " " + item[0]
+        self._reader = self.full_transcript
+
+
+if __name__ == "__main__":
+    hours = float(sys.argv[1]) if len(sys.argv) > 1 else 3
+    items = list(segments(hours))
+    print(f"{len(items)} segments, {sum(len(t) + 1 for t, _, _ in items):,} chars")
+
+    legacy = StringTranscript()
+    report("string", timed_appends(legacy.append, items))
+    store = TranscriptStore()
+    report("store", timed_appends(lambda item: store.append(*item), items))
+
+    text = store.text()
+    assert text == legacy.full_transcript
+    rng = random.Random(1)
+    for _ in range(1000):
+        a = rng.randrange(len(text))
+        b = rng.randrange(a, len(text) + 1)
+        assert store.text(a, b) == text[a:b]
+    assert store.text(5) == text[5:]
+
+    t0 = time.perf_counter()
+    for minute in range(int(hours * 60)):
+        store.text_between(minute * 60.0, minute * 60.0 + 60.0)
+    per_lookup = (time.perf_counter() - t0) / max(int(hours * 60), 1) * 1e6
+    print(f"slices match; one-minute time-range lookup {per_lookup:.1f} us")
@@ -0,0 +1,83 @@
+"""Bytes per second and encode cost of each uplink encoding.
+
+Streams a WAV through UplinkEncoder in BLOCK_SIZE blocks the way send_audio
+does and reports the bandwidth, the CPU time spent encoding each block and
+how much audio the codec holds back before emitting it.
+
+Then it ends an utterance after UTTERANCE_BLOCKS blocks, as the voice gate
+closing does, and reports what the encoder still held at that point. It
+fails (AssertionError) unless flush() sends all of it: what went out must be
+as long as the same audio encoded as a whole, closed stream.
+
+    python benchmarks/uplink_encoding.py [wav]
+"""
+import os
+import sys
+import time
+import numpy as np
+import soundfile as sf
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from components.uplink_encoder import UplinkEncoder, UPLINK_FORMATS
+
+BLOCK_SIZE = 2048
+UTTERANCE_BLOCKS = 35  # about 1.5 s at 48 kHz, then the gate closes
+DEFAULT_WAV = os.path.join(os.path.dirname(__file__), "..", "..", "audio", "out.wav")
+
+
+def run(path, encoding):
+    info = sf.info(path)
+    encoder = UplinkEncoder(encoding, info.samplerate, 1)
+    encode_times = []
+    held_ms = []
+    frames_emitted_upto = 0
+    frames = 0
+    for block in sf.blocks(path, blocksize=BLOCK_SIZE, dtype="float32", always_2d=True):
+        block = block[:, :1]
+        t0 = time.perf_counter()
+        data = encoder.encode(block)
+        encode_times.append(time.perf_counter() - t0)
+        frames += len(block)
+        if data:
+            frames_emitted_upto = frames
+        # Audio captured but not yet on the wire
+        held_ms.append((frames - frames_emitted_upto) / info.samplerate * 1000)
+    encoder.close()
+    stats = encoder.stats()
+    t = np.array(encode_times) * 1e6
+    print(f"{encoding:>9}: {stats['bytes_per_sec'] / 1000:7.1f} kB/s  "
+          f"encode us/block p50={np.percentile(t, 50):7.1f} p95={np.percentile(t, 95):7.1f}  "
+          f"audio held back ms mean={np.mean(held_ms):6.1f} max={np.max(held_ms):6.1f}")
+
+
+def utterance_end(path, encoding):
+    info = sf.info(path)
+    audio, _ = sf.read(path, frames=UTTERANCE_BLOCKS * BLOCK_SIZE, dtype="float32", always_2d=True)
+    blocks = [audio[i:i + BLOCK_SIZE, :1] for i in range(0, len(audio), BLOCK_SIZE)]
+    reference = UplinkEncoder(encoding, info.samplerate, 1)
+    whole = b"".join(reference.encode(block) for block in blocks) + reference.close()
+    encoder = UplinkEncoder(encoding, info.samplerate, 1)
+    sent = b""
+    frames = frames_emitted_upto = 0
+    for block in blocks:
+        data = encoder.encode(block)
+        sent += data
+        frames += len(block)
+        if data:
+            frames_emitted_upto = frames
+    held_ms = (frames - frames_emitted_upto) / info.samplerate * 1000
+    flushed = encoder.flush()
+    print(f"{encoding:>9}: at gate close {held_ms:6.1f} ms of audio ({len(whole) - len(sent)} bytes) "
+          f"still in the encoder, flush() sends {len(flushed)} bytes")
+    return len(sent + flushed) == len(whole)
+
+
+if __name__ == "__main__":
+    path = sys.argv[1] if len(sys.argv) > 1 else DEFAULT_WAV
+    print(f"{path}: {sf.info(path).samplerate} Hz, {BLOCK_SIZE}-frame blocks")
+    for encoding in UPLINK_FORMATS:
+        run(path, encoding)
+    print(f"Utterance of {UTTERANCE_BLOCKS} blocks, then the gate closes:")
+    incomplete = [encoding for encoding in UPLINK_FORMATS if not utterance_end(path, encoding)]
+    assert not incomplete, f"flush() left audio in the {incomplete} encoder"
+    print("OK: every encoding has sent the whole utterance once flushed")
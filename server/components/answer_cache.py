@@ -0,0 +1,97 @@
+import asyncio
+import re
+from collections import OrderedDict
+
+_PUNCT_RE = re.compile(r"[^\w\s]")
+
+
+def normalize_question(question):
+    # "What's the  budget?" and "whats the budget" are the same question
+    return " ".join(_PUNCT_RE.sub("", question.lower()).split())
+
+
+class _Inflight:
+    __slots__ = ("task", "listeners", "parts")
+
+    def __init__(self):
+        self.task = None
+        self.listeners = []  # on_delta callbacks of everyone awaiting this answer
+        self.parts = []  # text streamed so far, replayed to late joiners
+
+    def emit(self, delta):
+        self.parts.append(delta)
+        for on_delta in list(self.listeners):
+            on_delta(delta)
+
+
+class AnswerCache:
+    """LRU cache of chatbot answers with in-flight deduplication.
+
+    Entries are keyed on the normalized question and a content version the
+    caller bumps whenever the transcript or summary changes, so a cached
+    answer never outlives the content it was generated from. Identical
+    questions that arrive while the first is still being answered await that
+    same request instead of starting their own, and also get its streamed
+    text: what was already produced in one piece, the rest as it arrives.
+    """
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self.hits = 0
+        self.misses = 0
+        self.shared = 0
+
+    async def get(self, question, version, compute, on_delta=None):
+        """Cached answer for (question, version), else the result of awaiting compute(emit).
+
+        compute may call emit(text) with partial answer text as it streams,
+        which is passed on to on_delta. Cache hits return without any deltas.
+        """
+        key = (normalize_question(question), version)
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key]
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.shared += 1
+            if on_delta and inflight.parts:
+                on_delta("".join(inflight.parts))
+        else:
+            self.misses += 1
+            inflight = self._inflight[key] = _Inflight()
+            inflight.task = asyncio.create_task(self._compute(key, inflight, compute))
+        if on_delta:
+            inflight.listeners.append(on_delta)
+        try:
+            # Shielded so one asker disconnecting doesn't cancel the answer for the rest
+            return await asyncio.shield(inflight.task)
+        finally:
+            if on_delta:
+                inflight.listeners.remove(on_delta)
+
+    async def _compute(self, key, inflight, compute):
+        try:
+            answer = await compute(inflight.emit)
+        finally:
+            self._inflight.pop(key, None)
+        # Failures aren't cached, the next ask retries
+        self._entries[key] = answer
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return answer
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self):
+        lookups = self.hits + self.misses + self.shared
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "shared": self.shared,
+            "hit_rate": round((self.hits + self.shared) / lookups, 3) if lookups else 0.0,
+        }
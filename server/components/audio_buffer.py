@@ -0,0 +1,97 @@
+import threading
+import time
+import numpy as np
+
+
+class RingBuffer:
+    """Preallocated single-producer/single-consumer ring of audio frames.
+
+    The PortAudio callback writes into it without allocating and the mixer
+    reads fixed-size chunks out of it, so no block is lost just because the
+    consumer was a little late.
+    """
+
+    def __init__(self, capacity, channels=1, dtype=np.float32):
+        self.capacity = int(capacity)
+        self.channels = channels
+        self._buf = np.zeros((self.capacity, channels), dtype=dtype)
+        self._lock = threading.Lock()
+        # Monotonic frame counters, the ring position is counter % capacity
+        self._write_pos = 0
+        self._read_pos = 0
+        # Frames thrown away because the reader fell more than `capacity` behind
+        self.overruns = 0
+        # Reads that asked for more frames than were buffered
+        self.underruns = 0
+        # Monotonic time of the last write, i.e. when the newest frame arrived
+        self.write_time = None
+
+    @property
+    def available(self):
+        with self._lock:
+            return self._write_pos - self._read_pos
+
+    def write(self, data, timestamp=None):
+        """Copy a (frames, channels) block into the ring, dropping the oldest frames on overflow."""
+        n = len(data)
+        skip = 0
+        if n > self.capacity:
+            # Only the newest `capacity` frames can survive anyway
+            skip = n - self.capacity
+            data = data[skip:]
+            n = self.capacity
+        with self._lock:
+            self._write_pos += skip
+            start = self._write_pos % self.capacity
+            first = min(n, self.capacity - start)
+            self._buf[start:start + first] = data[:first]
+            if first < n:
+                self._buf[:n - first] = data[first:]
+            self._write_pos += n
+            self.write_time = time.monotonic() if timestamp is None else timestamp
+            lost = self._write_pos - self._read_pos - self.capacity
+            if lost > 0:
+                self.overruns += lost
+                self._read_pos += lost
+
+    def read(self, frames, out=None):
+        """Return exactly `frames` frames, or None (and count an underrun) if not enough are buffered."""
+        with self._lock:
+            if self._write_pos - self._read_pos < frames:
+                self.underruns += 1
+                return None
+            if out is None:
+                out = np.empty((frames, self.channels), dtype=self._buf.dtype)
+            start = self._read_pos % self.capacity
+            first = min(frames, self.capacity - start)
+            out[:first] = self._buf[start:start + first]
+            if first < frames:
+                out[first:frames] = self._buf[:frames - first]
+            self._read_pos += frames
+            return out
+
+    def read_some(self, max_frames, out):
+        """Copy up to `max_frames` buffered frames into `out` and return how many were copied."""
+        with self._lock:
+            frames = min(max_frames, self._write_pos - self._read_pos)
+            start = self._read_pos % self.capacity
+            first = min(frames, self.capacity - start)
+            out[:first] = self._buf[start:start + first]
+            if first < frames:
+                out[first:frames] = self._buf[:frames - first]
+            self._read_pos += frames
+            return frames
+
+    def clear(self):
+        with self._lock:
+            self._read_pos = self._write_pos
+
+    def stats(self):
+        with self._lock:
+            return {
+                "frames_written": self._write_pos,
+                "frames_read": self._read_pos,
+                "buffered": self._write_pos - self._read_pos,
+                "overruns": self.overruns,
+                "underruns": self.underruns,
+            }
@@ -1,17 +1,19 @@
 import soundcard as sc
-import soundfile as sf
-import numpy as np
 import threading
-import time
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from components.recording import StreamingRecording
 
 OUTPUT_FILE_NAME = "out.wav"    # file name.
 SAMPLE_RATE = 48000              # [Hz]. sampling rate.
+AUDIO_DIR = '../audio/'
 
 class AudioRecorder:
     def __init__(self):
         self.is_recording = False
-        self.mic_data = []
-        self.speaker_data = []
+        # Streams both sources and their mix to disk as they are captured
+        self.recording = None
         self.mic_thread = None
         self.speaker_thread = None
         
@@ -24,9 +26,9 @@ class AudioRecorder:
                     # Record in small chunks (0.1 seconds)
                     chunk = mic.record(numframes=int(SAMPLE_RATE * 0.1))
                     if len(chunk.shape) > 1:
-                        self.mic_data.extend(chunk[:, 0])  # Take first channel
+                        self.recording.write_mic(chunk[:, 0])  # Take first channel
                     else:
-                        self.mic_data.extend(chunk)
+                        self.recording.write_mic(chunk)
         except Exception as e:
             print(f"Microphone recording error: {e}")
     
@@ -39,9 +41,9 @@ class AudioRecorder:
                     # Record in small chunks (0.1 seconds)
                     chunk = speaker.record(numframes=int(SAMPLE_RATE * 0.1))
                     if len(chunk.shape) > 1:
-                        self.speaker_data.extend(chunk[:, 0])  # Take first channel
+                        self.recording.write_speaker(chunk[:, 0])  # Take first channel
                     else:
-                        self.speaker_data.extend(chunk)
+                        self.recording.write_speaker(chunk)
         except Exception as e:
             print(f"Speaker recording error: {e}")
     
@@ -51,12 +53,13 @@ class AudioRecorder:
             print("Recording is already in progress!")
             return
         
+        # The previous mix may still be normalizing into the same file
+        self.wait_for_files()
+        
         print("Starting recording...")
         print("Press Enter to stop recording at any time.")
         
-        # Reset data
-        self.mic_data = []
-        self.speaker_data = []
+        self.recording = StreamingRecording(AUDIO_DIR, SAMPLE_RATE, mixed_name=OUTPUT_FILE_NAME)
         self.is_recording = True
         
         # Start recording threads
@@ -69,7 +72,7 @@ class AudioRecorder:
         print("🔴 Recording started! Press Enter to stop...")
     
     def stop_recording(self):
-        """Stop recording and save files"""
+        """Stop recording and close the files, the mix is normalized in the background"""
         if not self.is_recording:
             print("No recording in progress!")
             return
@@ -83,37 +86,26 @@ class AudioRecorder:
         if self.speaker_thread:
             self.speaker_thread.join()
         
-        # Convert to numpy arrays
-        mic_audio = np.array(self.mic_data, dtype=np.float32)
-        speaker_audio = np.array(self.speaker_data, dtype=np.float32)
-        
-        # Make sure both arrays have the same length
-        min_length = min(len(mic_audio), len(speaker_audio))
-        if min_length > 0:
-            mic_audio = mic_audio[:min_length]
-            speaker_audio = speaker_audio[:min_length]
-            
-            # Mix both audio sources
-            mixed_audio = mic_audio + speaker_audio
-            # Normalize to prevent clipping
-            if np.max(np.abs(mixed_audio)) > 0:
-                mixed_audio = mixed_audio / np.max(np.abs(mixed_audio)) * 0.8
-            
-            # Save the three output files in the audio directory
-            audio_dir = '../audio/'
-            sf.write(audio_dir + OUTPUT_FILE_NAME, mixed_audio, SAMPLE_RATE)
-            sf.write(audio_dir + "microphone_only.wav", mic_audio, SAMPLE_RATE)
-            sf.write(audio_dir + "speaker_only.wav", speaker_audio, SAMPLE_RATE)
-            
-            duration = len(mixed_audio) / SAMPLE_RATE
+        # Both sources are already on disk; the speaker was resampled onto the
+        # mic clock while mixing, so this only closes files
+        duration = self.recording.finish()
+        if duration > 0:
+            stats = self.recording.stats()
             print(f"\n✅ Recording completed! Duration: {duration:.2f} seconds")
+            print(f"Speaker clock drift compensated: {stats['drift_ppm']:.1f} ppm")
             print(f"Audio saved to:")
-            print(f"- {audio_dir + OUTPUT_FILE_NAME} (mixed)")
-            print(f"- {audio_dir}microphone_only.wav (mic only)")
-            print(f"- {audio_dir}speaker_only.wav (speaker only)")
+            print(f"- {self.recording.mixed_path} (mixed, normalizing in the background)")
+            print(f"- {self.recording.mic_path} (mic only)")
+            print(f"- {self.recording.speaker_path} (speaker only)")
         else:
             print("❌ No audio data recorded!")
 
+    def wait_for_files(self):
+        """Block until the last recording's mixed file is complete"""
+        if self.recording and self.recording.normalize_thread and self.recording.normalize_thread.is_alive():
+            print("Finishing the mixed file of the last recording...")
+            self.recording.wait()
+
 def main():
     recorder = AudioRecorder()
     
@@ -140,6 +132,7 @@ def main():
             elif command in ['quit', 'q', 'exit']:
                 if recorder.is_recording:
                     recorder.stop_recording()
+                recorder.wait_for_files()
                 print("Goodbye!")
                 break
             else:
@@ -0,0 +1,247 @@
+import asyncio
+import json
+import time
+from collections import deque
+
+import websockets
+
+REPLAY_SECONDS = 5.0  # uplink audio kept for replay onto a replacement connection
+KEEPALIVE_SECONDS = 5.0  # Deepgram closes a socket after ~10 s without audio or a KeepAlive
+RECONNECT_BACKOFF = (0.25, 0.5, 1.0, 2.0, 5.0)  # seconds between attempts when no spare is ready
+OVERLAP_TOLERANCE = 0.05  # seconds; replayed words ending this close to the committed end count as repeats
+
+
+class DeepgramLink:
+    """Supervised Deepgram streaming connection that survives socket drops.
+
+    Mixed blocks go in through send_block(); the last `replay_seconds` of them
+    are kept as PCM. A spare socket is kept connected (and alive with
+    KeepAlives) in the background. When the active socket fails, on send or
+    on receive, the spare takes over and the buffered audio is encoded again
+    by a fresh encoder (so FLAC/Opus streams start with a valid header) and
+    replayed onto it. Deepgram's timestamps on the new socket are shifted by
+    where the replay started, so results() yields times on one session
+    timeline and trims words that were already delivered as finals.
+
+    Stream time is the audio sent, not wall time: blocks held back by the
+    voice gate never reach Deepgram and don't advance either clock.
+    """
+
+    def __init__(self, url, headers, make_encoder, sample_rate, replay_seconds=REPLAY_SECONDS,
+                 keepalive=KEEPALIVE_SECONDS, connect=None, spare=True):
+        self.url = url
+        self.headers = headers
+        self.make_encoder = make_encoder
+        self.sample_rate = sample_rate
+        self.replay_frames = int(replay_seconds * sample_rate)
+        self.keepalive = keepalive
+        # websockets >= 14 (pinned in requirements.txt); the legacy client called this extra_headers
+        self.connect = connect or (lambda: websockets.connect(self.url, additional_headers=self.headers))
+        self.use_spare = spare
+        self.encoder = make_encoder()
+        self.ws = None
+        self._spare = None
+        self._spare_task = None
+        self._spare_needed = asyncio.Event()
+        self._base = 0.0  # session time where the active socket's audio starts
+        self._generation = 0  # bumped on every failover, so a failure is only handled once
+        self._failover_lock = asyncio.Lock()
+        self._replay = deque()  # (start frame, block) of recent uplink audio
+        self._replay_len = 0
+        self.frames_sent = 0
+        self.committed_until = 0.0  # session time up to which finals have been delivered
+        self.closed = False
+        self.finishing = False  # CloseStream sent, the server closing the socket ends results()
+        self.connections = 0
+        self.failovers = 0
+        self.replayed_seconds = 0.0
+        self.lost_seconds = 0.0
+        self.trimmed_words = 0
+        self.last_recovery_ms = None
+
+    async def open(self):
+        self.ws = await self._connect_with_retry()
+        if self.use_spare:
+            self.start_spare()
+
+    def start_spare(self):
+        """Start keeping a spare socket, for a link opened with spare=False."""
+        self.use_spare = True
+        if self._spare_task is None and not self.closed:
+            self._spare_task = asyncio.create_task(self._keep_spare())
+
+    async def _connect_with_retry(self):
+        for attempt in range(len(RECONNECT_BACKOFF) + 1):
+            try:
+                ws = await self.connect()
+                self.connections += 1
+                return ws
+            except (OSError, asyncio.TimeoutError, websockets.WebSocketException) as e:
+                if attempt == len(RECONNECT_BACKOFF):
+                    raise
+                delay = RECONNECT_BACKOFF[attempt]
+                print(f"[!] Deepgram connect failed ({e}), retrying in {delay}s")
+                await asyncio.sleep(delay)
+
+    async def _keep_spare(self):
+        # Hold a connected, idle socket ready for the next failover
+        while not self.closed:
+            if self._spare is None:
+                try:
+                    self._spare = await self._connect_with_retry()
+                except Exception as e:
+                    print(f"[!] Could not open spare Deepgram socket: {e}")
+                    await asyncio.sleep(RECONNECT_BACKOFF[-1])
+                    continue
+            try:
+                # Woken early when a failover used the spare up
+                await asyncio.wait_for(self._spare_needed.wait(), self.keepalive)
+            except asyncio.TimeoutError:
+                pass
+            self._spare_needed.clear()
+            spare = self._spare
+            if spare is None:
+                continue
+            try:
+                await spare.send(json.dumps({"type": "KeepAlive"}))
+            except websockets.ConnectionClosed:
+                if self._spare is spare:
+                    self._spare = None
+
+    async def send_block(self, block):
+        """Encode and send one mixed block, returns the number of bytes sent."""
+        self._replay.append((self.frames_sent, block.copy()))
+        self._replay_len += len(block)
+        while self._replay and self._replay_len - len(self._replay[0][1]) >= self.replay_frames:
+            self._replay_len -= len(self._replay.popleft()[1])
+        self.frames_sent += len(block)
+        data = self.encoder.encode(block)
+        if data:
+            await self._send(data)
+        return len(data)
+
+    async def flush(self):
+        """Send whatever audio the encoder still holds, for a pause in the stream (the gate closed)."""
+        data = self.encoder.flush()
+        if data:
+            await self._send(data)
+
+    async def send_control(self, msg_type):
+        """Send a control message such as KeepAlive or Finalize."""
+        await self._send(json.dumps({"type": msg_type}))
+
+    async def finish(self):
+        """Flush the encoder and send CloseStream; results() ends once Deepgram has sent the rest."""
+        data = self.encoder.close()
+        if data:
+            await self._send(data)
+        self.finishing = True
+        await self.send_control("CloseStream")
+
+    async def _send(self, data):
+        while True:
+            ws, generation = self.ws, self._generation
+            try:
+                await ws.send(data)
+                return
+            except websockets.ConnectionClosed as e:
+                # The replay after failover already includes this block's audio
+                await self._failover(generation, e)
+                if isinstance(data, bytes):
+                    return
+
+    async def _failover(self, generation, reason):
+        async with self._failover_lock:
+            if generation != self._generation or self.closed:
+                return  # someone else already switched sockets
+            started = time.perf_counter()
+            print(f"[!] Deepgram connection lost ({reason}), failing over")
+            old = self.ws
+            if self._spare is not None:
+                self.ws, self._spare = self._spare, None
+                self._spare_needed.set()
+            else:
+                self.ws = await self._connect_with_retry()
+            self._generation += 1
+            self.failovers += 1
+            asyncio.ensure_future(old.close())
+            # Replay from the oldest buffered block, with a fresh encoder so the stream starts clean
+            self.encoder = self.make_encoder()
+            replay_start = self._replay[0][0] if self._replay else self.frames_sent
+            self._base = replay_start / self.sample_rate
+            if self._base > self.committed_until:
+                # The drop outlasted the replay buffer, this audio is never transcribed
+                self.lost_seconds += self._base - self.committed_until
+            chunks = [self.encoder.encode(block) for _, block in self._replay]
+            data = b"".join(chunks)
+            self.replayed_seconds += (self.frames_sent - replay_start) / self.sample_rate
+            try:
+                if data:
+                    await self.ws.send(data)
+                if self.finishing:
+                    await self.ws.send(json.dumps({"type": "CloseStream"}))
+            except websockets.ConnectionClosed:
+                pass  # the next send or receive fails over again and replays the same buffer
+            self.last_recovery_ms = round((time.perf_counter() - started) * 1000, 1)
+            print(f"[!] Deepgram failover done in {self.last_recovery_ms} ms, replayed "
+                  f"{(self.frames_sent - replay_start) / self.sample_rate:.1f}s of audio")
+
+    async def results(self):
+        """Yield Deepgram messages across reconnects, Results on the session timeline without repeats."""
+        while not self.closed:
+            ws, generation, base = self.ws, self._generation, self._base
+            try:
+                async for message in ws:
+                    msg = json.loads(message)
+                    if msg.get("type", "Results") == "Results":
+                        self._rebase(msg, base)
+                    yield msg
+            except websockets.ConnectionClosed as e:
+                reason = e
+            else:
+                if self.finishing:
+                    return  # Deepgram closed the stream after its last results
+                reason = "closed by server"
+            if self.closed:
+                return
+            await self._failover(generation, reason)
+
+    def _rebase(self, msg, base):
+        msg["start"] = msg.get("start", 0.0) + base
+        end = msg["start"] + msg.get("duration", 0.0)
+        alternative = msg.get("channel", {}).get("alternatives", [{}])[0]
+        words = alternative.get("words")
+        for word in words or ():
+            word["start"] += base
+            word["end"] += base
+        if msg["start"] < self.committed_until - OVERLAP_TOLERANCE:
+            # Replayed audio: keep only what wasn't already delivered as a final
+            if words:
+                kept = [w for w in words if w["end"] > self.committed_until + OVERLAP_TOLERANCE]
+                self.trimmed_words += len(words) - len(kept)
+                alternative["words"] = kept
+                alternative["transcript"] = " ".join(w.get("punctuated_word", w["word"]) for w in kept)
+            elif end <= self.committed_until + OVERLAP_TOLERANCE:
+                self.trimmed_words += len(alternative.get("transcript", "").split())
+                alternative["transcript"] = ""
+        if msg.get("is_final"):
+            self.committed_until = max(self.committed_until, end)
+
+    async def close(self):
+        self.closed = True
+        if self._spare_task:
+            self._spare_task.cancel()
+        for ws in (self.ws, self._spare):
+            if ws is not None:
+                await ws.close()
+
+    def stats(self):
+        return {
+            "connections": self.connections,
+            "failovers": self.failovers,
+            "spare_ready": self._spare is not None,
+            "last_recovery_ms": self.last_recovery_ms,
+            "replayed_seconds": round(self.replayed_seconds, 2),
+            "lost_seconds": round(self.lost_seconds, 2),
+            "trimmed_words": self.trimmed_words,
+        }
@@ -0,0 +1,90 @@
+import numpy as np
+
+MAX_DRIFT_PPM = 1000  # anything beyond this is a wrong sample rate, not clock drift
+
+
+class FractionalResampler:
+    """Streaming linear-interpolation resampler.
+
+    `ratio` is input frames consumed per output frame. The fractional read
+    position and the couple of input frames it still needs are carried over
+    between blocks, so consecutive blocks join without clicks.
+    """
+
+    def __init__(self, channels=1):
+        self.ratio = 1.0
+        self._pos = 0.0
+        self._carry = np.zeros((0, channels), dtype=np.float32)
+        self._steps = {}
+
+    def frames_needed(self, out_frames):
+        """Number of new input frames process() needs to produce `out_frames` frames."""
+        last = self._pos + (out_frames - 1) * self.ratio
+        return max(0, int(last) + 2 - len(self._carry))
+
+    def frames_available(self, new_frames):
+        """Number of frames process() can produce with `new_frames` new input frames."""
+        usable = len(self._carry) + new_frames - 2 - self._pos
+        return 0 if usable < 0 else int(usable / self.ratio) + 1
+
+    def process(self, new_frames, out_frames):
+        x = np.concatenate((self._carry, new_frames)) if len(self._carry) else new_frames
+        steps = self._steps.get(out_frames)
+        if steps is None:
+            steps = self._steps[out_frames] = np.arange(out_frames, dtype=np.float64)
+        positions = self._pos + self.ratio * steps
+        idx = positions.astype(np.int64)
+        frac = (positions - idx).astype(np.float32)[:, None]
+        out = x[idx] + (x[idx + 1] - x[idx]) * frac
+        next_pos = self._pos + self.ratio * out_frames
+        drop = int(next_pos)
+        self._carry = x[drop:].copy()
+        self._pos = next_pos - drop
+        return out
+
+    @property
+    def pending(self):
+        """Input frames held back inside the resampler (carry minus the consumed fraction)."""
+        return len(self._carry) - self._pos
+
+
+class DriftEstimator:
+    """Estimates the speaker/mic clock ratio from how far apart the two streams are.
+
+    The alignment error (how many frames the speaker stream trails the mic
+    stream) jitters with callback timing, so it is smoothed first and then fed
+    to a PI controller. The integral term settles on the real clock offset,
+    the proportional term pulls any accumulated misalignment back to zero.
+    """
+
+    def __init__(self, sample_rate, smoothing=0.02, kp=2e-6, ki=1e-9, max_ppm=MAX_DRIFT_PPM):
+        self.sample_rate = sample_rate
+        self.smoothing = smoothing
+        self.kp = kp
+        self.ki = ki
+        self.max_ratio = max_ppm * 1e-6
+        self._error = None
+        self._integral = 0.0
+        self.ratio = 1.0
+
+    def update(self, error):
+        """Feed the current alignment error in frames after a mix, returns the new ratio."""
+        if self._error is None:
+            self._error = float(error)
+        else:
+            self._error += self.smoothing * (error - self._error)
+        self._integral = min(max(self._integral + self.ki * self._error, -self.max_ratio), self.max_ratio)
+        adjust = self._integral + self.kp * self._error
+        self.ratio = 1.0 + min(max(adjust, -self.max_ratio), self.max_ratio)
+        return self.ratio
+
+    @property
+    def ppm(self):
+        return self._integral * 1e6
+
+    def stats(self):
+        return {
+            "drift_ppm": round(self.ppm, 2),
+            "ratio": self.ratio,
+            "alignment_error": round(self._error or 0.0, 1),
+        }
@@ -0,0 +1,114 @@
+import asyncio
+from collections import deque
+
+# What a client's queue does when it is full:
+#   drop_interim - drop the oldest droppable (interim) message to make room; with
+#                  only finals queued, disconnect rather than lose one
+#   coalesce     - replace a queued message with the same key (e.g. the previous
+#                  summary) before falling back to drop_interim
+#   disconnect   - close the connection, the client is too far behind
+OVERFLOW_POLICIES = ("drop_interim", "coalesce", "disconnect")
+
+
+class ClientChannel:
+    """Bounded outbound queue plus a writer task for one websocket client.
+
+    Broadcasts only enqueue, so a slow or half-dead client delays nobody but
+    itself, and the cost of a broadcast stays a constant per-client append.
+    """
+
+    def __init__(self, websocket, max_queue=100, policy="coalesce", send_timeout=10.0):
+        if policy not in OVERFLOW_POLICIES:
+            raise ValueError(f"Unknown overflow policy {policy!r}, expected one of {OVERFLOW_POLICIES}")
+        self.websocket = websocket
+        self.max_queue = max_queue
+        self.policy = policy
+        self.send_timeout = send_timeout
+        self.closed = False
+        self._queue = deque()  # [data, key, droppable]
+        self._event = asyncio.Event()
+        self.sent = 0
+        self.dropped = 0
+        self.coalesced = 0
+        self.high_water = 0
+        self._task = asyncio.create_task(self._writer())
+
+    def enqueue(self, data, key=None, droppable=False):
+        """Queue a message for this client without waiting on the network."""
+        if self.closed:
+            return
+        if key is not None and self.policy == "coalesce":
+            for entry in self._queue:
+                if entry[1] == key:
+                    entry[0] = data
+                    entry[2] = droppable
+                    self.coalesced += 1
+                    return
+        if len(self._queue) >= self.max_queue:
+            if self.policy == "disconnect":
+                self._disconnect_slow()
+                return
+            if not self._drop_one(droppable):
+                return
+        self._queue.append([data, key, droppable])
+        self.high_water = max(self.high_water, len(self._queue))
+        self._event.set()
+
+    def _drop_one(self, incoming_droppable):
+        # Make room by dropping the oldest interim message, or the incoming one if it is interim too
+        for i, entry in enumerate(self._queue):
+            if entry[2]:
+                del self._queue[i]
+                self.dropped += 1
+                return True
+        if incoming_droppable:
+            self.dropped += 1
+            return False
+        # Only finals and summaries are queued: losing one would silently leave a hole in the
+        # client's transcript, so close the connection (1013, try again later) instead
+        self._disconnect_slow()
+        return False
+
+    def _disconnect_slow(self):
+        print(f"[SERVER] Client queue full ({self.max_queue}), disconnecting slow consumer")
+        self.close(reason="slow consumer")
+
+    async def _writer(self):
+        try:
+            while True:
+                while not self._queue:
+                    self._event.clear()
+                    await self._event.wait()
+                data = self._queue.popleft()[0]
+                await asyncio.wait_for(self.websocket.send(data), self.send_timeout)
+                self.sent += 1
+        except asyncio.TimeoutError:
+            print(f"[SERVER] Client send timed out after {self.send_timeout}s, disconnecting")
+            self.close(reason="send timeout")
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Connection closed under us, the handler's finally will clean up
+            self.closed = True
+            print(f"[SERVER] Client writer stopped: {e}")
+
+    def close(self, reason=""):
+        if self.closed:
+            return
+        self.closed = True
+        self._queue.clear()
+        asyncio.ensure_future(self.websocket.close(code=1013, reason=reason))
+
+    def cancel(self):
+        self.closed = True
+        self._task.cancel()
+
+    def stats(self):
+        return {
+            "queued": len(self._queue),
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "coalesced": self.coalesced,
+            "high_water": self.high_water,
+            "closed": self.closed,
+        }
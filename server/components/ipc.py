@@ -0,0 +1,52 @@
+import json
+import struct
+import threading
+
+# Every message is a 4-byte big-endian length followed by that many bytes of UTF-8 JSON
+HEADER = struct.Struct(">I")
+MAX_MESSAGE_BYTES = 16 * 1024 * 1024
+
+
+def encode_message(msg_type, **fields):
+    payload = json.dumps({"type": msg_type, **fields}, separators=(",", ":")).encode("utf-8")
+    return HEADER.pack(len(payload)) + payload
+
+
+class MessageWriter:
+    """Writes framed, typed messages to a binary stream (the transcriber's stdout)."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self._lock = threading.Lock()
+
+    def send(self, msg_type, **fields):
+        data = encode_message(msg_type, **fields)
+        with self._lock:
+            self.stream.write(data)
+            self.stream.flush()
+
+
+def _read_exact(stream, size):
+    chunks = []
+    while size:
+        chunk = stream.read(size)
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def read_messages(stream):
+    """Yield decoded messages from a binary stream until it is closed."""
+    while True:
+        header = _read_exact(stream, HEADER.size)
+        if header is None:
+            return
+        (length,) = HEADER.unpack(header)
+        if length > MAX_MESSAGE_BYTES:
+            raise ValueError(f"IPC message of {length} bytes, stream is out of sync")
+        payload = _read_exact(stream, length)
+        if payload is None:
+            return
+        yield json.loads(payload)
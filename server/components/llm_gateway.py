@@ -0,0 +1,253 @@
+import asyncio
+import os
+import random
+import threading
+import time
+import weakref
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+LLM_BACKEND = os.getenv("LLM_BACKEND", "cohere")  # "stub" answers locally, for tests and benchmarks
+LLM_STUB_DELAY = float(os.getenv("LLM_STUB_DELAY", "0"))  # seconds per stub call
+MAX_CONCURRENCY = 4  # LLM calls in flight per process
+CALL_TIMEOUT = 30.0
+RETRIES = 2
+BACKOFF = 0.5  # seconds before the first retry, doubled for each one after
+LATENCY_WINDOW = 500  # recent calls kept per operation for the latency percentiles
+
+
+def make_cohere_backend(max_connections=MAX_CONCURRENCY):
+    import cohere
+    import httpx
+    # One client for the life of the process, so connections (and TLS sessions) are reused
+    http = httpx.Client(limits=httpx.Limits(max_connections=max_connections,
+                                            max_keepalive_connections=max_connections))
+    return cohere.Client(os.getenv("COHERE_API_KEY"), httpx_client=http, max_retries=0)
+
+
+class StubBackend:
+    """Local stand-in with the shape of cohere.Client, answers after `delay` seconds.
+
+    `fail_rate` makes that fraction of calls raise, to exercise the gateway's
+    retries. Summaries are the first words of the input, answers echo the
+    question; generate_stream spreads the same delay over the answer's words.
+    """
+
+    def __init__(self, delay=0.0, fail_rate=0.0, seed=None):
+        self.delay = delay
+        self.fail_rate = fail_rate
+        self.calls = 0
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def _call(self):
+        with self._lock:
+            self.calls += 1
+            fail = self._rng.random() < self.fail_rate
+        time.sleep(self.delay)
+        if fail:
+            raise ConnectionError("stub backend: simulated failure")
+
+    def _answer(self, prompt):
+        question = prompt.rsplit("Question:", 1)[-1].replace("Answer:", "").strip()
+        return f"(stub) You asked: {question}. Here is what the meeting transcript says about that."
+
+    def generate(self, prompt, model=None, max_tokens=100, temperature=0.3):
+        self._call()
+        return SimpleNamespace(generations=[SimpleNamespace(text=self._answer(prompt))])
+
+    def generate_stream(self, prompt, model=None, max_tokens=100, temperature=0.3):
+        # Same total time as generate(), spread over the words of the answer
+        with self._lock:
+            self.calls += 1
+            fail = self._rng.random() < self.fail_rate
+        words = self._answer(prompt).split(" ")
+        for i, word in enumerate(words):
+            time.sleep(self.delay / len(words))
+            if fail:
+                raise ConnectionError("stub backend: simulated failure")
+            yield SimpleNamespace(event_type="text-generation", text=word if i == 0 else " " + word)
+        yield SimpleNamespace(event_type="stream-end", finish_reason="COMPLETE")
+
+    def summarize(self, text, model=None, length="medium", format="paragraph"):
+        self._call()
+        words = {"short": 30, "medium": 60, "long": 120}.get(length, 60)
+        return SimpleNamespace(summary=" ".join(text.split()[:words]))
+
+
+def _retryable(error):
+    # Client errors other than rate limiting won't succeed on a retry
+    status = getattr(error, "status_code", None)
+    return not (isinstance(status, int) and 400 <= status < 500 and status != 429)
+
+
+class LLMGateway:
+    """Every LLM call in the server goes through here.
+
+    Owns one long-lived backend client (cohere.Client or StubBackend, created
+    on first use) and runs its blocking calls on a dedicated thread pool, so
+    the event loop never waits on the network. At most `max_concurrency`
+    calls are in flight; each attempt has a timeout and failed attempts are
+    retried with exponential backoff. Latency is recorded per operation.
+    """
+
+    def __init__(self, backend=None, max_concurrency=MAX_CONCURRENCY, timeout=CALL_TIMEOUT,
+                 retries=RETRIES, backoff=BACKOFF):
+        self._backend = backend
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="llm")
+        self._backend_lock = threading.Lock()
+        # asyncio primitives belong to one loop, and the transcriber runs more than one
+        self._semaphores = weakref.WeakKeyDictionary()
+        self._stats = {}
+
+    @property
+    def backend(self):
+        with self._backend_lock:
+            if self._backend is None:
+                self._backend = StubBackend(LLM_STUB_DELAY) if LLM_BACKEND == "stub" else make_cohere_backend(self.max_concurrency)
+            return self._backend
+
+    def _semaphore(self):
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+        return semaphore
+
+    def _op_stats(self, op):
+        stats = self._stats.get(op)
+        if stats is None:
+            stats = self._stats[op] = {"calls": 0, "errors": 0, "retries": 0, "timeouts": 0,
+                                       "latencies": deque(maxlen=LATENCY_WINDOW),
+                                       "first_token": deque(maxlen=LATENCY_WINDOW)}
+        return stats
+
+    async def _call(self, op, fn, **kwargs):
+        stats = self._op_stats(op)
+        stats["calls"] += 1
+        loop = asyncio.get_running_loop()
+        async with self._semaphore():
+            for attempt in range(self.retries + 1):
+                started = time.perf_counter()
+                try:
+                    result = await asyncio.wait_for(
+                        loop.run_in_executor(self._executor, lambda: fn(**kwargs)), self.timeout)
+                    stats["latencies"].append(time.perf_counter() - started)
+                    return result
+                except asyncio.TimeoutError as e:
+                    # The worker thread can't be interrupted, it finishes in the background
+                    stats["timeouts"] += 1
+                    error = e
+                except Exception as e:
+                    error = e
+                if attempt == self.retries or not _retryable(error):
+                    stats["errors"] += 1
+                    raise error
+                stats["retries"] += 1
+                delay = self.backoff * 2 ** attempt
+                print(f"[!] LLM {op} failed ({error!r}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+    async def generate(self, prompt, max_tokens=100, temperature=0.3, model="command-r-plus"):
+        response = await self._call("generate", self.backend.generate, model=model, prompt=prompt,
+                                    max_tokens=max_tokens, temperature=temperature)
+        return response.generations[0].text.strip()
+
+    async def generate_stream(self, prompt, max_tokens=100, temperature=0.3, model="command-r-plus"):
+        """Yield the answer's text as the backend produces it.
+
+        The timeout applies to the wait for each chunk. A failure is only
+        retried if nothing has been yielded yet, since the caller has already
+        passed the earlier chunks on.
+        """
+        stats = self._op_stats("generate_stream")
+        stats["calls"] += 1
+        loop = asyncio.get_running_loop()
+        async with self._semaphore():
+            for attempt in range(self.retries + 1):
+                started = time.perf_counter()
+                chunks = asyncio.Queue()
+                abandoned = threading.Event()
+
+                def pump():
+                    # Worker thread: iterate the backend's blocking stream, hand chunks to the loop
+                    try:
+                        for event in self.backend.generate_stream(model=model, prompt=prompt, max_tokens=max_tokens,
+                                                                  temperature=temperature):
+                            if abandoned.is_set():
+                                return
+                            if event.event_type == "text-generation" and event.text:
+                                loop.call_soon_threadsafe(chunks.put_nowait, ("text", event.text))
+                            elif event.event_type == "stream-error":
+                                raise RuntimeError(f"LLM stream error: {getattr(event, 'err', event)}")
+                        loop.call_soon_threadsafe(chunks.put_nowait, ("end", None))
+                    except Exception as e:
+                        if not abandoned.is_set():
+                            loop.call_soon_threadsafe(chunks.put_nowait, ("error", e))
+
+                self._executor.submit(pump)
+                yielded = False
+                try:
+                    while True:
+                        kind, value = await asyncio.wait_for(chunks.get(), self.timeout)
+                        if kind == "error":
+                            raise value
+                        if kind == "end":
+                            stats["latencies"].append(time.perf_counter() - started)
+                            return
+                        if not yielded:
+                            stats["first_token"].append(time.perf_counter() - started)
+                            yielded = True
+                        yield value
+                except asyncio.TimeoutError as e:
+                    stats["timeouts"] += 1
+                    error = e
+                except Exception as e:
+                    error = e
+                finally:
+                    abandoned.set()
+                if yielded or attempt == self.retries or not _retryable(error):
+                    stats["errors"] += 1
+                    raise error
+                stats["retries"] += 1
+                delay = self.backoff * 2 ** attempt
+                print(f"[!] LLM generate_stream failed ({error!r}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+    async def summarize(self, text, length="medium", model="summarize-xlarge"):
+        response = await self._call("summarize", self.backend.summarize, text=text, model=model,
+                                    length=length, format="paragraph")
+        return response.summary
+
+    def stats(self):
+        out = {}
+        for op, stats in self._stats.items():
+            out[op] = {k: v for k, v in stats.items() if not isinstance(v, deque)}
+            for name, prefix in (("latencies", ""), ("first_token", "first_token_")):
+                latencies = sorted(stats[name])
+                if latencies:
+                    out[op][prefix + "p50_ms"] = round(latencies[len(latencies) // 2] * 1000, 1)
+                    out[op][prefix + "p95_ms"] = round(latencies[min(int(len(latencies) * 0.95), len(latencies) - 1)] * 1000, 1)
+        return out
+
+
+_gateway = None
+_gateway_lock = threading.Lock()
+
+
+def get_gateway():
+    """The process-wide gateway, shared by main.py and TranscriptAI."""
+    global _gateway
+    with _gateway_lock:
+        if _gateway is None:
+            _gateway = LLMGateway()
+        return _gateway
@@ -0,0 +1,141 @@
+import asyncio
+import numpy as np
+from components.drift import FractionalResampler
+
+
+def mix_blocks(mic_block, speaker_block):
+    # Mix both sources (simple sum, then normalize)
+    mixed = mic_block + speaker_block
+    # Normalize to prevent clipping
+    max_val = np.max(np.abs(mixed))
+    if max_val > 1.0:
+        mixed = mixed / max_val
+    return mixed
+
+
+class AudioMixer:
+    """Pulls block_size frames from the mic and speaker rings as soon as both are ready.
+
+    Capture callbacks call notify() from the PortAudio thread, which wakes the
+    mixer on its event loop instead of having it poll. With a deadline (in
+    seconds) set, a block that is ready on one source is mixed with whatever
+    the other source has once the deadline expires, so a stalled device can't
+    hold up the uplink.
+
+    With a DriftEstimator passed as `drift`, the speaker stream is resampled
+    onto the mic clock so the two stay sample-aligned over long meetings.
+
+    `mix` combines the two blocks, mix_blocks by default. Without a loop only
+    mix_ready() can be used, for callers that mix synchronously.
+    """
+
+    def __init__(self, mic_ring, speaker_ring, block_size, loop=None, deadline=None, drift=None, mix=mix_blocks):
+        self.mic_ring = mic_ring
+        self.speaker_ring = speaker_ring
+        self.block_size = block_size
+        self.deadline = deadline
+        self.drift = drift
+        self.resampler = FractionalResampler(mic_ring.channels) if drift else None
+        self.loop = loop
+        self.mix = mix
+        self._event = asyncio.Event()
+        self._pending = False
+        self._first_ready = None
+        channels = mic_ring.channels
+        self._mic_block = np.zeros((block_size, channels), dtype=np.float32)
+        self._speaker_block = np.zeros((block_size, channels), dtype=np.float32)
+        self.blocks = 0
+        self.partial_blocks = 0
+        self.wakeups = 0
+
+    def notify(self):
+        """Thread-safe wake-up, called from the capture callbacks after writing a block."""
+        if self._pending:
+            return
+        if self.mic_ring.available < self.block_size and self.speaker_ring.available < self.block_size:
+            return
+        self._pending = True
+        self.loop.call_soon_threadsafe(self._event.set)
+
+    def mix_ready(self):
+        """Mix one block if both sources have enough frames buffered, otherwise return None."""
+        b = self.block_size
+        if self.mic_ring.available < b:
+            return None
+        if self.resampler is None:
+            if self.speaker_ring.available < b:
+                return None
+            self.speaker_ring.read(b, out=self._speaker_block)
+            speaker_block = self._speaker_block
+        else:
+            needed = self.resampler.frames_needed(b)
+            if self.speaker_ring.available < needed:
+                return None
+            speaker_block = self.resampler.process(self.speaker_ring.read(needed), b)
+        self.mic_ring.read(b, out=self._mic_block)
+        if self.drift is not None:
+            self.resampler.ratio = self.drift.update(self._alignment_error())
+        self._first_ready = None
+        self.blocks += 1
+        return self.mix(self._mic_block, speaker_block)
+
+    def _alignment_error(self):
+        # Frames the next unread speaker frame trails the next unread mic frame by,
+        # judged from how much each source has buffered and when it last delivered
+        speaker_backlog = self.speaker_ring.available + self.resampler.pending
+        skew = (self.mic_ring.write_time - self.speaker_ring.write_time) * self.drift.sample_rate
+        return speaker_backlog - self.mic_ring.available + skew
+
+    async def next_block(self):
+        b = self.block_size
+        while True:
+            # Clear before checking so a notify() racing with the check is not lost
+            self._event.clear()
+            self._pending = False
+            mixed = self.mix_ready()
+            if mixed is not None:
+                return mixed
+            mic_n = self.mic_ring.available
+            speaker_n = self.speaker_ring.available
+            timeout = None
+            if self.deadline is not None and (mic_n >= b or speaker_n >= b):
+                now = self.loop.time()
+                if self._first_ready is None:
+                    self._first_ready = now
+                timeout = self._first_ready + self.deadline - now
+                if timeout <= 0:
+                    return self._mix_partial()
+            try:
+                await asyncio.wait_for(self._event.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            self.wakeups += 1
+
+    def _mix_partial(self):
+        # Mix whatever is buffered, zero-filling the source that fell behind
+        b = self.block_size
+        mic_n = self.mic_ring.read_some(b, self._mic_block)
+        self._mic_block[mic_n:] = 0
+        if self.resampler is None:
+            speaker_n = self.speaker_ring.read_some(b, self._speaker_block)
+        else:
+            # Through the resampler as well, so the frames it carries come out ahead of these
+            frames = np.empty((self.resampler.frames_needed(b), self.mic_ring.channels), dtype=np.float32)
+            frames = frames[:self.speaker_ring.read_some(len(frames), frames)]
+            speaker_n = min(self.resampler.frames_available(len(frames)), b)
+            self._speaker_block[:speaker_n] = self.resampler.process(frames, speaker_n)
+        self._speaker_block[speaker_n:] = 0
+        self._first_ready = None
+        self.blocks += 1
+        self.partial_blocks += 1
+        return self.mix(self._mic_block, self._speaker_block)
+
+    def stats(self):
+        stats = {
+            "blocks": self.blocks,
+            "partial_blocks": self.partial_blocks,
+            "wakeups": self.wakeups,
+        }
+        if self.drift is not None:
+            stats.update(self.drift.stats())
+        return stats
@@ -0,0 +1,263 @@
+import asyncio
+import json
+import uuid
+from urllib.parse import urlparse
+
+CHANNEL_PREFIX = "meeting:"  # Redis channel for session X is "meeting:X"
+RECONNECT_BACKOFF = (0.25, 0.5, 1.0, 2.0, 5.0)  # seconds between attempts to reach the Redis server
+MAX_PENDING_BYTES = 4 * 1024 * 1024  # unsent PUBLISH data before new messages are dropped instead
+
+
+class RedisError(Exception):
+    """An error reply from the Redis server."""
+
+
+def encode_command(*args):
+    """One command as a RESP array of bulk strings."""
+    parts = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        if isinstance(arg, str):
+            arg = arg.encode("utf-8")
+        parts.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+    return b"".join(parts)
+
+
+async def read_reply(reader):
+    """Read one RESP value: str, int, bytes, None or a list of them. Error replies raise RedisError."""
+    line = await reader.readline()
+    if not line.endswith(b"\r\n"):
+        raise ConnectionError("connection closed")
+    kind, rest = line[:1], line[1:-2]
+    if kind == b"+":
+        return rest.decode("utf-8")
+    if kind == b"-":
+        raise RedisError(rest.decode("utf-8"))
+    if kind == b":":
+        return int(rest)
+    if kind == b"$":
+        length = int(rest)
+        if length < 0:
+            return None
+        return (await reader.readexactly(length + 2))[:-2]
+    if kind == b"*":
+        length = int(rest)
+        if length < 0:
+            return None
+        return [await read_reply(reader) for _ in range(length)]
+    raise ValueError(f"Bad RESP reply: {line!r}")
+
+
+class InProcessPubSub:
+    """Session messages for a single server: publish() hands them straight to `deliver`.
+
+    deliver(channel, message) is called for every message published on a
+    subscribed channel. Each node numbers what it publishes per channel, and
+    publish() returns that sequence number.
+    """
+
+    def __init__(self, deliver, node_id=None):
+        self.deliver = deliver
+        self.node_id = node_id or uuid.uuid4().hex[:12]
+        self.channels = set()
+        self._seq = {}  # channel -> last sequence number this node published on it
+        self.published = 0
+        self.delivered = 0
+
+    async def start(self):
+        pass
+
+    async def close(self):
+        pass
+
+    def subscribe(self, channel):
+        self.channels.add(channel)
+
+    def unsubscribe(self, channel):
+        self.channels.discard(channel)
+
+    def publish(self, channel, message):
+        seq = self._seq[channel] = self._seq.get(channel, 0) + 1
+        self.published += 1
+        if channel in self.channels:
+            self.delivered += 1
+            self.deliver(channel, message)
+        return seq
+
+    def stats(self):
+        return {"node": self.node_id, "channels": len(self.channels),
+                "published": self.published, "delivered": self.delivered}
+
+
+class RedisPubSub(InProcessPubSub):
+    """Session messages shared between server nodes through a Redis server's PUBLISH/SUBSCRIBE.
+
+    Messages published here reach this node's subscribers directly, as with
+    InProcessPubSub, and go to Redis as {"node", "seq", "message"} JSON for
+    the other nodes. A subscriber tracks the last sequence number per
+    (publishing node, channel). A jump shows messages it never got, because
+    the connection dropped or a publisher fell behind; it is counted, passed
+    to on_gap(channel, node, missing), and delivery carries on.
+
+    The connections reconnect on their own and resubscribe. Every method
+    except start() and close() is synchronous and must be called on the
+    event loop that ran start().
+    """
+
+    def __init__(self, url, deliver, on_gap=None, node_id=None, prefix=CHANNEL_PREFIX):
+        super().__init__(deliver, node_id)
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "127.0.0.1"
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self.on_gap = on_gap
+        self.prefix = prefix
+        self.closed = False
+        self._pub = None  # StreamWriter of the publishing connection, None while disconnected
+        self._sub = None  # StreamWriter of the subscribed connection
+        self._last_seq = {}  # (node, channel) -> last sequence number received
+        self._connected = asyncio.Event()
+        self._task = None
+        self.received = 0
+        self.duplicates = 0
+        self.gaps = 0
+        self.missed = 0
+        self.unsent = 0
+        self.reconnects = 0
+
+    async def start(self):
+        """Connect in the background (retrying until the server is reachable) and keep the connections up.
+
+        Returns right away, so a node serves its own clients while Redis is
+        down; what it publishes until connected is counted as unsent.
+        """
+        self._task = asyncio.create_task(self._run())
+
+    @property
+    def connected(self):
+        return self._pub is not None
+
+    async def close(self):
+        self.closed = True
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def _open(self):
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        if self.password:
+            try:
+                writer.write(encode_command("AUTH", self.password))
+                await read_reply(reader)
+            except Exception:
+                writer.close()
+                raise
+        return reader, writer
+
+    async def _run(self):
+        attempt = 0
+        while True:
+            pub = None
+            try:
+                pub_reader, pub = await self._open()
+                sub_reader, sub = await self._open()
+            except (OSError, RedisError) as e:
+                if pub is not None:
+                    pub.close()  # the subscribe connection failed, don't leave this one open
+                delay = RECONNECT_BACKOFF[min(attempt, len(RECONNECT_BACKOFF) - 1)]
+                attempt += 1
+                print(f"[!] Pub/sub connect to {self.host}:{self.port} failed ({e}), retrying in {delay}s")
+                await asyncio.sleep(delay)
+                continue
+            if self._connected.is_set():
+                self.reconnects += 1
+            attempt = 0
+            if self.channels:
+                sub.write(encode_command("SUBSCRIBE", *(self.prefix + c for c in self.channels)))
+            self._pub, self._sub = pub, sub
+            self._connected.set()
+            tasks = [asyncio.create_task(self._receive(sub_reader)), asyncio.create_task(self._drain(pub_reader))]
+            try:
+                done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                reason = next(iter(done)).exception() or "closed by server"
+            finally:
+                self._pub = self._sub = None
+                for task in tasks:
+                    task.cancel()
+                pub.close()
+                sub.close()
+            print(f"[!] Pub/sub connection lost ({reason}), reconnecting")
+
+    async def _drain(self, reader):
+        # PUBLISH replies (the receiver count) aren't needed, only read so they don't pile up
+        while True:
+            try:
+                await read_reply(reader)
+            except RedisError as e:
+                print(f"[!] Pub/sub publish failed: {e}")
+
+    async def _receive(self, reader):
+        while True:
+            reply = await read_reply(reader)
+            # Subscribe/unsubscribe confirmations are ["subscribe", channel, count]
+            if isinstance(reply, list) and reply[0] == b"message":
+                channel = reply[1].decode("utf-8")[len(self.prefix):]
+                self._on_message(channel, json.loads(reply[2]))
+
+    def _on_message(self, channel, envelope):
+        node, seq = envelope["node"], envelope["seq"]
+        if node == self.node_id:
+            return  # delivered locally when it was published
+        self.received += 1
+        key = (node, channel)
+        last = self._last_seq.get(key)
+        if last is not None:
+            if seq <= last:
+                self.duplicates += 1
+                return
+            if seq > last + 1:
+                self.gaps += 1
+                self.missed += seq - last - 1
+                if self.on_gap:
+                    self.on_gap(channel, node, seq - last - 1)
+        self._last_seq[key] = seq
+        if channel in self.channels:
+            self.delivered += 1
+            self.deliver(channel, envelope["message"])
+
+    def subscribe(self, channel):
+        if channel not in self.channels and self._sub is not None:
+            self._sub.write(encode_command("SUBSCRIBE", self.prefix + channel))
+        super().subscribe(channel)
+
+    def unsubscribe(self, channel):
+        if channel in self.channels and self._sub is not None:
+            self._sub.write(encode_command("UNSUBSCRIBE", self.prefix + channel))
+        super().unsubscribe(channel)
+        for key in [key for key in self._last_seq if key[1] == channel]:
+            del self._last_seq[key]
+
+    def publish(self, channel, message):
+        seq = super().publish(channel, message)
+        if self._pub is None or self._pub.transport.get_write_buffer_size() > MAX_PENDING_BYTES:
+            self.unsent += 1  # the other nodes will see the gap
+        else:
+            envelope = json.dumps({"node": self.node_id, "seq": seq, "message": message})
+            self._pub.write(encode_command("PUBLISH", self.prefix + channel, envelope))
+        return seq
+
+    def stats(self):
+        stats = super().stats()
+        stats.update({
+            "server": f"{self.host}:{self.port}",
+            "connected": self.connected,
+            "received": self.received,
+            "duplicates": self.duplicates,
+            "gaps": self.gaps,
+            "missed": self.missed,
+            "unsent": self.unsent,
+            "reconnects": self.reconnects,
+        })
+        return stats
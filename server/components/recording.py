@@ -0,0 +1,121 @@
+import os
+import threading
+import time
+import numpy as np
+import soundfile as sf
+from components.audio_buffer import RingBuffer
+from components.drift import DriftEstimator
+from components.mixer import AudioMixer
+
+MIX_BLOCK_SECONDS = 0.1  # the mix is written in blocks this long
+RING_SECONDS = 10  # how far one source may run ahead of the other before its oldest frames are dropped
+FLUSH_SECONDS = 5  # each WAV is synced to disk this often, so closing it at stop has little left to write
+NORMALIZE_CHUNK_SECONDS = 10  # frames per read of the raw mix during normalization
+PEAK_LEVEL = 0.8  # the mixed file is scaled so its loudest sample hits this
+
+
+class StreamingRecording:
+    """Writes a mic + speaker recording to disk while it is being captured.
+
+    Each source goes straight into its own WAV as chunks arrive, and the two
+    are mixed block by block (the speaker resampled onto the mic clock, as in
+    the live mixer) into a raw float32 file next to the mixed WAV, tracking
+    the peak on the way. finish() only closes the files; the peak
+    normalization into the mixed WAV runs as a chunked pass over the
+    memory-mapped raw mix in a background thread, so stopping takes the same
+    time for a five-minute call as for a three-hour meeting. If the process
+    dies, everything captured so far is already on disk.
+
+    write_mic() and write_speaker() may be called from different threads.
+    The drift correction times the writes, so pass drift=False for sources
+    that aren't captured in real time.
+    """
+
+    def __init__(self, audio_dir, sample_rate, mixed_name="out.wav",
+                 mic_name="microphone_only.wav", speaker_name="speaker_only.wav", drift=True):
+        self.sample_rate = sample_rate
+        self.mixed_path = os.path.join(audio_dir, mixed_name)
+        self.mic_path = os.path.join(audio_dir, mic_name)
+        self.speaker_path = os.path.join(audio_dir, speaker_name)
+        self.raw_path = self.mixed_path + ".part"
+        self._mic_file = sf.SoundFile(self.mic_path, "w", sample_rate, 1)
+        self._speaker_file = sf.SoundFile(self.speaker_path, "w", sample_rate, 1)
+        self._raw_file = open(self.raw_path, "wb")
+        self._mic_ring = RingBuffer(sample_rate * RING_SECONDS, 1)
+        self._speaker_ring = RingBuffer(sample_rate * RING_SECONDS, 1)
+        self._flush_frames = int(sample_rate * FLUSH_SECONDS)
+        self._mixer = AudioMixer(self._mic_ring, self._speaker_ring, int(sample_rate * MIX_BLOCK_SECONDS),
+                                 drift=DriftEstimator(sample_rate) if drift else None, mix=np.add)
+        self._mix_lock = threading.Lock()
+        self.peak = 0.0
+        self.frames_mixed = 0
+        self.finished = False
+        self.normalize_thread = None
+        self.normalize_seconds = None
+
+    def write_mic(self, samples):
+        self._write(samples, self._mic_file, self._mic_ring)
+
+    def write_speaker(self, samples):
+        self._write(samples, self._speaker_file, self._speaker_ring)
+
+    def _write(self, samples, file, ring):
+        samples = np.asarray(samples, dtype=np.float32).reshape(-1, 1)
+        file.write(samples)
+        if file.frames // self._flush_frames != (file.frames - len(samples)) // self._flush_frames:
+            file.flush()
+        ring.write(samples)
+        with self._mix_lock:
+            if self.finished:
+                return
+            while (mixed := self._mixer.mix_ready()) is not None:
+                self._raw_file.write(mixed.tobytes())
+                self.peak = max(self.peak, float(np.max(np.abs(mixed))))
+                self.frames_mixed += len(mixed)
+
+    def finish(self):
+        """Close the files and start normalizing the mix, returns the mixed duration in seconds.
+
+        Call it once the capture threads have stopped writing. Audio one
+        source captured past the end of the other isn't in the mix, as both
+        are cut to the shorter one.
+        """
+        with self._mix_lock:
+            self.finished = True
+            self._raw_file.close()
+        self._mic_file.close()
+        self._speaker_file.close()
+        if not self.frames_mixed:
+            os.remove(self.raw_path)
+            return 0.0
+        self.normalize_thread = threading.Thread(target=self._normalize, name="normalize-mix")
+        self.normalize_thread.start()
+        return self.frames_mixed / self.sample_rate
+
+    def _normalize(self):
+        started = time.perf_counter()
+        raw = np.memmap(self.raw_path, dtype=np.float32, mode="r", shape=(self.frames_mixed,))
+        gain = PEAK_LEVEL / self.peak if self.peak > 0 else 1.0
+        chunk = int(self.sample_rate * NORMALIZE_CHUNK_SECONDS)
+        with sf.SoundFile(self.mixed_path, "w", self.sample_rate, 1) as out:
+            for i in range(0, self.frames_mixed, chunk):
+                out.write(raw[i:i + chunk] * gain)
+        del raw
+        os.remove(self.raw_path)
+        self.normalize_seconds = time.perf_counter() - started
+
+    def wait(self):
+        """Block until the mixed WAV is complete."""
+        if self.normalize_thread:
+            self.normalize_thread.join()
+
+    def stats(self):
+        stats = {
+            "seconds": round(self.frames_mixed / self.sample_rate, 2),
+            "peak": round(self.peak, 4),
+            "mic_overruns": self._mic_ring.overruns,
+            "speaker_overruns": self._speaker_ring.overruns,
+        }
+        if self._mixer.drift is not None:
+            stats.update(self._mixer.drift.stats())
+        return stats
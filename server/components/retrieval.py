@@ -0,0 +1,134 @@
+import math
+import re
+
+import numpy as np
+
+TOKEN_RE = re.compile(r"[a-z0-9']+")
+STOPWORDS = frozenset(
+    "a an and are as at be but by do does did for from had has have he her his how i if in is it its "
+    "me my no not of on or our she so than that the their them then there these they this to too us "
+    "was we were what when where which who why will with you your".split()
+)
+
+
+def tokenize(text):
+    return [t for t in TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+class _Postings:
+    """Passage ids and term frequencies for one term, in growable numpy arrays."""
+
+    __slots__ = ("ids", "tfs", "n")
+
+    def __init__(self):
+        self.ids = np.empty(4, dtype=np.int32)
+        self.tfs = np.empty(4, dtype=np.float32)
+        self.n = 0
+
+    def add(self, passage, count):
+        # Passages only ever grow at the end, so a repeat is always the last entry
+        if self.n and self.ids[self.n - 1] == passage:
+            self.tfs[self.n - 1] += count
+            return
+        if self.n == len(self.ids):
+            self.ids = np.resize(self.ids, 2 * self.n)
+            self.tfs = np.resize(self.tfs, 2 * self.n)
+        self.ids[self.n] = passage
+        self.tfs[self.n] = count
+        self.n += 1
+
+
+class TranscriptIndex:
+    """Incremental BM25 index over the final transcript.
+
+    Consecutive segments are grouped into passages of about `passage_terms`
+    indexed (non-stopword) terms, since a single final is usually too short to
+    answer anything on its own. Adding a segment only touches the postings of
+    its own terms, and a query scores every passage with a few numpy
+    operations per query term, so retrieval stays in the low milliseconds
+    even for a meeting of 100k words.
+    """
+
+    def __init__(self, passage_terms=50, k1=1.5, b=0.75):
+        self.passage_terms = passage_terms
+        self.k1 = k1
+        self.b = b
+        self.postings = {}
+        self.passages = []  # list of segment texts per passage
+        self.times = []  # [start, end] per passage
+        self._lengths = np.zeros(64, dtype=np.float32)
+        self._total_length = 0
+        self.segments = 0
+        self.queries = 0
+
+    def __len__(self):
+        return len(self.passages)
+
+    def add(self, text, start=None, end=None):
+        """Index one final segment."""
+        tokens = tokenize(text)
+        if not self.passages or self._lengths[len(self.passages) - 1] >= self.passage_terms:
+            self.passages.append([])
+            self.times.append([start, end])
+            if len(self.passages) > len(self._lengths):
+                self._lengths = np.concatenate([self._lengths, np.zeros_like(self._lengths)])
+        passage = len(self.passages) - 1
+        self.passages[passage].append(text)
+        if end is not None:
+            self.times[passage][1] = end
+        counts = {}
+        for token in tokens:
+            counts[token] = counts.get(token, 0) + 1
+        for token, count in counts.items():
+            postings = self.postings.get(token)
+            if postings is None:
+                postings = self.postings[token] = _Postings()
+            postings.add(passage, count)
+        self._lengths[passage] += len(tokens)
+        self._total_length += len(tokens)
+        self.segments += 1
+
+    def scores(self, query):
+        """BM25 score of every passage for the query, as a numpy array."""
+        n = len(self.passages)
+        scores = np.zeros(n, dtype=np.float32)
+        if not n:
+            return scores
+        lengths = self._lengths[:n]
+        norm = self.k1 * (1 - self.b + self.b * lengths / max(self._total_length / n, 1.0))
+        for token in set(tokenize(query)):
+            postings = self.postings.get(token)
+            if postings is None:
+                continue
+            ids = postings.ids[:postings.n]
+            tfs = postings.tfs[:postings.n]
+            idf = math.log(1 + (n - postings.n + 0.5) / (postings.n + 0.5))
+            scores[ids] += idf * tfs * (self.k1 + 1) / (tfs + norm[ids])
+        return scores
+
+    def search(self, query, k=5):
+        """Indices of the top-k passages with a positive score, best first."""
+        self.queries += 1
+        scores = self.scores(query)
+        if len(scores) > k:
+            top = np.argpartition(scores, -k)[-k:]
+        else:
+            top = np.arange(len(scores))
+        top = top[np.argsort(-scores[top])]
+        return [int(i) for i in top if scores[i] > 0]
+
+    def passage_text(self, i):
+        return " ".join(self.passages[i])
+
+    def context(self, question, k=5):
+        """The top-k passages for the question joined in meeting order, for an LLM prompt."""
+        hits = sorted(self.search(question, k))
+        return "\n...\n".join(self.passage_text(i) for i in hits)
+
+    def stats(self):
+        return {
+            "segments": self.segments,
+            "passages": len(self.passages),
+            "terms": len(self.postings),
+            "queries": self.queries,
+        }
@@ -0,0 +1,165 @@
+import json
+import os
+import time
+from collections import namedtuple
+import numpy as np
+
+# One session is a directory of append-only files:
+#   meta.json     sample rate and start time
+#   audio.pcm     the mixed meeting audio, mono int16, every block (silence included)
+#   segments.bin  SEGMENT_DTYPE records, record i is transcript segment ID i
+#   text.bin      UTF-8 segment texts, back to back
+#   seconds.bin   int32 per second of audio: the last segment that started before it ended
+# Every lookup is an index into one of them, and the reader memory-maps them all.
+SEGMENT_DTYPE = np.dtype([("start", "<i8"), ("end", "<i8"), ("text_offset", "<i8"),
+                          ("text_length", "<i4"), ("flags", "<i4")])
+PRESENT = 1  # flags bit, unset for IDs the transcriber skipped (finals that came back empty)
+AUDIO_DTYPE = np.dtype("<i2")
+
+ArchivedSegment = namedtuple("ArchivedSegment", "segment_id start end text")
+
+
+class SessionArchiveWriter:
+    """Appends a live session's audio and final transcript segments to disk.
+
+    Segment times are seconds into the archived audio, the capture clock;
+    the transcriber converts Deepgram's stream times with a StreamTimeline
+    (components/timeline.py) before they get here.
+    """
+
+    def __init__(self, path, sample_rate):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.sample_rate = sample_rate
+        with open(os.path.join(path, "meta.json"), "w") as f:
+            json.dump({"sample_rate": sample_rate, "channels": 1, "dtype": AUDIO_DTYPE.str,
+                       "started_at": time.time()}, f)
+        self._audio = open(os.path.join(path, "audio.pcm"), "wb")
+        self._segments = open(os.path.join(path, "segments.bin"), "wb")
+        self._text = open(os.path.join(path, "text.bin"), "wb")
+        self._seconds = open(os.path.join(path, "seconds.bin"), "wb")
+        self.frames = 0
+        self.segment_count = 0
+        self._text_bytes = 0
+        self._seconds_filled = 0
+        self._last_present = -1
+
+    def write_audio(self, block):
+        """Append one mixed (frames, 1) float32 block."""
+        self._audio.write((block.reshape(-1) * 32767).astype(AUDIO_DTYPE).tobytes())
+        self._audio.flush()
+        self.frames += len(block)
+
+    def add_segment(self, segment_id, text, start, end):
+        """Record final segment `segment_id` spoken from `start` to `end` seconds into the audio."""
+        if segment_id < self.segment_count:
+            return  # already archived
+        records = np.zeros(segment_id + 1 - self.segment_count, dtype=SEGMENT_DTYPE)
+        data = text.encode("utf-8")
+        first = int(round(start * self.sample_rate))
+        record = records[-1]
+        record["start"] = first
+        record["end"] = max(int(round(end * self.sample_rate)), first)
+        record["text_offset"] = self._text_bytes
+        record["text_length"] = len(data)
+        record["flags"] = PRESENT
+        self._text.write(data)
+        self._text_bytes += len(data)
+        # The seconds up to the one this segment starts in now have their last segment
+        start_second = first // self.sample_rate
+        if start_second > self._seconds_filled:
+            fill = np.full(start_second - self._seconds_filled, self._last_present, dtype="<i4")
+            self._seconds.write(fill.tobytes())
+            self._seconds_filled = start_second
+        self._segments.write(records.tobytes())
+        self.segment_count = segment_id + 1
+        self._last_present = segment_id
+        for f in (self._text, self._seconds, self._segments):
+            f.flush()
+
+    def close(self):
+        for f in (self._audio, self._segments, self._text, self._seconds):
+            f.close()
+
+    def stats(self):
+        return {
+            "path": self.path,
+            "audio_seconds": round(self.frames / self.sample_rate, 1),
+            "segments": self.segment_count,
+        }
+
+
+def _map(path, dtype):
+    # np.memmap can't map an empty file
+    if os.path.getsize(path) < dtype.itemsize:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", shape=(os.path.getsize(path) // dtype.itemsize,))
+
+
+class SessionArchive:
+    """Read side of a session directory, nothing is loaded until it is touched.
+
+    Audio comes back as int16 views into the memory-mapped PCM, and every
+    lookup (a segment by ID, the segment at a time) is a direct index. It can
+    read a session that is still being written; refresh() maps what was
+    added since.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(os.path.join(path, "meta.json")) as f:
+            self.meta = json.load(f)
+        self.sample_rate = self.meta["sample_rate"]
+        self.refresh()
+
+    def refresh(self):
+        self._audio = _map(os.path.join(self.path, "audio.pcm"), AUDIO_DTYPE)
+        self._segments = _map(os.path.join(self.path, "segments.bin"), SEGMENT_DTYPE)
+        self._text = _map(os.path.join(self.path, "text.bin"), np.dtype("u1"))
+        self._seconds = _map(os.path.join(self.path, "seconds.bin"), np.dtype("<i4"))
+
+    def __len__(self):
+        return len(self._segments)
+
+    @property
+    def duration(self):
+        return len(self._audio) / self.sample_rate
+
+    def audio(self, start=0.0, end=None):
+        """int16 view of the audio between `start` and `end` seconds."""
+        first = max(int(start * self.sample_rate), 0)
+        last = len(self._audio) if end is None else int(end * self.sample_rate)
+        return self._audio[first:last]
+
+    def segment(self, segment_id):
+        """The archived segment with this ID, or None if it was empty or isn't written yet."""
+        if not 0 <= segment_id < len(self._segments):
+            return None
+        record = self._segments[segment_id]
+        if not record["flags"] & PRESENT:
+            return None
+        offset, length = int(record["text_offset"]), int(record["text_length"])
+        text = self._text[offset:offset + length].tobytes().decode("utf-8")
+        return ArchivedSegment(segment_id, int(record["start"]) / self.sample_rate,
+                               int(record["end"]) / self.sample_rate, text)
+
+    def segment_audio(self, segment_id):
+        """int16 view of the audio a segment was transcribed from."""
+        if not 0 <= segment_id < len(self._segments):
+            return None
+        record = self._segments[segment_id]
+        return self._audio[int(record["start"]):int(record["end"])]
+
+    def segment_at(self, seconds):
+        """The last segment that started at or before `seconds` into the session, or None."""
+        second = int(seconds)
+        segment_id = int(self._seconds[second]) if 0 <= second < len(self._seconds) else len(self._segments) - 1
+        # Step back over segments that started later within the same second (or are still
+        # past the seconds table), and over skipped IDs
+        frame = seconds * self.sample_rate
+        while segment_id >= 0:
+            record = self._segments[segment_id]
+            if record["flags"] & PRESENT and record["start"] <= frame:
+                return self.segment(segment_id)
+            segment_id -= 1
+        return None
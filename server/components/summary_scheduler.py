@@ -0,0 +1,78 @@
+import time
+from collections import deque
+
+
+class SummaryScheduler:
+    """Decides when the meeting summary is worth refreshing.
+
+    A summary runs once at least `min_new_chars` of new final transcript have
+    come in, or earlier (from `pause_min_chars`) when the speaker finishes an
+    utterance or goes quiet for `pause_seconds`. Runs are never closer than
+    `min_interval` seconds, and the LLM calls they make never exceed
+    `max_calls_per_hour` in any rolling hour, which keeps the LLM load of a
+    session predictable. A run can make several calls (new chunks, their
+    merges, the tail), so the caller says how many it will make and the run
+    waits until they all fit the budget.
+    """
+
+    def __init__(self, min_new_chars=1500, pause_min_chars=300, min_interval=30.0,
+                 pause_seconds=8.0, max_calls_per_hour=90, clock=time.monotonic):
+        self.min_new_chars = min_new_chars
+        self.pause_min_chars = pause_min_chars
+        self.min_interval = min_interval
+        self.pause_seconds = pause_seconds
+        self.max_calls_per_hour = max_calls_per_hour
+        self.clock = clock
+        self.pending_chars = 0
+        self.last_run = None
+        self.last_content = None
+        self._calls = deque()  # one entry per LLM call budgeted within the last hour, its run's start time
+        self.runs = 0
+        self.calls = 0
+
+    def add(self, chars):
+        """Record new final transcript text."""
+        self.pending_chars += chars
+        self.last_content = self.clock()
+
+    def next_eligible(self, calls=1):
+        """Earliest time (on self.clock) a run making `calls` LLM calls is allowed."""
+        now = self.clock()
+        while self._calls and self._calls[0] <= now - 3600:
+            self._calls.popleft()
+        eligible = now
+        if self.last_run is not None:
+            eligible = max(eligible, self.last_run + self.min_interval)
+        # A run bigger than the whole budget waits for an empty hour
+        excess = len(self._calls) + min(calls, self.max_calls_per_hour) - self.max_calls_per_hour
+        if excess > 0:
+            eligible = max(eligible, self._calls[excess - 1] + 3600)
+        return eligible
+
+    def should_run(self, utterance_end=False, calls=1):
+        """True if a summary making `calls` LLM calls should start now; the caller then runs it and calls mark_run()."""
+        if self.pending_chars < self.pause_min_chars:
+            return False
+        now = self.clock()
+        paused = self.last_content is not None and now - self.last_content >= self.pause_seconds
+        if self.pending_chars < self.min_new_chars and not (utterance_end or paused):
+            return False
+        return now >= self.next_eligible(calls)
+
+    def mark_run(self, calls=1):
+        now = self.clock()
+        self.last_run = now
+        self._calls.extend([now] * calls)
+        self.runs += 1
+        self.calls += calls
+        self.pending_chars = 0
+
+    def metrics(self):
+        now = self.clock()
+        return {
+            "pending_chars": self.pending_chars,
+            "next_eligible_in": round(max(0.0, self.next_eligible() - now), 1),
+            "runs": self.runs,
+            "calls": self.calls,
+            "calls_last_hour": len(self._calls),
+        }
@@ -0,0 +1,44 @@
+from bisect import bisect_left, bisect_right
+
+
+class StreamTimeline:
+    """Maps times on the stream Deepgram hears onto the capture clock.
+
+    The voice gate holds silence back, so the stream Deepgram gets (and times
+    its results on) is shorter than the audio captured. Each time the two
+    diverge, map() records where the stream picks up in the captured audio;
+    to_capture() turns a stream time into seconds since capture started,
+    the clock of the archived audio and of meeting time.
+    """
+
+    def __init__(self, sample_rate):
+        self.sample_rate = sample_rate
+        # Breakpoints where the stream timeline jumps ahead on the capture clock
+        self._stream_frames = []
+        self._capture_frames = []
+
+    def map(self, stream_frame, capture_frame):
+        """Stream frame `stream_frame` is capture frame `capture_frame` (and so on from there)."""
+        if self._stream_frames and capture_frame - stream_frame == self._capture_frames[-1] - self._stream_frames[-1]:
+            return
+        self._stream_frames.append(stream_frame)
+        self._capture_frames.append(capture_frame)
+
+    def to_capture_frame(self, seconds, end=False):
+        frame = int(round(seconds * self.sample_rate))
+        # An end time at a break is the end of the audio before it: a segment Finalize
+        # cut when the gate closed ends exactly where the next burst of speech starts
+        i = (bisect_left if end else bisect_right)(self._stream_frames, frame) - 1
+        if i < 0:
+            return frame
+        return self._capture_frames[i] + frame - self._stream_frames[i]
+
+    def to_capture(self, seconds, end=False):
+        """Stream time in seconds to capture time in seconds; None stays None."""
+        if seconds is None:
+            return None
+        return self.to_capture_frame(seconds, end) / self.sample_rate
+
+    @property
+    def breaks(self):
+        return len(self._stream_frames)
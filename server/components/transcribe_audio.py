@@ -1,49 +1,121 @@
 import os
 import asyncio
-import json
-import websockets
-import sounddevice as sd
-import numpy as np
+import itertools
+import time
+import threading
+from urllib.parse import urlencode
+try:
+    import sounddevice as sd
+except (ImportError, OSError):
+    sd = None  # no PortAudio on this machine, only --file mode can run
+import soundfile as sf
 from dotenv import load_dotenv
-import cohere  # pip install cohere
-from transcript_ai import TranscriptAI
 import sys
-import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from transcript_ai import TranscriptAI
+from components.audio_buffer import RingBuffer
+from components.mixer import AudioMixer
+from components.drift import DriftEstimator
+from components.vad import VoiceGate
+from components.uplink_encoder import UplinkEncoder
+from components.deepgram_link import DeepgramLink, KEEPALIVE_SECONDS
+from components.session_archive import SessionArchiveWriter
+from components.timeline import StreamTimeline
+from components.ipc import MessageWriter, read_messages
+from components.summary_scheduler import SummaryScheduler
 from main import broadcast_transcript, broadcast_summary
 
+# In ws-mode stdout carries framed messages to the server, human-readable logs go to stderr
+ipc = None
+if '--ws-mode' in sys.argv:
+    ipc = MessageWriter(sys.stdout.buffer)
+    sys.stdout = sys.stderr
+
 print(f"[TRANSCRIBE_AUDIO] Script started with args: {sys.argv}")
 
 # Load environment variables from .env file
 load_dotenv()
 
 DEEPGRAM_API_KEY = os.getenv("DEEPGRAM_API_KEY")
-DEEPGRAM_URL = "wss://api.deepgram.com/v1/listen"
+DEEPGRAM_URL = os.getenv("DEEPGRAM_URL", "wss://api.deepgram.com/v1/listen")
+# linear16 (raw PCM), flac or opus (Ogg Opus, 8/12/16/24/48 kHz only)
+UPLINK_ENCODING = os.getenv("UPLINK_ENCODING", "linear16")
 
 SAMPLE_RATE = 16000
 CHANNELS = 1
+BLOCK_SIZE = 2048
+RING_SECONDS = 2  # how much audio each source can buffer before frames are dropped
+MIX_DEADLINE_BLOCKS = 2  # mix a lone source after this many block durations, None waits for both
+VAD_ENABLED = True  # hold back silence instead of streaming it to Deepgram
+METRICS_SECONDS = 10  # how often audio pipeline stats are reported to the server
+# Each live session's audio and transcript index go in a directory here, see session_archive.py
+ARCHIVE_DIR = os.getenv("SESSION_ARCHIVE_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "sessions"))
+FILE_BLOCK_SIZE = 8192  # frames per block read from a WAV in --file mode
+FILE_JOBS = 2  # files transcribed at once in --file mode, override with --jobs N
+FILE_DRAIN_SECONDS = 30  # how long to wait for Deepgram's last results after a file is sent
 
 queue = asyncio.Queue(maxsize=10)
 main_loop = None  # Will be set in __main__
 main_server_loop = None
+start_event = asyncio.Event()  # set when a parked (--standby) transcriber is handed a session
 
-# Shared buffers for mic and speaker
-mic_buffer = None
-speaker_buffer = None
+# Ring buffers for mic and speaker, allocated in send_audio once the sample rate is known
+mic_ring = None
+speaker_ring = None
+mixer = None
+gate = None
+archive = None
+timeline = None  # Deepgram's stream times -> capture time, see timeline.py
 
 # Callback for microphone
 def mic_callback(indata, frames, time, status):
-    global mic_buffer
     if status:
         print(f"⚠️ Mic stream status: {status}")
-    mic_buffer = indata.copy()
+    mic_ring.write(indata)
+    mixer.notify()
 
 # Callback for speaker (loopback)
 def speaker_callback(indata, frames, time, status):
-    global speaker_buffer
     if status:
         print(f"⚠️ Speaker stream status: {status}")
-    speaker_buffer = indata.copy()
+    speaker_ring.write(indata)
+    mixer.notify()
+
+async def publish_transcript(segment_id, transcript, is_final, speech_final=False, start=None, end=None):
+    if ipc:
+        ipc.send("transcript", segment_id=segment_id, text=transcript, is_final=is_final,
+                 speech_final=speech_final, start=start, end=end)
+    elif main_server_loop:
+        asyncio.run_coroutine_threadsafe(
+            broadcast_transcript(transcript, segment_id, is_final, speech_final), main_server_loop
+        )
+    else:
+        await broadcast_transcript(transcript, segment_id, is_final, speech_final)
+
+async def publish_summary(summary):
+    if ipc:
+        ipc.send("summary", text=summary)
+    elif main_server_loop:
+        asyncio.run_coroutine_threadsafe(broadcast_summary(summary), main_server_loop)
+
+def publish_metrics(link):
+    metrics = {"rings": ring_stats(), "mixer": mixer.stats(), "uplink": link.encoder.stats(), "link": link.stats()}
+    if gate:
+        metrics["gate"] = gate.stats()
+    if archive:
+        metrics["archive"] = archive.stats()
+    if timeline:
+        metrics["timeline"] = {"breaks": timeline.breaks}
+    if ipc:
+        ipc.send("metrics", source="audio", **metrics)
+    else:
+        print(f"[AUDIO] Metrics: {metrics}")
+
+def ring_stats():
+    return {
+        "mic": mic_ring.stats() if mic_ring else None,
+        "speaker": speaker_ring.stats() if speaker_ring else None,
+    }
 
 def get_loopback_device():
     # Find the hostapi index for Windows WASAPI
@@ -83,42 +155,59 @@ def list_audio_devices():
     print()
 
 async def audio_mixer():
-    global mic_buffer, speaker_buffer
     while True:
-        # Wait until both buffers have data
-        while mic_buffer is None or speaker_buffer is None:
-            await asyncio.sleep(0.005)
-        # Mix both sources (simple sum, then normalize)
-        mixed = mic_buffer + speaker_buffer
-        # Debug: print max amplitude to check if audio is being captured
-        print(f"[DEBUG] Mixed audio max amplitude: {np.max(np.abs(mixed)):.4f}")
-        # Normalize to prevent clipping
-        max_val = np.max(np.abs(mixed))
-        if max_val > 1.0:
-            mixed = mixed / max_val
+        # Woken by the capture callbacks once a block is ready
+        mixed = await mixer.next_block()
         await queue.put(mixed)
-        mic_buffer = None
-        speaker_buffer = None
 
-async def send_audio(ws, sample_rate):
+async def send_audio(link, sample_rate, mic_device, speaker_device):
+    # The devices were picked by main(), before a standby transcriber parked
+    global mic_ring, speaker_ring, mixer, gate, archive, timeline
     print("Streaming mic+speaker audio to Deepgram...")
-    list_audio_devices()  # Print devices for user reference
-    mic_device = sd.default.device[0]  # Default input device index
-    try:
-        speaker_device = get_loopback_device()  # Dynamically get loopback device
-    except Exception as e:
-        print(f"[ERROR] Could not find loopback device: {e}")
-        return
     print(f"Using mic device index: {mic_device}")
     print(f"Using speaker device index: {speaker_device}")
     print(f"Using sample rate: {sample_rate}")
-    with sd.InputStream(callback=mic_callback, channels=CHANNELS, samplerate=sample_rate, dtype='float32', device=mic_device, blocksize=2048) as mic_stream, \
-         sd.InputStream(callback=speaker_callback, channels=CHANNELS, samplerate=sample_rate, dtype='float32', device=speaker_device, blocksize=2048) as speaker_stream:
+    mic_ring = RingBuffer(sample_rate * RING_SECONDS, CHANNELS)
+    speaker_ring = RingBuffer(sample_rate * RING_SECONDS, CHANNELS)
+    deadline = MIX_DEADLINE_BLOCKS * BLOCK_SIZE / sample_rate if MIX_DEADLINE_BLOCKS else None
+    # The loopback device runs on its own clock, resample it onto the mic clock
+    drift = DriftEstimator(sample_rate)
+    mixer = AudioMixer(mic_ring, speaker_ring, BLOCK_SIZE, loop=asyncio.get_running_loop(), deadline=deadline, drift=drift)
+    archive = SessionArchiveWriter(os.path.join(ARCHIVE_DIR, time.strftime("%Y%m%d-%H%M%S")), sample_rate)
+    timeline = StreamTimeline(sample_rate)
+    print(f"Archiving the session to {archive.path}")
+    with sd.InputStream(callback=mic_callback, channels=CHANNELS, samplerate=sample_rate, dtype='float32', device=mic_device, blocksize=BLOCK_SIZE) as mic_stream, \
+         sd.InputStream(callback=speaker_callback, channels=CHANNELS, samplerate=sample_rate, dtype='float32', device=speaker_device, blocksize=BLOCK_SIZE) as speaker_stream:
         mixer_task = asyncio.create_task(audio_mixer())
-        while True:
-            data = await queue.get()
-            audio_data = (data * 32767).astype(np.int16).tobytes()
-            await ws.send(audio_data)
+        gate = VoiceGate(sample_rate, BLOCK_SIZE) if VAD_ENABLED else None
+        loop = asyncio.get_running_loop()
+        last_sent = last_metrics = loop.time()
+        try:
+            while True:
+                data = await queue.get()
+                archive.write_audio(data)
+                blocks = gate.process(data) if gate else [data]
+                if blocks:
+                    # The blocks going out are the newest captured ones, held-back preroll first
+                    timeline.map(link.frames_sent, archive.frames - sum(len(b) for b in blocks))
+                for block in blocks:
+                    if await link.send_block(block):
+                        last_sent = loop.time()
+                if gate and gate.ended:
+                    # Speech just stopped: send the end of it a FLAC/Opus encoder still holds,
+                    # then flush Deepgram's pending hypothesis to a final
+                    await link.flush()
+                    await link.send_control("Finalize")
+                elif not blocks and loop.time() - last_sent >= KEEPALIVE_SECONDS:
+                    await link.send_control("KeepAlive")
+                    last_sent = loop.time()
+                if loop.time() - last_metrics >= METRICS_SECONDS:
+                    publish_metrics(link)
+                    last_metrics = loop.time()
+        finally:
+            mixer_task.cancel()
+            publish_metrics(link)
+            archive.close()
 
 def find_common_samplerate(mic_device, speaker_device, rates=(16000, 44100, 48000)):
     mic_supported = set()
@@ -140,37 +229,118 @@ def find_common_samplerate(mic_device, speaker_device, rates=(16000, 44100, 4800
     # Prefer higher rates
     return max(common)
 
-COHERE_API_KEY = os.getenv("COHERE_API_KEY")
 ai = TranscriptAI()
+summary_scheduler = SummaryScheduler()
+
+def maybe_summarize(utterance_end=False):
+    # Checked only with no run in flight, right before the next one starts, so the
+    # calls budgeted are the calls it makes; the ticker catches up once it finishes
+    if ai.summary_running:
+        return
+    calls = ai.summary_calls()
+    if summary_scheduler.should_run(utterance_end=utterance_end, calls=calls):
+        summary_scheduler.mark_run(calls)
+        # Runs off the loop, so the uplink keeps streaming during the LLM call
+        ai.request_summary(publish_summary)
 
-async def receive_transcripts(ws):
-    last_transcript = ""
-    async for message in ws:
-        msg_json = json.loads(message)
+async def summary_ticker():
+    # Catches pauses (no new finals) and runs the hourly cap or interval held back
+    last_metrics = 0.0
+    loop = asyncio.get_running_loop()
+    while True:
+        await asyncio.sleep(1)
+        maybe_summarize()
+        if loop.time() - last_metrics >= METRICS_SECONDS:
+            last_metrics = loop.time()
+            metrics = summary_scheduler.metrics()
+            metrics["llm"] = ai.llm.stats()
+            if ipc:
+                ipc.send("metrics", source="summary", **metrics)
+
+async def receive_transcripts(link, transcript_ai=None, segment_ids=None):
+    # Deepgram sends interim hypotheses for the audio it is still working on and then
+    # one is_final result for it. Each such segment gets a stable ID: interims update
+    # it in place on the clients, the final commits it. The link keeps this going
+    # across reconnects, with audio already transcribed trimmed from the replay.
+    # Files transcribed side by side share `segment_ids` so their IDs don't collide.
+    # Live times go out on the capture clock: Deepgram's leave out what the gate held back.
+    transcript_ai = transcript_ai or ai
+    segment_ids = segment_ids or itertools.count()
+    segment_id = next(segment_ids)
+    last_interim = ""
+    async for msg_json in link.results():
+        if msg_json.get("type", "Results") != "Results":
+            continue
         transcript = msg_json.get("channel", {}).get("alternatives", [{}])[0].get("transcript", "")
-        if transcript and transcript != last_transcript:
+        is_final = msg_json.get("is_final", False)
+        speech_final = msg_json.get("speech_final", False)
+        start = msg_json.get("start", 0.0)
+        end = start + msg_json.get("duration", 0.0)
+        if timeline and transcript_ai is ai:
+            start, end = timeline.to_capture(start), timeline.to_capture(end, end=True)
+        if not is_final:
+            if transcript and transcript != last_interim:
+                last_interim = transcript
+                await publish_transcript(segment_id, transcript, False, start=start, end=end)
+            continue
+        if not transcript and not last_interim:
+            continue
+        # An empty final after interims tells the clients to drop the segment's line
+        await publish_transcript(segment_id, transcript, True, speech_final, start, end)
+        if transcript and archive and transcript_ai is ai:
+            archive.add_segment(segment_id, transcript, start, end)
+        segment_id = next(segment_ids)
+        last_interim = ""
+        if transcript:
             print(f"Transcript: {transcript}")
-            ai.add_transcript(transcript)
-            last_transcript = transcript
-            # Optionally, auto-summarize every time transcript grows by 500 chars
-            if len(ai.full_transcript) % 500 < len(transcript):
-                summary = await ai.summarize()
-                if summary and main_server_loop:
-                    asyncio.run_coroutine_threadsafe(
-                        broadcast_summary(summary),
-                        main_server_loop
-                    )
-            # Broadcast to frontend
-            if main_server_loop:
-                asyncio.run_coroutine_threadsafe(
-                    broadcast_transcript(transcript),
-                    main_server_loop
-                )
-            else:
-                await broadcast_transcript(transcript)
-
-async def main():
-    mic_device = sd.default.device[0]
+            transcript_ai.add_transcript(transcript, start, end)
+            if transcript_ai is ai:
+                summary_scheduler.add(len(transcript))
+                maybe_summarize(utterance_end=speech_final)
+
+def listen_for_commands(loop):
+    # Runs in a thread, reads framed commands the server writes to our stdin
+    for msg in read_messages(sys.stdin.buffer):
+        if msg.get("type") == "start":
+            loop.call_soon_threadsafe(start_event.set)
+    if not start_event.is_set():
+        # The server went away before handing us a session, nothing to clean up
+        os._exit(0)
+
+async def wait_for_start(link):
+    # Parked: keep the Deepgram socket alive until the server says start
+    while not start_event.is_set():
+        try:
+            await asyncio.wait_for(start_event.wait(), KEEPALIVE_SECONDS)
+        except asyncio.TimeoutError:
+            await link.send_control("KeepAlive")
+
+def make_link(sample_rate, spare=True, connect=None):
+    """DeepgramLink for mono audio at `sample_rate`; `connect(url)` replaces websockets.connect."""
+    headers = {
+        "Authorization": f"Token {DEEPGRAM_API_KEY}",
+        "Content-Type": "application/json"
+    }
+    encoding = UPLINK_ENCODING
+    try:
+        encoder = UplinkEncoder(encoding, sample_rate, CHANNELS)
+    except ValueError as e:
+        print(f"[ERROR] {e}, falling back to linear16")
+        encoding = "linear16"
+        encoder = UplinkEncoder(encoding, sample_rate, CHANNELS)
+    params = {**encoder.url_params(), "punctuate": "true", "interim_results": "true"}
+    url = f"{DEEPGRAM_URL}?{urlencode(params)}"
+    # Keeps a spare socket and the last few seconds of audio, so a dropped
+    # connection is replaced without a gap in the transcript
+    return DeepgramLink(url, headers, lambda: UplinkEncoder(encoding, sample_rate, CHANNELS), sample_rate,
+                        connect=connect and (lambda: connect(url)), spare=spare)
+
+async def main(standby=False):
+    if sd is None:
+        print("[ERROR] sounddevice (PortAudio) is not available, live capture needs it; --file mode doesn't")
+        return
+    list_audio_devices()  # Print devices for user reference
+    mic_device = sd.default.device[0]  # Default input device index
     try:
         speaker_device = get_loopback_device()
     except Exception as e:
@@ -181,29 +351,107 @@ async def main():
     except Exception as e:
         print(f"[ERROR] Could not find a common supported sample rate: {e}")
         return
-    headers = {
-        "Authorization": f"Token {DEEPGRAM_API_KEY}",
-        "Content-Type": "application/json"
+    if standby:
+        threading.Thread(target=listen_for_commands, args=(asyncio.get_running_loop(),), daemon=True).start()
+    # A parked standby holds one socket; the spare is only worth its keepalives once audio flows
+    link = make_link(sample_rate, spare=not standby)
+    try:
+        await link.open()
+    except Exception as e:
+        print(f"[ERROR] Could not connect to Deepgram: {e}")
+        return
+    try:
+        if standby and not start_event.is_set():
+            print("[STANDBY] Transcriber ready, waiting for start")
+            ipc.send("ready")
+            await wait_for_start(link)
+        link.start_spare()
+        send_task = asyncio.create_task(send_audio(link, sample_rate, mic_device, speaker_device))
+        receive_task = asyncio.create_task(receive_transcripts(link))
+        ticker_task = asyncio.create_task(summary_ticker())
+        await asyncio.gather(send_task, receive_task, ticker_task)
+    finally:
+        await link.close()
+
+async def transcribe_file(path, segment_ids, connect=None):
+    # Streams the WAV block by block as fast as the socket takes it (websockets
+    # applies backpressure once its write buffer is full), then CloseStream
+    # makes Deepgram flush the last results and close
+    transcript_ai = TranscriptAI()
+    started = time.perf_counter()
+    with sf.SoundFile(path) as f:
+        duration = f.frames / f.samplerate
+        link = make_link(f.samplerate, spare=False, connect=connect)
+        await link.open()
+        try:
+            receive_task = asyncio.create_task(receive_transcripts(link, transcript_ai, segment_ids))
+            for block in f.blocks(blocksize=FILE_BLOCK_SIZE, dtype='float32', always_2d=True):
+                # Down to mono, the same uplink as live capture
+                await link.send_block(block.mean(axis=1, keepdims=True) if block.shape[1] > 1 else block)
+            await link.finish()
+            await asyncio.wait_for(receive_task, FILE_DRAIN_SECONDS)
+        finally:
+            await link.close()
+    elapsed = time.perf_counter() - started
+    stats = {
+        "file": os.path.basename(path),
+        "audio_seconds": round(duration, 2),
+        "elapsed_seconds": round(elapsed, 2),
+        "realtime_factor": round(elapsed / duration, 4) if duration else None,
+        "segments": len(transcript_ai.store),
     }
-    url = f"{DEEPGRAM_URL}?encoding=linear16&sample_rate={sample_rate}&channels={CHANNELS}&punctuate=true&interim_results=true"
-    async with websockets.connect(url, extra_headers=headers) as ws:
-        send_task = asyncio.create_task(send_audio(ws, sample_rate))
-        receive_task = asyncio.create_task(receive_transcripts(ws))
-        await asyncio.gather(send_task, receive_task)
+    print(f"[FILE] {stats['file']}: {duration:.1f}s of audio in {elapsed:.2f}s, "
+          f"realtime factor {stats['realtime_factor']} ({duration / elapsed:.1f}x realtime)")
+    if ipc:
+        ipc.send("metrics", source="file", **stats)
+    return transcript_ai, stats
+
+async def transcribe_files(paths, jobs=FILE_JOBS, connect=None):
+    """Transcribe WAVs with at most `jobs` in flight, returns {path: stats}; each file gets its own summary."""
+    semaphore = asyncio.Semaphore(jobs)
+    segment_ids = itertools.count()
+    results = {}
+
+    async def run(path):
+        async with semaphore:
+            try:
+                transcript_ai, stats = await transcribe_file(path, segment_ids, connect)
+            except Exception as e:
+                print(f"[ERROR] Could not transcribe {path}: {e}")
+                return
+        results[path] = stats
+        summary = await transcript_ai.summarize()
+        if summary:
+            await publish_summary(f"{stats['file']}: {summary}")
+
+    await asyncio.gather(*(run(path) for path in paths))
+    return results
+
+def file_args(argv):
+    # --file a.wav b.wav ... [--jobs N], the list ends at the next option
+    paths = list(itertools.takewhile(lambda a: not a.startswith("--"), argv[argv.index("--file") + 1:]))
+    jobs = int(argv[argv.index("--jobs") + 1]) if "--jobs" in argv else FILE_JOBS
+    return paths, jobs
 
 if __name__ == "__main__":
-    import threading
     from main import run_ws_server
+    if '--file' in sys.argv:
+        # Reprocess recordings instead of capturing. With --ws-mode (the server's "file"
+        # command) results go to the session's viewers over IPC, without it to the console.
+        paths, jobs = file_args(sys.argv)
+        asyncio.run(transcribe_files(paths, jobs))
+        sys.exit(0)
     if '--ws-mode' in sys.argv:
         # If started in ws-mode, only run the transcription logic (no server)
-        import asyncio
         # Instead of getting the event loop here, get it from the parent process if possible
         # For now, fallback to the current event loop
         main_server_loop = None  # Do not set to get_event_loop here!
         main_loop = asyncio.new_event_loop()
         asyncio.set_event_loop(main_loop)
-        main_loop.run_until_complete(main())
-        asyncio.run(ai.summarize())
+        main_loop.run_until_complete(main(standby='--standby' in sys.argv))
+        summary = asyncio.run(ai.summarize())
+        if summary:
+            ipc.send("summary", text=summary)
         sys.exit(0)
     # Start websocket server in a background thread
     ws_thread = threading.Thread(target=lambda: asyncio.run(run_ws_server()), daemon=True)
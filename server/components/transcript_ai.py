@@ -1,44 +1,145 @@
 import os
-import cohere
 from dotenv import load_dotenv
 import asyncio
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from components.transcript_store import TranscriptStore
+from components.retrieval import TranscriptIndex
+from components.llm_gateway import LLMGateway, get_gateway
 
 # Load environment variables from .env file
 load_dotenv()
 
-COHERE_API_KEY = os.getenv("COHERE_API_KEY")
+MIN_SUMMARY_CHARS = 250  # Cohere summarize rejects shorter input
+CHUNK_CHARS = 4000  # transcript is summarized in chunks of about this size, once each
+QUESTION_PASSAGES = 5  # transcript passages retrieved into a question's prompt
 
 class TranscriptAI:
-    def __init__(self):
-        self.full_transcript = ""
-        self.cohere_client = cohere.Client(COHERE_API_KEY)
+    def __init__(self, client=None, chunk_chars=CHUNK_CHARS):
+        self.store = TranscriptStore()
+        self.index = TranscriptIndex()
+        # A client (cohere.Client or anything shaped like it) gets its own gateway,
+        # otherwise calls share the process-wide one
+        self.llm = LLMGateway(client) if client is not None else get_gateway()
+        self.chunk_chars = chunk_chars
+        # Incremental summarization state: chunk summaries are computed once and
+        # folded into rolling_summary, only the text after summarized_upto is new
+        self.chunk_summaries = []
+        self.rolling_summary = ""
+        self.summarized_upto = 0
+        # Single-flight background summaries, see request_summary()
+        self._summary_task = None
+        self._summary_pending = False
+        self.summaries_run = 0
+        self.summaries_coalesced = 0
+        self.summary_llm_calls = 0
 
-    def add_transcript(self, text):
-        self.full_transcript += " " + text
+    @property
+    def full_transcript(self):
+        # Read-only view of the segment store, joined on demand
+        return self.store.text()
+
+    def add_transcript(self, text, start=None, end=None, source="mixed"):
+        self.store.append(text, start, end, source)
+        self.index.add(text, start, end)
+
+    async def _summarize_text_async(self, text, length="medium"):
+        text = text.strip()
+        if len(text) < MIN_SUMMARY_CHARS:
+            return text
+        self.summary_llm_calls += 1
+        return await self.llm.summarize(text, length)
+
+    def _next_chunk_end(self, start, upto):
+        # End of the next complete chunk, cut after a sentence (or at least a word) if possible
+        if upto - start < self.chunk_chars:
+            return None
+        limit = start + self.chunk_chars
+        window = self.store.text(start, limit)
+        cut = max(window.rfind(". "), window.rfind("? "), window.rfind("! "))
+        if cut < self.chunk_chars // 2:
+            cut = window.rfind(" ")
+        return start + cut + 1 if cut > 0 else limit
+
+    def summary_calls(self):
+        """Most LLM calls summarize() would make now: each new chunk and its merge, then the tail."""
+        upto = self.store.char_count
+        if upto <= MIN_SUMMARY_CHARS:
+            return 0
+        calls = 0
+        merged = bool(self.rolling_summary)
+        start = self.summarized_upto
+        end = self._next_chunk_end(start, upto)
+        while end is not None:
+            calls += 2 if merged else 1
+            merged = True
+            start = end
+            end = self._next_chunk_end(start, upto)
+        return calls + (1 if upto > start else 0)
+
+    @property
+    def summary_running(self):
+        return self._summary_task is not None and not self._summary_task.done()
 
     async def summarize(self, length="medium"):
-        if len(self.full_transcript.strip()) < 250:
+        # Covers the transcript as of the call: text arriving during the LLM calls waits for
+        # the next run, so a run makes no more calls than summary_calls() said
+        upto = self.store.char_count
+        if upto <= MIN_SUMMARY_CHARS:  # joined text has a leading space
             print("\n[!] Transcript must be at least 250 characters for summarization.\n")
             return None
-        response = self.cohere_client.summarize(
-            text=self.full_transcript,
-            model="summarize-xlarge",
-            length=length,
-            format="paragraph"
-        )
-        summary = response.summary
+        # Fold every newly completed chunk into the rolling summary, once
+        end = self._next_chunk_end(self.summarized_upto, upto)
+        while end is not None:
+            chunk_summary = await self._summarize_text_async(self.store.text(self.summarized_upto, end), length)
+            self.chunk_summaries.append(chunk_summary)
+            if self.rolling_summary:
+                self.rolling_summary = await self._summarize_text_async(self.rolling_summary + "\n\n" + chunk_summary, length)
+            else:
+                self.rolling_summary = chunk_summary
+            self.summarized_upto = end
+            end = self._next_chunk_end(self.summarized_upto, upto)
+        # The tail that doesn't fill a chunk yet is merged fresh each time
+        tail = self.store.text(self.summarized_upto, upto).strip()
+        if not tail:
+            summary = self.rolling_summary
+        elif self.rolling_summary:
+            summary = await self._summarize_text_async(self.rolling_summary + "\n\n" + tail, length)
+        else:
+            summary = await self._summarize_text_async(tail, length)
         print("\n=== SUMMARY ===\n" + summary + "\n================\n")
         return summary
 
+    def request_summary(self, on_summary, length="medium"):
+        """Summarize in the background and pass the result to the on_summary coroutine.
+
+        Only one summary runs at a time. Requests that arrive while one is in
+        flight coalesce into a single follow-up run once it finishes.
+        """
+        if self.summary_running:
+            self._summary_pending = True
+            self.summaries_coalesced += 1
+            return
+        self._summary_task = asyncio.create_task(self._run_summaries(on_summary, length))
+
+    async def _run_summaries(self, on_summary, length):
+        while True:
+            self._summary_pending = False
+            try:
+                summary = await self.summarize(length)
+                self.summaries_run += 1
+                if summary:
+                    await on_summary(summary)
+            except Exception as e:
+                print(f"[!] Summarization failed: {e}")
+            if not self._summary_pending:
+                return
+
     async def ask_question(self, question):
-        prompt = f"Transcript: {self.full_transcript}\n\nQuestion: {question}\nAnswer:"
-        response = self.cohere_client.generate(
-            model="command-r-plus",
-            prompt=prompt,
-            max_tokens=100,
-            temperature=0.3
-        )
-        answer = response.generations[0].text.strip()
+        # Only the passages relevant to the question, the whole meeting would overflow the model
+        excerpts = self.index.context(question, QUESTION_PASSAGES)
+        prompt = f"Transcript excerpts: {excerpts}\n\nQuestion: {question}\nAnswer:"
+        answer = await self.llm.generate(prompt, max_tokens=100, temperature=0.3)
         print("\n=== ANSWER ===\n" + answer + "\n==============\n")
         return answer
 
@@ -0,0 +1,79 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import namedtuple
+
+SOURCES = ("mixed", "mic", "speaker")
+
+Segment = namedtuple("Segment", "index start end source text")
+
+
+class TranscriptStore:
+    """Append-only store of final transcript segments.
+
+    Timing, source and text offsets live in array columns and the text in a
+    list of segment strings, so appending is O(1) no matter how long the
+    meeting gets. The full text, " seg0 seg1 ...", the same layout the old
+    `full_transcript += " " + text` produced, is only joined when somebody
+    reads it, and character offsets into it stay valid as segments are added.
+    """
+
+    def __init__(self):
+        self._starts = array("d")
+        self._ends = array("d")
+        self._sources = array("b")
+        self._offsets = array("q")  # where each segment's text starts in the joined text
+        self._texts = []
+        self.char_count = 0
+        self._joined = ""
+        self._joined_segments = 0
+
+    def __len__(self):
+        return len(self._texts)
+
+    def append(self, text, start=None, end=None, source="mixed"):
+        """Add a final segment and return its index. Times are seconds since capture started (meeting time)."""
+        if start is None:
+            start = self._ends[-1] if self._ends else 0.0
+        if end is None:
+            end = start
+        self._starts.append(start)
+        self._ends.append(end)
+        self._sources.append(SOURCES.index(source))
+        self._offsets.append(self.char_count + 1)
+        self._texts.append(text)
+        self.char_count += len(text) + 1
+        return len(self._texts) - 1
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self._texts)
+        return Segment(i, self._starts[i], self._ends[i], SOURCES[self._sources[i]], self._texts[i])
+
+    def text(self, start_char=0, end_char=None):
+        """The joined transcript, or the [start_char:end_char] slice of it, built lazily."""
+        if end_char is None:
+            end_char = self.char_count
+        if start_char <= 0 and end_char >= self.char_count:
+            if self._joined_segments < len(self._texts):
+                new = self._texts[self._joined_segments:]
+                self._joined += "".join(" " + t for t in new)
+                self._joined_segments = len(self._texts)
+            return self._joined
+        # Only join the segments the slice touches
+        first = max(bisect_right(self._offsets, start_char) - 1, 0)
+        last = bisect_right(self._offsets, end_char)
+        base = self._offsets[first] - 1 if self._texts else 0
+        piece = "".join(" " + t for t in self._texts[first:last])
+        return piece[start_char - base:end_char - base]
+
+    def segments_between(self, t0, t1):
+        """Indices of the segments overlapping [t0, t1) seconds."""
+        first = bisect_right(self._ends, t0)
+        last = bisect_left(self._starts, t1)
+        return range(first, max(first, last))
+
+    def text_between(self, t0, t1):
+        return " ".join(self._texts[i] for i in self.segments_between(t0, t1))
+
+    def texts(self, indices):
+        return [self._texts[i] for i in indices]
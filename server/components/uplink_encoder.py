@@ -0,0 +1,131 @@
+import numpy as np
+import soundfile as sf
+
+# Deepgram `encoding` value -> soundfile (format, subtype), None means raw PCM
+UPLINK_FORMATS = {
+    "linear16": None,
+    "flac": ("FLAC", "PCM_16"),
+    "opus": ("OGG", "OPUS"),
+}
+OPUS_SAMPLE_RATES = (8000, 12000, 16000, 24000, 48000)
+
+
+class _StreamSink:
+    """Write-only file object for soundfile that hands out bytes as they are produced.
+
+    libsndfile seeks back to patch the header when the file is closed; those
+    rewrites land on bytes that were already streamed and are dropped, which is
+    fine because streaming FLAC/Ogg decoders don't need the final length.
+    """
+
+    def __init__(self):
+        self._pos = 0
+        self._size = 0
+        self._pending = []
+
+    def write(self, data):
+        n = len(data)
+        if self._pos >= self._size:
+            self._pending.append(bytes(data))
+            self._size += n
+        self._pos += n
+        return n
+
+    def seek(self, offset, whence=0):
+        if whence == 0:
+            self._pos = offset
+        elif whence == 1:
+            self._pos += offset
+        else:
+            self._pos = self._size + offset
+        return self._pos
+
+    def tell(self):
+        return self._pos
+
+    def read(self, size=-1):
+        return b""
+
+    def take(self):
+        data = b"".join(self._pending)
+        self._pending.clear()
+        return data
+
+
+class UplinkEncoder:
+    """Turns mixed float32 blocks into the bytes sent on the Deepgram socket.
+
+    linear16 is the raw int16 conversion send_audio always did. flac and opus
+    run a streaming soundfile encoder; they emit nothing for some blocks while
+    the codec fills a frame (FLAC) or an Ogg page (Opus, roughly a second of
+    audio), so they trade a little latency for bandwidth.
+    """
+
+    def __init__(self, encoding, sample_rate, channels):
+        if encoding not in UPLINK_FORMATS:
+            raise ValueError(f"Unsupported uplink encoding {encoding!r}, expected one of {list(UPLINK_FORMATS)}")
+        if encoding == "opus" and sample_rate not in OPUS_SAMPLE_RATES:
+            raise ValueError(f"Opus can't encode {sample_rate} Hz, supported rates: {OPUS_SAMPLE_RATES}")
+        self.encoding = encoding
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self.bytes_out = 0
+        self.frames_in = 0
+        self._sink = None
+        self._file = None
+        self._stream_frames = 0  # frames in the current FLAC/Ogg stream
+        if UPLINK_FORMATS[encoding]:
+            self._open()
+
+    def _open(self):
+        fmt, subtype = UPLINK_FORMATS[self.encoding]
+        self._sink = _StreamSink()
+        self._file = sf.SoundFile(self._sink, mode="w", samplerate=self.sample_rate,
+                                  channels=self.channels, format=fmt, subtype=subtype)
+        self._stream_frames = 0
+
+    def url_params(self):
+        return {"encoding": self.encoding, "sample_rate": self.sample_rate, "channels": self.channels}
+
+    def encode(self, block):
+        """Encode one (frames, channels) float32 block, returns b"" while the codec is buffering."""
+        self.frames_in += len(block)
+        if self._file is None:
+            data = (block * 32767).astype(np.int16).tobytes()
+        else:
+            self._file.write(block)
+            self._stream_frames += len(block)
+            data = self._sink.take()
+        self.bytes_out += len(data)
+        return data
+
+    def flush(self):
+        """End the stream here and start a new one, returns the bytes the codec was holding back.
+
+        For a pause in the audio: FLAC holds back up to a frame and Opus up to
+        an Ogg page, so the end of an utterance would otherwise only go out
+        with the next one. What follows is a new stream with its own header.
+        linear16 holds nothing back.
+        """
+        if self._file is None or not self._stream_frames:
+            return b""
+        data = self.close()
+        self._open()
+        return data
+
+    def close(self):
+        """Flush whatever the codec still holds, returns the remaining bytes."""
+        if self._file is None or self._file.closed:
+            return b""
+        self._file.close()
+        data = self._sink.take()
+        self.bytes_out += len(data)
+        return data
+
+    def stats(self):
+        seconds = self.frames_in / self.sample_rate
+        return {
+            "encoding": self.encoding,
+            "bytes_out": self.bytes_out,
+            "bytes_per_sec": round(self.bytes_out / seconds) if seconds else 0,
+        }
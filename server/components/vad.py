@@ -0,0 +1,90 @@
+from collections import deque
+import numpy as np
+
+
+class VoiceGate:
+    """Energy + zero-crossing voice activity gate for the ASR uplink.
+
+    Each mixed block is classified as a whole: it counts as speech when its
+    level is well above a running noise floor and its zero-crossing rate is
+    not that of broadband hiss. Silent blocks are held back; the last
+    `preroll_ms` of them are kept and sent ahead of the first speech block so
+    word onsets aren't clipped, and the gate stays open `hangover_ms` after
+    the last speech block so trailing syllables and the pause the ASR uses
+    for endpointing still go out.
+
+    The noise floor never sits below the quietest block of the last
+    `floor_window_ms`, so steady noise loud enough to pass for speech (a
+    hum, a fan) stops opening the gate once it has lasted that long.
+    """
+
+    def __init__(self, sample_rate, block_size, preroll_ms=300, hangover_ms=600,
+                 margin_db=10.0, min_speech_db=-55.0, max_zcr=0.35, floor_window_ms=5000):
+        block_ms = 1000.0 * block_size / sample_rate
+        self.preroll = deque(maxlen=max(1, int(round(preroll_ms / block_ms))))
+        self._levels = deque(maxlen=max(1, int(round(floor_window_ms / block_ms))))  # recent block levels, dB
+        self.hangover_blocks = max(1, int(round(hangover_ms / block_ms)))
+        self.margin_db = margin_db
+        self.min_speech_db = min_speech_db
+        self.max_zcr = max_zcr
+        self.noise_floor_db = -60.0
+        self.is_open = False
+        self.ended = False  # set on the call where the gate closed
+        self._quiet_blocks = 0
+        self.frames_in = 0
+        self.frames_sent = 0
+
+    def is_speech(self, block):
+        x = block.reshape(-1)
+        rms = np.sqrt(np.mean(np.square(x, dtype=np.float64)))
+        level_db = float(20 * np.log10(rms + 1e-10))
+        zcr = np.count_nonzero(np.signbit(x[1:]) != np.signbit(x[:-1])) / len(x)
+        loud = level_db > max(self.noise_floor_db + self.margin_db, self.min_speech_db)
+        speech = loud and (zcr < self.max_zcr or level_db > self.noise_floor_db + 2 * self.margin_db)
+        if not speech:
+            # Follow the floor down quickly and up slowly so speech doesn't drag it up
+            rate = 0.2 if level_db < self.noise_floor_db else 0.02
+            self.noise_floor_db = max(self.noise_floor_db + rate * (level_db - self.noise_floor_db), -90.0)
+        # Minimum statistics, on every block: speech has quieter blocks between words
+        # within the window, noise that never drops is the floor
+        self._levels.append(level_db)
+        if len(self._levels) == self._levels.maxlen:
+            self.noise_floor_db = max(self.noise_floor_db, min(self._levels))
+        return speech
+
+    def process(self, block):
+        """Return the blocks to send for this input block (possibly none)."""
+        self.frames_in += len(block)
+        self.ended = False
+        if self.is_speech(block):
+            self._quiet_blocks = 0
+            if self.is_open:
+                out = [block]
+            else:
+                self.is_open = True
+                out = list(self.preroll) + [block]
+                self.preroll.clear()
+        elif self.is_open:
+            self._quiet_blocks += 1
+            out = [block]
+            if self._quiet_blocks >= self.hangover_blocks:
+                self.is_open = False
+                self.ended = True
+        else:
+            self.preroll.append(block)
+            out = []
+        self.frames_sent += sum(len(b) for b in out)
+        return out
+
+    @property
+    def suppressed_pct(self):
+        if not self.frames_in:
+            return 0.0
+        return 100.0 * (1 - self.frames_sent / self.frames_in)
+
+    def stats(self):
+        return {
+            "suppressed_pct": round(self.suppressed_pct, 1),
+            "noise_floor_db": round(self.noise_floor_db, 1),
+            "gate_open": self.is_open,
+        }
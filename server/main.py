@@ -5,132 +5,365 @@ import subprocess
 import threading
 import os
 import sys
+import time
+import itertools
+from urllib.parse import unquote, urlparse
+from components.ipc import read_messages, MessageWriter
+from components.fanout import ClientChannel
+from components.retrieval import TranscriptIndex
+from components.answer_cache import AnswerCache
+from components.llm_gateway import get_gateway
+from components.pubsub import InProcessPubSub, RedisPubSub
 
-connected_clients = set()
-transcription_process = None
-transcription_lock = threading.Lock()
+CLIENT_QUEUE_SIZE = 100  # outbound messages buffered per client
+CLIENT_OVERFLOW_POLICY = "coalesce"  # see components/fanout.py OVERFLOW_POLICIES
+CHATBOT_PASSAGES = 5  # transcript passages retrieved into a chatbot prompt
+
+DEFAULT_SESSION = "default"  # clients connecting to ws://host:8765/ without a session ID
+# redis://[:password@]host:port to run several server nodes whose viewers see each other's
+# sessions; unset, transcripts and summaries only reach this server's clients
+PUBSUB_URL = os.getenv("PUBSUB_URL")
+# Recordings a client can have transcribed into its session with the "file" command
+RECORDINGS_DIR = os.getenv("RECORDINGS_DIR", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "audio"))
+
+standby_process = None  # pre-initialised transcriber parked until the next "start", for any session
+standby_lock = threading.Lock()
 main_event_loop = None
-latest_summary = ""  # Global variable to store the latest summary
-
-def start_transcription():
-    global transcription_process
-    with transcription_lock:
-        if transcription_process is None or transcription_process.poll() is not None:
-            print("[SERVER] Starting transcription subprocess...")
-            transcription_process = subprocess.Popen(
-                [sys.executable, '-u', 'components/transcribe_audio.py', '--ws-mode'],
-                cwd=os.path.dirname(os.path.abspath(__file__)),
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                text=True
-            )
-            threading.Thread(target=print_subprocess_output, args=(transcription_process,), daemon=True).start()
-        else:
-            print("[SERVER] Transcription already running.")
+chatbot_request_ids = itertools.count(1)  # for questions that don't carry their own request_id
+pubsub = None  # carries every session's transcripts and summaries, see get_pubsub()
+
+
+class Session:
+    """One meeting: its transcriber, transcript index, summary and subscribed clients.
+
+    Clients join a session through the websocket path (ws://host:8765/<session id>),
+    and everything a session broadcasts goes to its own clients only. Each
+    session's capture, mixing, ASR and summaries run in its own transcriber
+    process, so concurrent meetings spread across cores.
+    """
+
+    def __init__(self, session_id):
+        self.session_id = session_id
+        self.clients = {}  # websocket -> ClientChannel
+        self.transcription_process = None
+        self.transcription_started_at = None  # when "start" was handled, cleared at the first transcript
+        self.lock = threading.Lock()
+        self.latest_summary = ""
+        self.latest_metrics = {}  # latest pipeline metrics reported by the transcriber, keyed by source
+        self.transcript_index = TranscriptIndex()  # BM25 index over the session's finals, for the chatbot
+        self.summary_version = 0  # bumped with every new summary, part of the chatbot cache key
+        self.answer_cache = AnswerCache()
+
+    @property
+    def transcribing(self):
+        return self.transcription_process is not None and self.transcription_process.poll() is None
+
+    def client_stats(self):
+        return [channel.stats() for channel in self.clients.values()]
+
+
+sessions = {}  # session ID -> Session
+
+def get_session(session_id=DEFAULT_SESSION):
+    session = sessions.get(session_id)
+    if session is None:
+        session = sessions[session_id] = Session(session_id)
+        get_pubsub().subscribe(session_id)
+    return session
+
+def session_id_from_path(path):
+    # The last path component names the session: /team-a and /session/team-a are both "team-a"
+    parts = [p for p in urlparse(path or "/").path.split("/") if p]
+    return unquote(parts[-1]) if parts else DEFAULT_SESSION
+
+def release_session(session):
+    # Forget a session nobody is watching or transcribing any more
+    if not session.clients and not session.transcribing and sessions.get(session.session_id) is session:
+        del sessions[session.session_id]
+        get_pubsub().unsubscribe(session.session_id)
+
+def get_pubsub():
+    # In-process unless run_ws_server connected to PUBSUB_URL
+    global pubsub
+    if pubsub is None:
+        pubsub = InProcessPubSub(deliver)
+    return pubsub
+
+def spawn_transcriber(standby=False, session=None, files=None):
+    args = [sys.executable, '-u', 'components/transcribe_audio.py', '--ws-mode']
+    if standby:
+        args.append('--standby')
+    if files:
+        # Play these recordings into the session instead of capturing, then exit. One at a
+        # time: clients show one live segment, so two files' interims would interleave
+        args += ['--file', *files, '--jobs', '1']
+    # stdout carries framed IPC messages (components/ipc.py), stderr the human logs,
+    # stdin the commands for a parked standby transcriber
+    proc = subprocess.Popen(
+        args,
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        stdin=subprocess.PIPE if standby else None,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        env={**os.environ, "PYTHONIOENCODING": "utf-8"}
+    )
+    # The session its messages belong to, set when a standby transcriber is handed one
+    proc.session = session
+    threading.Thread(target=read_subprocess_messages, args=(proc,), daemon=True).start()
+    threading.Thread(target=print_subprocess_output, args=(proc,), daemon=True).start()
+    return proc
+
+def arm_standby():
+    # Keep one transcriber imported, initialised and connected to Deepgram so "start" is instant
+    global standby_process
+    with standby_lock:
+        if standby_process is None or standby_process.poll() is not None:
+            print("[SERVER] Arming standby transcriber...")
+            standby_process = spawn_transcriber(standby=True)
+
+def take_standby():
+    # The parked transcriber if there is a live one, it is nobody's standby afterwards
+    global standby_process
+    with standby_lock:
+        proc, standby_process = standby_process, None
+    return proc if proc is not None and proc.poll() is None else None
+
+def start_transcription(session):
+    with session.lock:
+        if session.transcribing:
+            print(f"[SERVER] Transcription already running for session {session.session_id}.")
+            return
+        session.transcription_started_at = time.monotonic()
+        session.transcript_index = TranscriptIndex()
+        session.answer_cache.clear()
+        proc = take_standby()
+        if proc is not None:
+            print(f"[SERVER] Handing session {session.session_id} to standby transcriber...")
+            try:
+                proc.session = session
+                MessageWriter(proc.stdin).send("start")
+                session.transcription_process = proc
+            except OSError as e:
+                print(f"[SERVER] Standby transcriber unavailable: {e}")
+                proc = None
+        if proc is None:
+            print(f"[SERVER] Starting transcription subprocess for session {session.session_id}...")
+            session.transcription_process = spawn_transcriber(session=session)
+    # Park a fresh one for the next session to start
+    arm_standby()
+
+def transcribe_recordings(session, names):
+    # Reprocess recordings from RECORDINGS_DIR into the session, as its viewers watch
+    paths = []
+    for name in names:
+        path = os.path.realpath(os.path.join(RECORDINGS_DIR, name))
+        if os.path.dirname(path) != os.path.realpath(RECORDINGS_DIR) or not os.path.isfile(path):
+            print(f"[SERVER] No recording {name!r} in {RECORDINGS_DIR}")
+            return
+        paths.append(path)
+    if not paths:
+        return
+    with session.lock:
+        if session.transcribing:
+            print(f"[SERVER] Transcription already running for session {session.session_id}.")
+            return
+        session.transcription_started_at = time.monotonic()
+        session.transcript_index = TranscriptIndex()
+        session.answer_cache.clear()
+        print(f"[SERVER] Transcribing {len(paths)} recordings for session {session.session_id}...")
+        session.transcription_process = spawn_transcriber(session=session, files=paths)
 
 def print_subprocess_output(proc):
-    import re
-    summary_mode = False
-    summary_lines = []
-    for line in proc.stdout:
-        print(f"[TRANSCRIBE] {line}", end="")
-        # Transcript broadcast
-        match = re.match(r"Transcript: (.*)", line)
-        if match:
-            transcript = match.group(1)
-            if main_event_loop:
-                asyncio.run_coroutine_threadsafe(
-                    broadcast_transcript(transcript), main_event_loop
-                )
-        # Summary broadcast
-        if "=== SUMMARY ===" in line:
-            summary_mode = True
-            summary_lines = []
-            continue
-        if summary_mode:
-            if "===============" in line:
-                summary_mode = False
-                summary = "\n".join(summary_lines).strip()
-                if summary and main_event_loop:
-                    asyncio.run_coroutine_threadsafe(
-                        broadcast_summary(summary), main_event_loop
-                    )
-            else:
-                summary_lines.append(line.rstrip())
-
-def stop_transcription():
-    global transcription_process
-    with transcription_lock:
-        if transcription_process and transcription_process.poll() is None:
-            print("[SERVER] Stopping transcription subprocess...")
-            transcription_process.terminate()
+    for line in proc.stderr:
+        print(f"[TRANSCRIBE] {line.decode('utf-8', errors='replace')}", end="")
+
+def read_subprocess_messages(proc):
+    try:
+        for msg in read_messages(proc.stdout):
+            handle_transcriber_message(proc, msg)
+    except ValueError as e:
+        print(f"[SERVER] Transcriber IPC error: {e}")
+
+def handle_transcriber_message(proc, msg):
+    msg_type = msg.get("type")
+    session = proc.session
+    if msg_type == "ready":
+        print("[SERVER] Standby transcriber ready.")
+        return
+    if session is None:
+        print(f"[SERVER] Message from a transcriber without a session: {msg_type}")
+        return
+    if msg_type == "transcript":
+        if proc is session.transcription_process and session.transcription_started_at is not None:
+            elapsed = time.monotonic() - session.transcription_started_at
+            session.transcription_started_at = None
+            session.latest_metrics["session"] = {"time_to_first_transcript": round(elapsed, 3)}
+            print(f"[SERVER] Time to first transcript in session {session.session_id}: {elapsed:.2f}s")
+        if main_event_loop:
+            asyncio.run_coroutine_threadsafe(
+                broadcast_transcript(msg["text"], msg.get("segment_id"), msg.get("is_final", True),
+                                     msg.get("speech_final", False), session=session,
+                                     start=msg.get("start"), end=msg.get("end")),
+                main_event_loop
+            )
+    elif msg_type == "summary":
+        if msg["text"] and main_event_loop:
+            asyncio.run_coroutine_threadsafe(
+                broadcast_summary(msg["text"], session=session), main_event_loop
+            )
+    elif msg_type == "metrics":
+        session.latest_metrics[msg.get("source", "unknown")] = msg
+    else:
+        print(f"[SERVER] Unknown transcriber message: {msg_type}")
+
+def stop_transcription(session):
+    with session.lock:
+        proc = session.transcription_process
+        if proc and proc.poll() is None:
+            print(f"[SERVER] Stopping transcription subprocess for session {session.session_id}...")
+            proc.terminate()
             try:
-                transcription_process.wait(timeout=5)
+                proc.wait(timeout=5)
             except subprocess.TimeoutExpired:
-                transcription_process.kill()
+                proc.kill()
             print("[SERVER] Transcription stopped.")
         else:
-            print("[SERVER] No transcription process running.")
+            print(f"[SERVER] No transcription process running for session {session.session_id}.")
+    arm_standby()
 
-async def transcript_ws_server(websocket, path):
-    print("[SERVER] Client connected")
-    connected_clients.add(websocket)
+async def transcript_ws_server(websocket, path=None):
+    if path is None:
+        path = websocket.request.path  # websockets' newer handler API doesn't pass the path
+    session = get_session(session_id_from_path(path))
+    print(f"[SERVER] Client connected to session {session.session_id}")
+    channel = ClientChannel(websocket, max_queue=CLIENT_QUEUE_SIZE, policy=CLIENT_OVERFLOW_POLICY)
+    session.clients[websocket] = channel
     try:
         async for message in websocket:
             try:
                 data = json.loads(message)
                 if data.get("type") == "command":
                     cmd = data.get("command")
+                    # Spawning (Popen) and reaping (up to 5 s in wait()) a transcriber block, so they
+                    # run on a worker thread instead of the loop every session's fan-out runs on
                     if cmd == "start":
-                        start_transcription()
+                        await asyncio.to_thread(start_transcription, session)
                     elif cmd == "stop":
-                        stop_transcription()
+                        await asyncio.to_thread(stop_transcription, session)
+                    elif cmd == "file":
+                        await asyncio.to_thread(transcribe_recordings, session, data.get("files", []))
                 elif data.get("type") == "chatbot_question":
-                    # Handle chatbot question: answer using summary
-                    from components.transcript_ai import TranscriptAI
-                    ai = TranscriptAI()
-                    # Use the latest summary (store it globally)
-                    global latest_summary
-                    question = data.get("question", "")
-                    summary = latest_summary if 'latest_summary' in globals() else ""
-                    if summary:
-                        # Use Cohere to answer based on summary
-                        import cohere, os
-                        co = cohere.Client(os.getenv("COHERE_API_KEY"))
-                        prompt = f"Summary: {summary}\n\nQuestion: {question}\nAnswer:"
-                        response = co.generate(model="command-r-plus", prompt=prompt, max_tokens=100, temperature=0.3)
-                        answer = response.generations[0].text.strip()
-                    else:
-                        answer = "No summary available yet. Please wait for a summary to be generated."
-                    await websocket.send(json.dumps({"type": "chatbot_response", "answer": answer}))
+                    # Answered in the background so this client's commands aren't held up
+                    request_id = data.get("request_id") or str(next(chatbot_request_ids))
+                    asyncio.create_task(answer_chatbot_question(session, channel, data.get("question", ""), request_id))
             except Exception as e:
                 print(f"Error handling message: {e}")
     finally:
-        connected_clients.remove(websocket)
-        print("[SERVER] Client disconnected")
-
-async def broadcast_transcript(transcript):
-    if connected_clients:
-        data = json.dumps({"type": "transcript", "text": transcript})
-        print(f"[BACKEND] Broadcasting to {len(connected_clients)} clients: {data}")
-        await asyncio.gather(*(client.send(data) for client in connected_clients))
-
-async def broadcast_summary(summary):
-    global latest_summary
-    latest_summary = summary
-    if connected_clients:
-        data = json.dumps({"type": "summary", "text": summary})
-        print(f"[BACKEND] Broadcasting summary to {len(connected_clients)} clients: {data}")
-        await asyncio.gather(*(client.send(data) for client in connected_clients))
+        session.clients.pop(websocket, None)
+        channel.cancel()
+        release_session(session)
+        print(f"[SERVER] Client disconnected from session {session.session_id}, stats: {channel.stats()}")
+
+async def answer_chatbot_question(session, channel, question, request_id):
+    # Answer using the summary plus the transcript passages most relevant to the question.
+    # The answer streams to the client as chatbot_delta messages, then chatbot_response
+    # carries the whole text. Askers of the same question against the same content share
+    # one answer (and its stream).
+    def on_delta(text):
+        # Droppable: if the client falls behind, the final response still has the full answer
+        channel.enqueue(json.dumps({"type": "chatbot_delta", "request_id": request_id, "text": text}),
+                        droppable=True)
+
+    version = (session.transcript_index.segments, session.summary_version)
+    try:
+        answer = await session.answer_cache.get(question, version,
+                                                lambda emit: generate_answer(session, question, emit),
+                                                on_delta=on_delta)
+    except Exception as e:
+        print(f"[SERVER] Chatbot answer failed: {e}")
+        answer = "Sorry, I couldn't answer that right now. Please try again."
+    session.latest_metrics["chatbot"] = session.answer_cache.stats()
+    session.latest_metrics["llm"] = get_gateway().stats()
+    channel.enqueue(json.dumps({"type": "chatbot_response", "request_id": request_id, "answer": answer}))
+
+async def generate_answer(session, question, emit):
+    summary = session.latest_summary
+    excerpts = session.transcript_index.context(question, CHATBOT_PASSAGES)
+    if not (summary or excerpts):
+        return "No summary available yet. Please wait for a summary to be generated."
+    prompt = f"Summary: {summary}\n\nTranscript excerpts: {excerpts}\n\nQuestion: {question}\nAnswer:"
+    parts = []
+    async for text in get_gateway().generate_stream(prompt, max_tokens=100, temperature=0.3):
+        parts.append(text)
+        emit(text)
+    return "".join(parts).strip()
+
+def broadcast(session, data, key=None, droppable=False):
+    # Each client has its own queue and writer task, so this never waits on the network
+    for channel in list(session.clients.values()):
+        channel.enqueue(data, key=key, droppable=droppable)
+
+async def broadcast_transcript(transcript, segment_id=None, is_final=True, speech_final=False, session=None,
+                               start=None, end=None):
+    session = session or get_session()
+    get_pubsub().publish(session.session_id, {"type": "transcript", "segment_id": segment_id, "text": transcript,
+                                              "is_final": is_final, "speech_final": speech_final,
+                                              "start": start, "end": end})
+
+async def broadcast_summary(summary, session=None):
+    session = session or get_session()
+    get_pubsub().publish(session.session_id, {"type": "summary", "text": summary})
+
+def deliver(session_id, msg):
+    # Every transcript and summary of a session this node has, from its own transcriber
+    # or, with PUBSUB_URL, another node's. Runs on the event loop.
+    session = sessions.get(session_id)
+    if session is None:
+        return
+    if msg["type"] == "transcript":
+        if msg["is_final"] and msg["text"]:
+            # The chatbot searches this node's index, whichever node transcribed the segment
+            session.transcript_index.add(msg["text"], msg.get("start"), msg.get("end"))
+        if session.clients:
+            data = json.dumps({"type": "transcript", "segment_id": msg["segment_id"], "text": msg["text"],
+                               "is_final": msg["is_final"], "speech_final": msg["speech_final"]})
+            print(f"[BACKEND] Broadcasting to {len(session.clients)} clients in session {session.session_id}: {data}")
+            # A newer hypothesis (or the final) for a segment replaces one still queued,
+            # and interims are the first thing dropped for a client that falls behind
+            broadcast(session, data, key=("segment", msg["segment_id"]), droppable=not msg["is_final"])
+    elif msg["type"] == "summary":
+        session.latest_summary = msg["text"]
+        session.summary_version += 1
+        if session.clients:
+            data = json.dumps({"type": "summary", "text": msg["text"]})
+            print(f"[BACKEND] Broadcasting summary to {len(session.clients)} clients in session {session.session_id}: {data}")
+            broadcast(session, data, key="summary")
+
+def report_gap(session_id, node, missing):
+    print(f"[!] Session {session_id} missed {missing} messages from node {node}")
+    session = sessions.get(session_id)
+    if session is not None:
+        session.latest_metrics["pubsub"] = get_pubsub().stats()
+
+async def start_pubsub(url=PUBSUB_URL):
+    global pubsub
+    if url and not isinstance(pubsub, RedisPubSub):
+        pubsub = RedisPubSub(url, deliver, on_gap=report_gap)
+        print(f"[SERVER] Connecting to pub/sub server at {pubsub.host}:{pubsub.port} as node {pubsub.node_id}")
+        await pubsub.start()
+        for session_id in sessions:
+            pubsub.subscribe(session_id)
 
 # To run the websocket server
 async def run_ws_server():
     global main_event_loop
     main_event_loop = asyncio.get_running_loop()
+    await start_pubsub()
     server = await websockets.serve(transcript_ws_server, "0.0.0.0", 8765)
-    print("WebSocket server started on ws://0.0.0.0:8765")
+    print("WebSocket server started on ws://0.0.0.0:8765 (join a session at ws://host:8765/<session id>)")
     await server.wait_closed()
 
 if __name__ == "__main__":
     import asyncio
-    asyncio.run(run_ws_server())
\ No newline at end of file
+    arm_standby()
+    asyncio.run(run_ws_server())